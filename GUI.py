@@ -7,10 +7,219 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.anchorlayout import AnchorLayout
-from kivy.graphics import Color, Rectangle
+from kivy.uix.progressbar import ProgressBar
+from kivy.uix.stencilview import StencilView
+from kivy.graphics import Color, Rectangle, Line
+from kivy.properties import StringProperty
+from kivy.graphics.texture import Texture
+from kivy.clock import mainthread
 from kivy.app import App
+from PIL import Image as ImagemPIL
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+import multiprocessing
+import time
 import os
 
+import numpy as np
+
+import dataProcessing
+import graficos
+import graficos2
+
+# Captura analisada pelo botão "Gerar Análise" (a mesma usada por graficos.py)
+ARQUIVO_CAPTURA = "data_300k.csv"
+
+
+class CacheTexturas:
+    # Texturas dos gráficos já reduzidas, guardadas pelas mais recentes. A leitura e a
+    # redução do PNG rodam em threads de fundo; só a criação da textura (que precisa do
+    # OpenGL) fica na thread da interface, então trocar de gráfico não trava a janela.
+    def __init__(self, tamanho_maximo=1280, capacidade=16):
+        self.tamanho_maximo = tamanho_maximo
+        self.capacidade = capacidade
+        self.texturas = OrderedDict()  # (caminho, mtime) -> Texture
+        self.pendentes = {}  # (caminho, mtime) -> funções esperando a textura
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def obter(self, caminho, ao_carregar=None):
+        # Chama ao_carregar(textura) na thread da interface: na hora, se a textura já está
+        # no cache, ou quando a decodificação terminar. O mtime na chave faz os gráficos
+        # regerados serem lidos de novo.
+        try:
+            chave = (caminho, os.stat(caminho).st_mtime_ns)
+        except OSError:
+            return
+        if chave in self.texturas:
+            self.texturas.move_to_end(chave)
+            if ao_carregar:
+                ao_carregar(self.texturas[chave])
+        elif chave in self.pendentes:
+            if ao_carregar:
+                self.pendentes[chave].append(ao_carregar)
+        else:
+            self.pendentes[chave] = [ao_carregar] if ao_carregar else []
+            self.executor.submit(self._decodificar, chave)
+
+    def precarregar(self, caminhos):
+        for caminho in caminhos:
+            self.obter(caminho)
+
+    def _decodificar(self, chave):
+        try:
+            with ImagemPIL.open(chave[0]) as original:
+                imagem = original.convert("RGBA")
+            imagem.thumbnail((self.tamanho_maximo, self.tamanho_maximo))
+            self._criar_textura(chave, imagem.tobytes(), imagem.size)
+        except OSError:
+            self._criar_textura(chave, None, None)
+
+    @mainthread
+    def _criar_textura(self, chave, dados, tamanho):
+        callbacks = self.pendentes.pop(chave, [])
+        if dados is None:
+            return
+        textura = Texture.create(size=tamanho, colorfmt="rgba")
+        textura.blit_buffer(dados, colorfmt="rgba", bufferfmt="ubyte")
+        textura.flip_vertical()
+        self.texturas[chave] = textura
+        while len(self.texturas) > self.capacidade:
+            self.texturas.popitem(last=False)
+        for ao_carregar in callbacks:
+            ao_carregar(textura)
+
+
+texturas = CacheTexturas()
+
+
+def lttb(x, y, n_pontos):
+    # Largest-Triangle-Three-Buckets: reduz a série a n_pontos mantendo o formato.
+    # O primeiro e o último ponto ficam; o resto é dividido em n_pontos - 2 baldes e, de
+    # cada balde, fica o ponto que forma o maior triângulo com o ponto escolhido no
+    # balde anterior e a média do balde seguinte (picos e vales não somem).
+    if len(x) <= n_pontos or n_pontos < 3:
+        return x, y
+    bordas = np.linspace(1, len(x) - 1, n_pontos - 1).astype(np.int64)
+    tamanhos = np.diff(bordas)
+    medias_x = np.add.reduceat(x[1:-1], bordas[:-1] - 1) / tamanhos
+    medias_y = np.add.reduceat(y[1:-1], bordas[:-1] - 1) / tamanhos
+
+    escolhidos = np.empty(n_pontos, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, len(x) - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        if i + 1 < n_pontos - 2:
+            proximo_x, proximo_y = medias_x[i + 1], medias_y[i + 1]
+        else:
+            proximo_x, proximo_y = x[-1], y[-1]
+        areas = np.abs((x[anterior] - proximo_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (proximo_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        escolhidos[i + 1] = anterior
+    return x[escolhidos], y[escolhidos]
+
+
+class SerieTempo(StencilView):
+    # Série temporal desenhada direto dos agregados por segundo e por minuto
+    # (stats["series_tempo"]), sem gerar imagem. Arrastar move a janela, a roda do
+    # mouse dá zoom e o toque duplo volta à série inteira. Cada quadro desenha no
+    # máximo um ponto por pixel (ver lttb), então o custo não depende da captura.
+    descricao = StringProperty("")
+
+    # Acima de tantos pontos por pixel na janela, usa a série por minuto
+    PONTOS_POR_PIXEL = 50
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.series = {}  # resolução em segundos -> (tempos, valor por segundo)
+        self.limites = self.janela = (0.0, 1.0)
+        self.unidade = ""
+        with self.canvas:
+            Color(0.25, 0.41, 0.88, 1)
+            self.linha = Line(points=[], width=1.2)
+        self.bind(pos=self.redesenhar, size=self.redesenhar)
+
+    def definir_series(self, series_tempo, campo, unidade):
+        # campo é "pacotes" ou "bytes"; os totais por minuto viram média por segundo,
+        # para a escala não mudar quando o zoom troca de resolução
+        self.series = {}
+        for resolucao, nome in ((1, "segundo"), (60, "minuto")):
+            serie = series_tempo[nome]
+            self.series[resolucao] = (serie["tempos"].astype(np.float64), serie[campo] / resolucao)
+        self.unidade = unidade
+        tempos = self.series[1][0]
+        self.limites = (tempos[0], tempos[-1] + 1) if len(tempos) else (0.0, 1.0)
+        self.mover_janela(*self.limites)
+
+    def mover_janela(self, inicio, fim):
+        # Mantém a janela dentro da série e com pelo menos 10 segundos
+        menor, maior = self.limites
+        largura = min(max(fim - inicio, 10.0), maior - menor)
+        inicio = min(max(inicio, menor), maior - largura)
+        self.janela = (inicio, inicio + largura)
+        self.redesenhar()
+
+    def redesenhar(self, *args):
+        if not self.series or self.width < 2:
+            return
+        inicio, fim = self.janela
+        largura_px = int(self.width)
+
+        for resolucao in sorted(self.series):
+            if (fim - inicio) / resolucao <= largura_px * self.PONTOS_POR_PIXEL:
+                break
+        tempos, valores = self.series[resolucao]
+
+        # Um ponto a mais de cada lado, para a linha chegar até as bordas
+        a = max(int(np.searchsorted(tempos, inicio)) - 1, 0)
+        b = int(np.searchsorted(tempos, fim)) + 1
+        tempos, valores = lttb(tempos[a:b], valores[a:b], largura_px)
+        if not len(tempos):
+            self.linha.points = []
+            self.descricao = ""
+            return
+
+        maximo = max(float(valores.max()), 1e-9)
+        x = self.x + (tempos - inicio) / (fim - inicio) * self.width
+        y = self.y + valores / maximo * self.height * 0.9
+        self.linha.points = np.column_stack((x, y)).ravel().tolist()
+
+        formato = '%Y-%m-%d %H:%M:%S'
+        self.descricao = (f"{time.strftime(formato, time.gmtime(inicio))} a {time.strftime(formato, time.gmtime(fim))}"
+                          f" | máx. {maximo:.1f} {self.unidade}/s"
+                          f" ({'por segundo' if resolucao == 1 else 'média por minuto'})")
+
+    def on_touch_down(self, touch):
+        if not self.series or not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        inicio, fim = self.janela
+        if touch.is_mouse_scrolling:
+            fator = 0.8 if touch.button == "scrolldown" else 1.25
+            centro = inicio + (touch.x - self.x) / self.width * (fim - inicio)
+            self.mover_janela(centro - (centro - inicio) * fator, centro + (fim - centro) * fator)
+        elif touch.is_double_tap:
+            self.mover_janela(*self.limites)
+        else:
+            touch.grab(self)
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_move(touch)
+        inicio, fim = self.janela
+        deslocamento = touch.dx / self.width * (fim - inicio)
+        self.mover_janela(inicio - deslocamento, fim - deslocamento)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        return True
+
 
 class TelaMenuInicial(Screen):
     def __init__(self, **kwargs):
@@ -120,13 +329,21 @@ class TelaAnalise(Screen):
 
         self.graficos_tempo = [
             ("img/tempo/pacotes_tempo.png", "Pacotes por Tempo"),
-            ("img/tempo/trafego_agregado_tempo.png", "Tráfego Agregado por Tempo")
+            ("img/tempo/trafego_agregado_tempo.png", "Tráfego Agregado por Tempo"),
+            ("img/tempo/entropia_tempo.png", "Entropia de IPs por Tempo")
         ]
 
         self.graficos_scatter = [
             ("img/scatter/tamanho_frequencia.png", "Scatter Tamanho vs Frequência")
         ]
 
+        # Séries desenhadas na hora a partir do resultado da análise (ver SerieTempo)
+        self.series_interativas = [
+            ("pacotes", "Pacotes ao Longo do Tempo (arraste para mover, role para zoom, toque duplo para ver tudo)"),
+            ("bytes", "Tráfego ao Longo do Tempo (arraste para mover, role para zoom, toque duplo para ver tudo)"),
+        ]
+        self.stats = None
+
         # Inicializa a lista atual com uma lista vazia (será atribuída conforme o botão)
         self.graficos_atual = []
         self.indice_atual = 0  # Índice do gráfico atual
@@ -156,6 +373,20 @@ class TelaAnalise(Screen):
         btn_scatter.bind(on_press=self.alternar_grafico)
         barra_lateral.add_widget(btn_scatter)
 
+        btn_serie = Button(text="Série Interativa", size_hint=(1, 0.1))
+        btn_serie.bind(on_press=self.alternar_grafico)
+        barra_lateral.add_widget(btn_serie)
+
+        # Análise da captura e geração dos gráficos, em segundo plano
+        self.btn_analisar = Button(text="Gerar Análise", size_hint=(1, 0.1))
+        self.btn_analisar.bind(on_press=self.iniciar_analise)
+        barra_lateral.add_widget(self.btn_analisar)
+
+        self.barra_progresso = ProgressBar(max=100, value=0, size_hint=(1, 0.05))
+        barra_lateral.add_widget(self.barra_progresso)
+
+        self.label_status = Label(text="", size_hint=(1, 0.05), font_size='12sp')
+        barra_lateral.add_widget(self.label_status)
 
         # Botão de voltar
         btn_voltar = Button(text="Voltar", size_hint=(1, 0.1))
@@ -183,6 +414,11 @@ class TelaAnalise(Screen):
         )
         self.fundo_branco.add_widget(self.imagem)
 
+        # Série interativa e a descrição da janela visível, no lugar da imagem quando ativa
+        self.serie = SerieTempo(size_hint=(0.9, 0.8), pos_hint={"center_x": 0.5, "center_y": 0.45})
+        self.label_serie = Label(size_hint=(1, 0.1), pos_hint={"center_x": 0.5, "top": 1}, color=(0, 0, 0, 1))
+        self.serie.bind(descricao=self.label_serie.setter("text"))
+
         # Adicionar o fundo branco à área de gráficos
         self.area_grafico.add_widget(self.fundo_branco)
 
@@ -210,6 +446,8 @@ class TelaAnalise(Screen):
     def alternar_grafico(self, instance):
         if instance.text == "Gráfico de Barra":
             self.graficos_atual = self.graficos_barras
+        elif instance.text == "Série Interativa":
+            self.graficos_atual = self.series_interativas
         elif instance.text == "Boxplot":
             self.graficos_atual = self.grafico_boxplot
         elif instance.text == "Violin Plot":
@@ -235,10 +473,36 @@ class TelaAnalise(Screen):
     def atualizar_imagem(self):
         if self.graficos_atual:  # Verifica se há gráficos na lista atual
             caminho_imagem, legenda = self.graficos_atual[self.indice_atual]
-            if os.path.exists(caminho_imagem):
-                self.imagem.source = caminho_imagem
-                self.imagem.reload()
             self.label_explicativo.text = legenda
+            if self.graficos_atual is self.series_interativas:
+                self._mostrar_serie(caminho_imagem)
+                return
+            self._trocar_conteudo(self.imagem)
+            texturas.obter(caminho_imagem, partial(self._mostrar_textura, caminho_imagem))
+
+            # Deixa os gráficos vizinhos decodificados para a navegação não esperar
+            vizinhos = self.graficos_atual[max(self.indice_atual - 1, 0):self.indice_atual + 2]
+            texturas.precarregar(caminho for caminho, _ in vizinhos)
+
+    def _mostrar_textura(self, caminho_imagem, textura):
+        # Ignora texturas que chegam depois de o usuário já ter trocado de gráfico
+        if self.graficos_atual and self.graficos_atual[self.indice_atual][0] == caminho_imagem:
+            self.imagem.texture = textura
+
+    def _mostrar_serie(self, campo):
+        if self.stats is None or "series_tempo" not in self.stats:
+            self._trocar_conteudo(self.imagem)
+            self.label_status.text = "Gere a análise para ver a série"
+            return
+        self._trocar_conteudo(self.serie, self.label_serie)
+        self.serie.definir_series(self.stats["series_tempo"], campo, campo)
+
+    def _trocar_conteudo(self, *widgets):
+        # Deixa no fundo branco só os widgets dados (a imagem ou a série interativa)
+        if list(self.fundo_branco.children) != list(reversed(widgets)):
+            self.fundo_branco.clear_widgets()
+            for widget in widgets:
+                self.fundo_branco.add_widget(widget)
 
     def anterior_grafico(self, *args):
         if self.indice_atual > 0:
@@ -253,6 +517,45 @@ class TelaAnalise(Screen):
     def voltar_menu(self, *args):
         self.manager.current = "Menu Inicial"
 
+    def iniciar_analise(self, *args):
+        self.btn_analisar.disabled = True
+        self.barra_progresso.value = 0
+        self.label_status.text = "Analisando captura..."
+        threading.Thread(target=self._executar_analise, daemon=True).start()
+
+    def _executar_analise(self):
+        # Roda fora da thread da interface; as mudanças na tela passam pelos métodos
+        # @mainthread. A leitura da captura vai até 80% da barra e os gráficos, o resto.
+        # Os processos da análise e dos gráficos são criados com spawn: um fork deste
+        # processo copiaria o estado do Kivy/OpenGL e travas seguradas por outras threads.
+        contexto = multiprocessing.get_context("spawn")
+        try:
+            stats = dataProcessing.analisar_com_cache(
+                ARQUIVO_CAPTURA, processos=os.cpu_count() or 1, contexto_processos=contexto,
+                progresso=lambda lidos, total: self._mostrar_progresso(80 * lidos / max(total, 1), "Analisando captura..."))
+            tarefas = graficos.tarefas_graficos(stats) + graficos2.tarefas_graficos2(graficos2.carregar_dados_json("stats.json"))
+            graficos.renderizar_graficos(
+                tarefas, contexto_processos=contexto,
+                progresso=lambda prontos, total: self._mostrar_progresso(80 + 20 * prontos / max(total, 1), "Gerando gráficos..."))
+        except Exception as e:
+            self._analise_concluida(f"Erro na análise: {e}")
+        else:
+            self._analise_concluida("Análise concluída", stats)
+
+    @mainthread
+    def _mostrar_progresso(self, valor, texto):
+        self.barra_progresso.value = valor
+        self.label_status.text = texto
+
+    @mainthread
+    def _analise_concluida(self, texto, stats=None):
+        if stats is not None:
+            self.stats = stats
+        self.btn_analisar.disabled = False
+        self.barra_progresso.value = 100
+        self.label_status.text = texto
+        self.atualizar_imagem()
+
     def _update_fundo(self, instance, value):
         self.fundo_rect.pos = instance.pos
         self.fundo_rect.size = instance.size
@@ -268,7 +571,7 @@ class TelaGraficosBasicos(Screen):
             ("img/barras/ip_destino.png", "Top IPs de Destino"),
             ("img/barras/top_10_horizon_scan.png", "IPs com Mais Destinos (Scan)"),
             ("img/barras/top_10_tamanhos_medios_por_ip.png", "IPs com Maior     Tamanho Médio de Pacotes"),
-            ('img/barras/volume_bytes_por_ip.png')
+            ('img/barras/volume_bytes_por_ip.png', "Volume de Bytes por IP")
         ]
 
         self.graficos_pizza = [
@@ -393,11 +696,18 @@ class TelaGraficosBasicos(Screen):
     def atualizar_imagem(self):
         if self.graficos_atual:  # Verifica se há gráficos na lista atual
             caminho_imagem, legenda = self.graficos_atual[self.indice_atual]
-            if os.path.exists(caminho_imagem):
-                self.imagem.source = caminho_imagem
-                self.imagem.reload()
+            texturas.obter(caminho_imagem, partial(self._mostrar_textura, caminho_imagem))
             self.label_explicativo.text = legenda
 
+            # Deixa os gráficos vizinhos decodificados para a navegação não esperar
+            vizinhos = self.graficos_atual[max(self.indice_atual - 1, 0):self.indice_atual + 2]
+            texturas.precarregar(caminho for caminho, _ in vizinhos)
+
+    def _mostrar_textura(self, caminho_imagem, textura):
+        # Ignora texturas que chegam depois de o usuário já ter trocado de gráfico
+        if self.graficos_atual and self.graficos_atual[self.indice_atual][0] == caminho_imagem:
+            self.imagem.texture = textura
+
     def anterior_grafico(self, *args):
         if self.indice_atual > 0:
             self.indice_atual -= 1
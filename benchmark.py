@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import shutil
+import pickle
+import queue
+import platform
+import argparse
+import resource
+import subprocess
+import multiprocessing
+
+# Benchmark de ponta a ponta sobre capturas sintéticas (ver gerador.py). Cada etapa roda
+# em um processo novo, para o pico de memória (RSS) ser só o dela:
+#   extrator               pcap -> CSV (extrator.c, compilado se preciso; pulado sem libpcap)
+#   filtrarCsv             limpar_csv_arquivo sobre o CSV gerado
+#   analisar_estatisticas  análise completa do CSV
+#   salvar_stats_json      escrita do stats.json a partir do resultado da análise
+#   graficos               todos os gráficos de graficos e graficos2, sem reaproveitar imagens
+# Os resultados (pacotes/s, tempo e pico de RSS por etapa e tamanho) vão para um JSON,
+# e --comparar mostra a variação em relação a uma execução anterior.
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+ETAPAS = ["extrator", "filtrarCsv", "analisar_estatisticas", "salvar_stats_json", "graficos"]
+
+
+def pico_rss_mb(filhos=False):
+    # ru_maxrss vem em KB no Linux
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN if filhos else resource.RUSAGE_SELF)
+    return uso.ru_maxrss / 1024
+
+def compilar_extrator(pasta):
+    # Devolve o motivo da falha, ou None se o executável está pronto em pasta/extrator
+    executavel = os.path.join(pasta, "extrator")
+    if os.path.exists(executavel):
+        return None
+    try:
+        processo = subprocess.run(["gcc", "-O2", os.path.join(RAIZ, "extrator.c"), "-lpcap", "-lpthread", "-o", executavel],
+                                  capture_output=True, text=True)
+    except OSError as e:
+        return str(e)
+    if processo.returncode != 0:
+        erros = [linha for linha in processo.stderr.splitlines() if "error" in linha]
+        return erros[0] if erros else "falha ao compilar"
+    return None
+
+def nome_captura(n, parametros):
+    return f"captura_{n}_{parametros['semente']}"
+
+# Cada função de etapa roda dentro da pasta de trabalho, no processo da etapa, e
+# devolve o tempo de parede medido só em volta do trabalho da etapa (sem importações
+# nem carga dos dados de entrada)
+
+def etapa_geracao(n, parametros):
+    # O gerador é determinístico: capturas com o mesmo tamanho e semente são reaproveitadas
+    import gerador
+    base = nome_captura(n, parametros)
+    if os.path.exists(base + ".csv") and os.path.exists(base + ".pcap"):
+        return {"status": "pulada", "motivo": "capturas já existem"}
+    inicio = time.perf_counter()
+    gerador.gerar_captura(n, base + ".csv", base + ".pcap", semente=parametros["semente"])
+    return {"segundos": time.perf_counter() - inicio}
+
+def etapa_extrator(n, parametros):
+    if parametros["erro_extrator"]:
+        return {"status": "pulada", "motivo": parametros["erro_extrator"]}
+    inicio = time.perf_counter()
+    subprocess.run(["./extrator", nome_captura(n, parametros) + ".pcap"], check=True, capture_output=True)
+    segundos = time.perf_counter() - inicio
+    os.remove("data.csv")
+    # Só o extrator (processo filho da etapa) conta no pico de memória
+    return {"segundos": segundos, "pico_rss_mb": pico_rss_mb(filhos=True)}
+
+def etapa_filtrarCsv(n, parametros):
+    import filtrarCsv
+    inicio = time.perf_counter()
+    filtrarCsv.limpar_csv_arquivo(nome_captura(n, parametros) + ".csv", "limpo.csv", processos=parametros["processos"])
+    segundos = time.perf_counter() - inicio
+    os.remove("limpo.csv")
+    return {"segundos": segundos}
+
+def etapa_analisar_estatisticas(n, parametros):
+    import dataProcessing
+    inicio = time.perf_counter()
+    stats = dataProcessing.analisar_estatisticas(nome_captura(n, parametros) + ".csv", processos=parametros["processos"])
+    segundos = time.perf_counter() - inicio
+    with open("stats.pkl", "wb") as f:
+        pickle.dump(stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return {"segundos": segundos}
+
+def etapa_salvar_stats_json(n, parametros):
+    import dataProcessing
+    with open("stats.pkl", "rb") as f:
+        stats = pickle.load(f)
+    inicio = time.perf_counter()
+    dataProcessing.salvar_stats_json(stats)
+    return {"segundos": time.perf_counter() - inicio}
+
+def etapa_graficos(n, parametros):
+    import graficos
+    import graficos2
+    with open("stats.pkl", "rb") as f:
+        stats = pickle.load(f)
+    if os.path.exists("img"):
+        shutil.rmtree("img")
+    inicio = time.perf_counter()
+    tarefas = graficos.tarefas_graficos(stats) + graficos2.tarefas_graficos2(graficos2.carregar_dados_json("stats.json"))
+    graficos.renderizar_graficos(tarefas, processos=parametros["processos"])
+    return {"segundos": time.perf_counter() - inicio}
+
+def executar_etapa(etapa, n, parametros, pasta, fila):
+    # Ponto de entrada do processo de cada etapa
+    sys.path.insert(0, RAIZ)
+    os.chdir(pasta)
+    try:
+        resultado = globals()["etapa_" + etapa](n, parametros)
+    except Exception as e:
+        resultado = {"status": "erro", "motivo": f"{type(e).__name__}: {e}"}
+    resultado.setdefault("status", "ok")
+    if resultado["status"] == "ok":
+        # Pico do processo da etapa e dos processos que ela criou (pools de análise e gráficos)
+        resultado.setdefault("pico_rss_mb", max(pico_rss_mb(), pico_rss_mb(filhos=True)))
+        resultado["pico_rss_mb"] = round(resultado["pico_rss_mb"], 1)
+        resultado["segundos"] = round(resultado["segundos"], 4)
+        resultado["pacotes_por_segundo"] = round(n / resultado["segundos"]) if resultado["segundos"] > 0 else None
+    fila.put(resultado)
+
+def medir_etapa(etapa, n, parametros, pasta):
+    # Processo novo (spawn) por etapa: não herda a memória de outras etapas. O ru_maxrss
+    # do filho começa no pico do pai (é mantido no fork e no exec), por isso o processo
+    # principal não importa pandas nem gera dados: até a geração roda em uma etapa.
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=executar_etapa, args=(etapa, n, parametros, pasta, fila))
+    processo.start()
+    # Se o filho morrer sem responder (falta de memória, sinal, falha no extrator ou
+    # em código nativo), a etapa sai como erro em vez de travar o benchmark no get()
+    while True:
+        try:
+            resultado = fila.get(timeout=1)
+            break
+        except queue.Empty:
+            if not processo.is_alive():
+                try:
+                    resultado = fila.get(timeout=1)
+                except queue.Empty:
+                    resultado = {"status": "erro", "motivo": f"processo da etapa terminou sem resultado (código {processo.exitcode})"}
+                break
+    processo.join()
+    if resultado["status"] == "ok" and processo.exitcode != 0:
+        resultado = {"status": "erro", "motivo": f"processo da etapa terminou com código {processo.exitcode}"}
+    return resultado
+
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar_benchmark(tamanhos, etapas=ETAPAS, pasta="benchmark_dados", processos=1, semente=0):
+    os.makedirs(pasta, exist_ok=True)
+    pasta = os.path.abspath(pasta)
+    parametros = {"processos": processos, "semente": semente}
+    if "extrator" in etapas:
+        parametros["erro_extrator"] = compilar_extrator(pasta)
+    resultados = {
+        "data": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "commit": versao_codigo(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "parametros": parametros,
+        "tamanhos": {},
+    }
+
+    for n in tamanhos:
+        print(f"== {n} pacotes")
+        medidas = {}
+        for etapa in ["geracao"] + list(etapas):
+            medidas[etapa] = medir_etapa(etapa, n, parametros, pasta)
+            resumo = medidas[etapa]
+            if resumo["status"] == "ok":
+                print(f"{etapa:>22}: {resumo['segundos']:9.3f} s  {resumo['pacotes_por_segundo']:>12,} pacotes/s"
+                      f"  {resumo['pico_rss_mb']:8.1f} MB")
+            else:
+                print(f"{etapa:>22}: {resumo['status']} ({resumo['motivo']})")
+        resultados["tamanhos"][str(n)] = medidas
+    return resultados
+
+def comparar(anterior, atual):
+    # Razão de tempo (atual / anterior) por etapa e tamanho presentes nas duas execuções
+    print(f"Comparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    for n, medidas in atual["tamanhos"].items():
+        for etapa, medida in medidas.items():
+            antes = anterior["tamanhos"].get(n, {}).get(etapa)
+            if antes and medida["status"] == "ok" and antes["status"] == "ok" and antes["segundos"] > 0:
+                razao = medida["segundos"] / antes["segundos"]
+                print(f"{n:>10} {etapa:>22}: {antes['segundos']:9.3f} s -> {medida['segundos']:9.3f} s  ({razao:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta com capturas sintéticas")
+    parser.add_argument("--tamanhos", type=float, nargs="+", default=[1e5, 1e6], help="pacotes por captura (ex.: 1e5 1e6 1e7)")
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=ETAPAS)
+    parser.add_argument("--pasta", default="benchmark_dados", help="onde ficam as capturas geradas e os arquivos de saída")
+    parser.add_argument("--processos", type=int, default=1, help="processos da análise, da limpeza e dos gráficos")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark([int(n) for n in args.tamanhos], args.etapas, args.pasta, args.processos, args.semente)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=4, ensure_ascii=False)
+    print(f"Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), resultados)
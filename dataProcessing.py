@@ -1,11 +1,48 @@
 import pandas as pd
 import numpy as np
 from collections import Counter, defaultdict
+from functools import partial
 from math import log2
-import heapq
 import json
+import os
+import pickle
+import hashlib
+import time
+import cProfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow é opcional (motor_csv="pyarrow")
+    pa = pa_csv = None
+from sketches import ContadorFrequentes, DestinosDistintos, HistogramaInteiros, SketchQuantis, AmostraReservatorio
+from telemetria import Telemetria, SEM_TELEMETRIA
 
-LIMITE_TIMESTAMP = 1e12 
+# Registro binário gerado por "extrator -b" (ver registro_pacote em extrator.c):
+# 21 bytes por pacote, sem padding, IPs como inteiros e protocolo como número IP.
+DTYPE_REGISTRO = np.dtype([
+    ("timestamp", "<f8"),
+    ("src_ip", "<u4"),
+    ("dst_ip", "<u4"),
+    ("protocol", "u1"),
+    ("length", "<u4"),
+])
+
+# Mesmos nomes usados por protocolo_para_str no extrator. A coluna protocol é
+# categórica: CODIGOS_PROTOCOLOS leva o número IP ao código da categoria.
+CATEGORIAS_PROTOCOLOS = ["TCP", "UDP", "ICMP", "OUTRO"]
+CODIGOS_PROTOCOLOS = np.full(256, 3, dtype=np.int8)
+CODIGOS_PROTOCOLOS[[6, 17, 1]] = [0, 1, 2]
+TIPO_PROTOCOLO = pd.CategoricalDtype(CATEGORIAS_PROTOCOLOS)
+
+# Colunas e tipos do CSV do extrator. length é lido como float para tolerar campos vazios.
+COLUNAS_CSV = ["timestamp", "src_ip", "dst_ip", "protocol", "length"]
+TIPOS_CSV = {"timestamp": np.float64, "protocol": TIPO_PROTOCOLO, "length": np.float64}
+
+# Semente da amostra do scatter, misturada ao hash de cada pacote (ver chaves_scatter):
+# a mesma análise sorteia sempre os mesmos pontos (e a impressão digital do gráfico não muda)
+SEMENTE_SCATTER = 20250501
 
 def salvar_stats_json(stats, caminho="stats.json"):
     def converte(value):
@@ -49,6 +86,9 @@ def salvar_stats_json(stats, caminho="stats.json"):
             )
         ),
         "entropia_ips_origem": stats["entropia_ips_origem_geral"],
+        "estatisticas_tamanho": stats["estatisticas_tamanho"],
+        "distribuicao_ipg": stats["distribuicao_ipg"],
+        "entropia_por_janela": stats["entropia_por_janela"],
         "volume_bytes_por_ip": (
             stats["volume_por_ip"][:10] if isinstance(stats["volume_por_ip"], list) 
             else dict(sorted(stats["volume_por_ip"].items(), key=lambda item: item[1], reverse=True)[:10])
@@ -78,6 +118,9 @@ def salvar_stats_json(stats, caminho="stats.json"):
         )
     }
 
+    if "perf" in stats:
+        stats_convertido["perf"] = stats["perf"]
+
     stats_convertido = converte(stats_convertido)
 
     with open(caminho, 'w', encoding='utf-8') as f:
@@ -89,7 +132,7 @@ def calcular_entropia(counter):
         return 0  # Caso não haja pacotes, a entropia é zero (sem tráfego)
 
     # Calcular as probabilidades de cada valor
-    probabilidades = np.array([count / total_pacotes for count in counter.values()])
+    probabilidades = np.fromiter(counter.values(), dtype=np.float64, count=len(counter)) / total_pacotes
     
     # Substituir zeros por um valor pequeno para evitar erro no logaritmo
     probabilidades = np.maximum(probabilidades, 1e-10)
@@ -99,6 +142,113 @@ def calcular_entropia(counter):
     return entropia
 
     
+def carregar_binario(caminho="data.bin"):
+    # Mapeia o arquivo binário direto na memória, sem cópia nem parsing
+    return np.memmap(caminho, dtype=DTYPE_REGISTRO, mode="r")
+
+def ips_para_str(ips):
+    # Converte um vetor de IPs inteiros (uint32) para a notação a.b.c.d
+    ips = np.asarray(ips, dtype=np.uint32)
+    texto = ((ips >> 24) & 255).astype(str)
+    for deslocamento in (16, 8, 0):
+        texto = np.char.add(np.char.add(texto, "."), ((ips >> deslocamento) & 255).astype(str))
+    return texto.astype(object)
+
+def ips_para_int(textos):
+    # Converte IPs a.b.c.d (texto) para inteiros; valores inválidos viram -1.
+    # Só os IPs distintos do vetor são interpretados, o resto é indexação.
+    codigos, unicos = pd.factorize(textos)
+    octetos = pd.Series(unicos, dtype=object).str.extract(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$")
+    octetos = octetos.astype(np.float64).values
+    validos = ~np.isnan(octetos).any(axis=1) & (np.nan_to_num(octetos) <= 255).all(axis=1)
+    octetos = np.where(validos[:, None], np.nan_to_num(octetos), 0).astype(np.int64)
+    valores = np.where(validos, (octetos[:, 0] << 24) | (octetos[:, 1] << 16) | (octetos[:, 2] << 8) | octetos[:, 3], -1)
+    return np.where(codigos >= 0, np.r_[valores, -1][codigos], -1)
+
+def ips_chunk_para_int(chunk):
+    # IPs do chunk lido do CSV como uint32; linhas com IP inválido são descartadas
+    src_ip = ips_para_int(chunk["src_ip"].values)
+    dst_ip = ips_para_int(chunk["dst_ip"].values)
+    validos = (src_ip >= 0) & (dst_ip >= 0)
+    if not validos.all():
+        chunk = chunk[validos]
+        src_ip, dst_ip = src_ip[validos], dst_ip[validos]
+    return chunk.assign(src_ip=src_ip.astype(np.uint32), dst_ip=dst_ip.astype(np.uint32))
+
+def chaves_ip_para_str(dicionario):
+    # Mesmo dicionário (e mesma ordem) com as chaves uint32 em a.b.c.d, para a saída
+    chaves = np.fromiter(dicionario.keys(), dtype=np.uint32, count=len(dicionario))
+    return dict(zip(ips_para_str(chaves).tolist(), dicionario.values()))
+
+def ler_csv(fonte, colunas, motor_csv="pandas", usecols=COLUNAS_CSV):
+    # Lê um bloco de CSV sem cabeçalho (colunas já conhecidas) em um DataFrame tipado,
+    # só com as colunas usadas. motor_csv="pyarrow" usa o leitor do pyarrow, que
+    # converte o bloco em paralelo; o padrão é o leitor C do pandas.
+    if motor_csv == "pyarrow":
+        if pa_csv is None:
+            raise ImportError('motor_csv="pyarrow" requer o pacote pyarrow')
+        tipos = {"timestamp": pa.float64(), "src_ip": pa.string(), "dst_ip": pa.string(), "length": pa.float64()}
+        tabela = pa_csv.read_csv(
+            fonte,
+            read_options=pa_csv.ReadOptions(column_names=colunas),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={coluna: tipos[coluna] for coluna in usecols if coluna in tipos},
+                include_columns=usecols,
+            ),
+        )
+        chunk = tabela.to_pandas()
+        if "protocol" in chunk:
+            chunk["protocol"] = chunk["protocol"].astype(TIPO_PROTOCOLO)
+        return chunk
+
+    return pd.read_csv(fonte, names=colunas, header=None, usecols=usecols,
+                       dtype={coluna: TIPOS_CSV[coluna] for coluna in usecols if coluna in TIPOS_CSV})
+
+def ler_blocos(caminho, inicio=None, fim=None, tamanho_bloco=4 << 20, motor_csv="pandas", somente_timestamp=False):
+    # Lê o CSV do extrator ou o arquivo binário (.bin) em blocos de ~tamanho_bloco bytes
+    # alinhados a registros, gerando (inicio_bloco, fim_bloco, DataFrame). Os DataFrames
+    # têm as mesmas colunas nos dois formatos: IPs como uint32 e protocol como categoria
+    # (os IPs só voltam para texto no resultado). inicio/fim restringem a leitura a uma
+    # faixa de bytes (ver dividir_em_fatias). Com somente_timestamp, só essa coluna é lida.
+    if not caminho.endswith(".bin"):
+        with open(caminho, "rb") as f:
+            colunas = f.readline().decode().strip().split(",")
+            inicio = f.tell() if inicio is None else inicio
+            fim = os.path.getsize(caminho) if fim is None else fim
+            usecols = ["timestamp"] if somente_timestamp else COLUNAS_CSV
+            while inicio < fim:
+                f.seek(min(inicio + tamanho_bloco, fim))
+                f.readline()
+                fim_bloco = min(f.tell(), fim) if inicio + tamanho_bloco < fim else fim
+                chunk = ler_csv(LeitorFaixa(f, inicio, fim_bloco), colunas, motor_csv, usecols)
+                yield inicio, fim_bloco, chunk if somente_timestamp else ips_chunk_para_int(chunk)
+                inicio = fim_bloco
+        return
+
+    tamanho = DTYPE_REGISTRO.itemsize
+    registros = carregar_binario(caminho)
+    primeiro = 0 if inicio is None else inicio // tamanho
+    ultimo = len(registros) if fim is None else fim // tamanho
+    por_bloco = max(tamanho_bloco // tamanho, 1)
+    for posicao in range(primeiro, ultimo, por_bloco):
+        bloco = registros[posicao:min(posicao + por_bloco, ultimo)]
+        if somente_timestamp:
+            chunk = pd.DataFrame({"timestamp": bloco["timestamp"]})
+        else:
+            chunk = pd.DataFrame({
+                "timestamp": bloco["timestamp"],
+                "src_ip": bloco["src_ip"],
+                "dst_ip": bloco["dst_ip"],
+                "protocol": pd.Categorical.from_codes(CODIGOS_PROTOCOLOS[bloco["protocol"]], CATEGORIAS_PROTOCOLOS),
+                "length": bloco["length"].astype(np.int64),
+            })
+        yield posicao * tamanho, (posicao + len(bloco)) * tamanho, chunk
+
+def ler_chunks(caminho, inicio=None, fim=None, tamanho_bloco=4 << 20, motor_csv="pandas"):
+    # Só os DataFrames de ler_blocos
+    for _, _, chunk in ler_blocos(caminho, inicio, fim, tamanho_bloco, motor_csv):
+        yield chunk
+
 def ajustar_timestamp(timestamp):
     # Se o valor estiver em milissegundos (muito grande), converta para segundos
     if timestamp > 1e10:  # Se for maior que 10 bilhões, provavelmente é milissegundo
@@ -110,209 +260,1155 @@ def ajustar_timestamp(timestamp):
     else:
         return None  # Caso o timestamp seja inválido, retornamos None
 
-def analisar_estatisticas(caminho_csv="data.csv", top_n=10, limite_burst=0.01, limite_silencio=1):
-    # Inicializações
-    protocolos = Counter()
-    tamanhos = []
-    ip_origem = Counter()
-    ip_destino = Counter()
-    pacotes_por_tempo = Counter()
-    ipg_por_ip = defaultdict(list)
-    destinos_por_ip_origem = defaultdict(Counter)
-    trafego_por_minuto = Counter()
-    last_timestamps = {}
-    volume_bytes_por_ip = Counter()
-    pacotes_por_ip = Counter()
-    scatter_tamanho_frequencia = []
-    heatmap_ips_tempo = {
-        "matriz": defaultdict(lambda: defaultdict(int)),
-        "ips": set(),
-        "tempos": set(),
+# Maior segundo representável em datetime64[ns] (2262-04-11)
+LIMITE_SEGUNDOS = 9223372036
+
+def normalizar_timestamps(timestamps):
+    # Versão vetorizada de ajustar_timestamp para um chunk inteiro: valores em
+    # milissegundos viram segundos e os inválidos (NaN, até 1e9 ou além do que
+    # datetime64 representa) são descartados. Devolve a máscara dos válidos e os
+    # segundos inteiros (truncados, como o int() de ajustar_timestamp) de cada um.
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    timestamps = np.where(timestamps > 1e10, timestamps / 1000, timestamps)
+    validos = (timestamps > 1e9) & (timestamps < LIMITE_SEGUNDOS + 1)
+    return validos, timestamps[validos].astype(np.int64)
+
+class ContagemPares:
+    # Contagem de ocorrências por par (chave, subchave), ex.: (origem, destino) ou (origem, minuto).
+    # As contagens de cada chunk são guardadas como Series e consolidadas em blocos,
+    # evitando um laço em Python por par. A ordem de primeira aparição é preservada,
+    # então empates no máximo por chave seguem a ordem de chegada dos pacotes.
+    # Com limite_chaves, a consolidação mantém só as chaves mais frequentes segundo
+    # o Counter prioridade (ex.: ip_origem), limitando a memória.
+    def __init__(self, limite_buffer=2_000_000, limite_chaves=None, prioridade=None):
+        self.limite_buffer = limite_buffer
+        self.limite_chaves = limite_chaves
+        self.prioridade = prioridade
+        self.contagem = None
+        self.buffer = []
+        self.tamanho_buffer = 0
+
+    def atualizar(self, chaves, subchaves):
+        pares = pd.DataFrame({"chave": chaves, "subchave": subchaves}).groupby(["chave", "subchave"], sort=False).size()
+        self.buffer.append(pares)
+        self.tamanho_buffer += len(pares)
+        if self.tamanho_buffer >= self.limite_buffer:
+            self.consolidar()
+
+    def consolidar(self):
+        if not self.buffer:
+            return self.contagem
+        partes = self.buffer if self.contagem is None else [self.contagem] + self.buffer
+        self.contagem = pd.concat(partes).groupby(level=[0, 1], sort=False).sum()
+        self.buffer = []
+        self.tamanho_buffer = 0
+
+        if self.limite_chaves is not None:
+            chaves = self.contagem.index.get_level_values(0)
+            if chaves.nunique() > self.limite_chaves:
+                candidatas = [chave for chave, _ in self.prioridade.most_common(self.limite_chaves)]
+                self.contagem = self.contagem[chaves.isin(candidatas)]
+        return self.contagem
+
+    def mesclar(self, outra):
+        # Acrescenta as contagens de outra instância (de um trecho posterior do arquivo)
+        if outra.contagem is not None:
+            self.buffer.append(outra.contagem)
+            self.tamanho_buffer += len(outra.contagem)
+        self.buffer.extend(outra.buffer)
+        self.tamanho_buffer += outra.tamanho_buffer
+        if self.tamanho_buffer >= self.limite_buffer:
+            self.consolidar()
+
+    def filtrar(self, chaves):
+        # Contagens consolidadas apenas das chaves pedidas
+        contagem = self.consolidar()
+        if contagem is None:
+            return contagem
+        return contagem[contagem.index.get_level_values(0).isin(list(chaves))]
+
+def serie_ordenada(pacotes, trafego):
+    # Contadores por instante (segundos desde a época) como arrays ordenados pelo tempo
+    tempos = np.array(sorted(pacotes), dtype=np.int64)
+    return {
+        "tempos": tempos,
+        "pacotes": np.array([pacotes[t] for t in tempos.tolist()], dtype=np.int64),
+        "bytes": np.array([trafego[t] for t in tempos.tolist()], dtype=np.float64),
     }
 
-    dados_corr = []
-    colunas_numericas = None
-
-    chunks = pd.read_csv(caminho_csv, chunksize=100_000)
-
-    # Processamento dos pacotes
-    for chunk in chunks:
-        chunk = chunk.copy()
-        chunk['timestamp'] = chunk['timestamp'].apply(ajustar_timestamp)
-        chunk.dropna(subset=['timestamp'], inplace=True)
-        
-        # Agora, podemos aplicar a conversão para datetime
-        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], unit='s', errors='coerce')
-        
-        # Verifique se a conversão foi bem-sucedida
-        chunk.dropna(subset=['timestamp'], inplace=True)
-        
-        # Agora você pode usar .dt para manipulação de datas
-        chunk['minuto'] = chunk['timestamp'].dt.floor('min')
-        chunk['segundo'] = chunk['timestamp'].dt.floor('s')
+def totais_por_chave(contagem):
+    # Para cada chave de uma contagem por par (ex.: IPs dentro de cada janela), o total
+    # N e a soma(c * log2(c)) das contagens, de onde sai a entropia em bits das
+    # subchaves: H = log2(N) - soma(c * log2(c)) / N
+    if contagem is None or contagem.empty:
+        return pd.DataFrame({"total": pd.Series(dtype=np.int64), "soma": pd.Series(dtype=np.float64)})
+    chaves = contagem.index.get_level_values(0)
+    return pd.DataFrame({
+        "total": contagem.groupby(chaves).sum(),
+        "soma": (contagem * np.log2(contagem)).groupby(chaves).sum(),
+    })
 
-        # Atualização de contadores
-        pacotes_por_tempo.update(chunk['minuto'].value_counts().to_dict())
-        trafego_minuto = chunk.groupby('minuto')['length'].sum()
-        trafego_por_minuto.update(trafego_minuto.to_dict())
-        protocolos.update(chunk['protocol'])
-        tamanhos.extend(chunk['length'].dropna().tolist())
-        ip_origem.update(chunk['src_ip'])
-        ip_destino.update(chunk['dst_ip'])
-
-        src_ips = chunk['src_ip'].values
-        dst_ips = chunk['dst_ip'].values
-        timestamps = chunk['timestamp'].values
+class EntropiaJanelas:
+    # Entropia dos IPs por janela de tempo em memória proporcional às janelas abertas,
+    # não à captura: as contagens (janela, IP) só são guardadas até aparecer uma janela
+    # mais de horizonte segundos mais nova; aí a janela vira só (N, soma(c * log2(c))) e
+    # seus pares são descartados. horizonte é a tolerância a pacotes fora de ordem: um
+    # pacote até horizonte segundos atrasado ainda encontra sua janela aberta; os mais
+    # atrasados caem numa janela já fechada e contam como IPs novos nela. Com
+    # manter_primeira (fatias paralelas), as janelas até horizonte segundos depois da
+    # primeira vista também ficam abertas, porque podem continuar no fim da fatia
+    # anterior (ver mesclar).
+    def __init__(self, horizonte=0):
+        self.horizonte = horizonte
+        self.pares = ContagemPares()
+        self.fechadas = totais_por_chave(None)
+        self.manter_primeira = False
+        self.primeira = None
+        self.ultima = None
+
+    def atualizar(self, janelas, ips):
+        if len(janelas) == 0:
+            return
+        self.pares.atualizar(janelas, ips)
+        if self.primeira is None:
+            self.primeira = int(janelas.min())
+        ultima = int(janelas.max())
+        if self.ultima is None or ultima > self.ultima:
+            self.ultima = ultima
+            self.fechar()
+
+    def fechar(self):
+        # Fecha as janelas abertas mais de horizonte segundos anteriores à última vista
+        # (exceto as do começo, se mantidas)
+        contagem = self.pares.consolidar()
+        if contagem is None:
+            return
+        janelas = contagem.index.get_level_values(0)
+        fechar = janelas < self.ultima - self.horizonte
+        if self.manter_primeira:
+            fechar &= janelas > self.primeira + self.horizonte
+        if fechar.any():
+            self.fechadas = pd.concat([self.fechadas, totais_por_chave(contagem[fechar])]).groupby(level=0).sum()
+            self.pares.contagem = contagem[~fechar]
+
+    def consolidar(self):
+        return self.pares.consolidar()
+
+    def mesclar(self, outra):
+        # Incorpora as janelas de um trecho posterior do arquivo: as primeiras janelas
+        # dele, ainda abertas, juntam-se às últimas deste antes de serem fechadas
+        self.pares.mesclar(outra.pares)
+        if not outra.fechadas.empty:
+            self.fechadas = pd.concat([self.fechadas, outra.fechadas]).groupby(level=0).sum()
+        if self.primeira is None:
+            self.primeira = outra.primeira
+        if outra.ultima is not None and (self.ultima is None or outra.ultima > self.ultima):
+            self.ultima = outra.ultima
+        if self.ultima is not None:
+            self.fechar()
+
+    def tamanho(self):
+        # Pares (janela, IP) em aberto
+        return (0 if self.pares.contagem is None else len(self.pares.contagem)) + self.pares.tamanho_buffer
+
+    def entropias(self):
+        # Entropia (bits) de cada janela, abertas e fechadas, em ordem de tempo
+        totais = pd.concat([self.fechadas, totais_por_chave(self.pares.consolidar())]).groupby(level=0).sum()
+        return (np.log2(totais["total"]) - totais["soma"] / totais["total"]).clip(lower=0).sort_index()
+
+def chaves_scatter(timestamps, src_ips, dst_ips, lengths):
+    # Chave de sorteio de cada pacote na amostra do scatter: hash de (timestamp, IPs,
+    # length) com SEMENTE_SCATTER, levado a [0, 1). Só depende do conteúdo do pacote, não
+    # de onde o arquivo foi dividido (fatias, blocos, checkpoint), então a amostra é a
+    # mesma com qualquer número de processos. Pacotes idênticos recebem a mesma chave.
+    linhas = pd.DataFrame({"timestamp": timestamps, "src_ip": src_ips, "dst_ip": dst_ips, "length": lengths})
+    hashes = pd.util.hash_pandas_object(linhas, index=False, hash_key=f"{SEMENTE_SCATTER:016d}").values
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+def assinatura_inicio(caminho, posicao, tamanho=1 << 16):
+    # Hash dos primeiros bytes já lidos, para detectar se o arquivo foi recriado
+    with open(caminho, "rb") as f:
+        return hashlib.sha1(f.read(min(tamanho, posicao))).hexdigest()
+
+class EstadoIPG:
+    # Estatísticas dos IPGs de um IP em memória constante: contagem, soma e M2 de
+    # Welford, mínimo, máximo, bursts e silêncios, além do último IPG (usado no scatter).
+    # Blocos de IPGs (de um chunk ou de outra fatia) são combinados pela fórmula de
+    # Chan et al. para médias e variâncias parciais, sem guardar os valores.
+    # A média sai da soma, e não da média corrente, para ficar igual à do np.mean
+    # (com IPGs inteiros a soma é exata).
+    __slots__ = ("contagem", "soma", "m2", "minimo", "maximo", "bursts", "silencios", "ultimo")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.m2 = 0.0
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+        self.bursts = 0
+        self.silencios = 0
+        self.ultimo = None
+
+    def combinar(self, contagem, soma, m2, minimo, maximo, bursts, silencios, ultimo):
+        # Acrescenta um bloco de IPGs posterior aos já vistos
+        if self.contagem:
+            delta = soma / contagem - self.soma / self.contagem
+            self.m2 += m2 + delta * delta * self.contagem * contagem / (self.contagem + contagem)
+        else:
+            self.m2 = m2
+        self.contagem += contagem
+        self.soma += soma
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+        self.bursts += bursts
+        self.silencios += silencios
+        self.ultimo = ultimo
+
+    def adicionar(self, ipg, limite_burst, limite_silencio):
+        self.combinar(1, ipg, 0.0, ipg, ipg, int(ipg < limite_burst), int(ipg > limite_silencio), ipg)
+
+    def mesclar(self, outro):
+        if outro.contagem:
+            self.combinar(outro.contagem, outro.soma, outro.m2, outro.minimo, outro.maximo,
+                          outro.bursts, outro.silencios, outro.ultimo)
+
+    # Média e desvio devolvidos como np.float64, como os de np.mean/np.std, para o
+    # round(..., 2) do resultado arredondar do mesmo jeito
+    def media(self):
+        return np.float64(self.soma) / self.contagem
+
+    def desvio_padrao(self):
+        # Desvio padrão populacional, o mesmo do np.std
+        return np.sqrt(np.float64(self.m2) / self.contagem)
+
+class AcumuladorEstatisticas:
+    # Estado acumulado da análise, alimentado chunk a chunk.
+    # Dois acumuladores de trechos consecutivos do arquivo podem ser mesclados
+    # (mesclar), o que permite processar fatias em paralelo com o mesmo resultado
+    # do processamento serial.
+    # Com capacidade_sketch, as contagens por IP (ip_origem, ip_destino, pacotes_por_ip e
+    # volume_bytes_por_ip) usam ContadorFrequentes de memória fixa em vez de Counters exatos,
+    # e o resto do estado por IP acompanha esses resumos (ver limitar_estado_por_ip).
+    # Destinos distintos por origem (scan horizontal) usam sempre DestinosDistintos:
+    # exatos para poucas origens/destinos, HyperLogLog de ~4 KB para as que passam disso.
+    # Os IPGs de cada IP viram um EstadoIPG de tamanho fixo; por isso limite_burst e
+    # limite_silencio são definidos aqui, já que bursts e silêncios são contados na passada.
+    # Os pontos (tamanho, log(IPG + 1)) do scatter são uma amostra uniforme de no máximo
+    # tamanho_amostra_scatter pacotes.
+    # O sorteio da amostra usa um hash de cada pacote (ver chaves_scatter), então ela se
+    # repete entre execuções iguais e não muda com o número de processos.
+    # A entropia dos IPs de origem e de destino é calculada por janela de janela_entropia
+    # segundos a partir das contagens (janela, IP), acumuladas na mesma passada; só as
+    # janelas em aberto guardam seus pares (ver EntropiaJanelas), as demais só a entropia.
+    def __init__(self, limite_candidatos_heatmap=1000, capacidade_sketch=None, limite_burst=0.01, limite_silencio=1,
+                 tamanho_amostra_scatter=100_000, janela_entropia=60):
+        self.limite_candidatos_heatmap = limite_candidatos_heatmap
+        self.capacidade_sketch = capacidade_sketch
+        self.limite_burst = limite_burst
+        self.limite_silencio = limite_silencio
+        self.tamanho_amostra_scatter = tamanho_amostra_scatter
+        self.janela_entropia = janela_entropia
+        contador_ip = (lambda: ContadorFrequentes(capacidade_sketch)) if capacidade_sketch else Counter
+        self.protocolos = Counter()
+        # Distribuições em memória fixa: histograma dos tamanhos e sketch de quantis dos IPGs
+        self.histograma_tamanhos = HistogramaInteiros()
+        self.sketch_ipg = SketchQuantis()
+        self.ip_origem = contador_ip()
+        self.ip_destino = contador_ip()
+        self.pacotes_por_tempo = Counter()
+        self.ipg_por_ip = {}
+        self.destinos_por_ip_origem = DestinosDistintos()
+        self.trafego_por_minuto = Counter()
+        # Mesmas séries por segundo, para a visualização interativa (zoom) da interface
+        self.pacotes_por_segundo = Counter()
+        self.trafego_por_segundo = Counter()
+        self.last_timestamps = {}
+        self.volume_bytes_por_ip = contador_ip()
+        self.pacotes_por_ip = contador_ip()
+        self.scatter_tamanho_frequencia = AmostraReservatorio(tamanho_amostra_scatter)
+        # Contagem por (IP, minuto) para o heatmap, acumulada na mesma passada.
+        # Só os limite_candidatos_heatmap IPs mais ativos são mantidos; o top_n final sai deles.
+        self.contagem_heatmap = ContagemPares(limite_chaves=limite_candidatos_heatmap, prioridade=self.ip_origem)
+        # Uma janela inteira de tolerância a pacotes atrasados antes de fechar cada janela
+        self.origens_por_janela = EntropiaJanelas(horizonte=janela_entropia)
+        self.destinos_por_janela = EntropiaJanelas(horizonte=janela_entropia)
+
+        # Usados só na mescla: primeiro timestamp de cada IP e os (tamanho, chave do
+        # sorteio) dos pacotes que ainda não tinham IPG válido (o ponto do scatter depende
+        # do trecho anterior).
+        # Só as fatias paralelas, que são mescladas depois, os preenchem (ver preparar_para_mescla).
+        self.registrar_fronteiras = False
+        self.primeiros_timestamps = {}
+        self.pendentes = defaultdict(list)
+
+        # Até onde o arquivo de entrada já foi lido (para checkpoints incrementais)
+        self.posicao = None
+        self.assinatura = None
+
+        # Índice esparso dos blocos lidos: (inicio, fim, menor timestamp, maior timestamp),
+        # salvo ao lado do arquivo para consultas por intervalo de tempo (ver salvar_indice)
+        self.indice = []
+
+        # Medições de desempenho (ver telemetria.py); ligadas por analisar_estatisticas(perf=True)
+        self.telemetria = SEM_TELEMETRIA
+
+    def configuracao(self):
+        # Parâmetros para criar um acumulador compatível (ex.: o de uma fatia paralela)
+        return {
+            "limite_candidatos_heatmap": self.limite_candidatos_heatmap,
+            "capacidade_sketch": self.capacidade_sketch,
+            "limite_burst": self.limite_burst,
+            "limite_silencio": self.limite_silencio,
+            "tamanho_amostra_scatter": self.tamanho_amostra_scatter,
+            "janela_entropia": self.janela_entropia,
+        }
+
+    def salvar(self, caminho):
+        for contagem in (self.contagem_heatmap, self.origens_por_janela, self.destinos_por_janela):
+            contagem.consolidar()
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, "rb") as f:
+            return pickle.load(f)
+
+    def preparar_para_mescla(self):
+        # Acumulador de uma fatia paralela, que será mesclado ao do trecho anterior:
+        # guarda o que depende desse trecho (primeiros timestamps, pontos pendentes do
+        # scatter e as primeiras janelas de entropia, ainda abertas)
+        self.registrar_fronteiras = True
+        self.origens_por_janela.manter_primeira = True
+        self.destinos_por_janela.manter_primeira = True
+
+    def marcar_posicao(self, caminho, posicao):
+        self.posicao = posicao
+        self.assinatura = assinatura_inicio(caminho, posicao)
+
+    def continua_em(self, caminho):
+        # O arquivo só pode ser retomado se ainda tem o trecho já lido, com o mesmo início
+        if self.posicao is None or os.path.getsize(caminho) < self.posicao:
+            return False
+        return assinatura_inicio(caminho, self.posicao) == self.assinatura
+
+    def processar_bloco(self, inicio, fim, chunk, intervalo=None):
+        # Processa o bloco [inicio, fim) do arquivo e registra os timestamps extremos dele
+        # no índice. Com intervalo=(t0, t1) em segundos, só os pacotes com t0 <= timestamp < t1
+        # entram nas estatísticas.
+        telemetria = self.telemetria
+        if telemetria.ativa:
+            inicio_bloco = time.perf_counter()
+        with telemetria.etapa("timestamps"):
+            validos, segundos = normalizar_timestamps(chunk['timestamp'].values)
+        if len(segundos):
+            self.indice.append((inicio, fim, int(segundos.min()), int(segundos.max())))
+        else:
+            self.indice.append((inicio, fim, None, None))
+
+        if intervalo is not None:
+            dentro = (segundos >= intervalo[0]) & (segundos < intervalo[1])
+            validos[validos] = dentro
+            segundos = segundos[dentro]
+        if not validos.all():
+            chunk = chunk[validos]
+        self.processar_chunk(chunk, segundos)
+
+        # Vazão só do processamento; a leitura do bloco conta à parte (etapa leitura_csv)
+        if telemetria.ativa:
+            telemetria.registrar_bloco(fim - inicio, len(chunk), time.perf_counter() - inicio_bloco)
+
+    def processar_chunk(self, chunk, segundos=None):
+        # Timestamps em segundos inteiros desde a época; minutos e janelas saem por
+        # aritmética inteira e só viram datas no resultado. segundos, se dado, já são os
+        # timestamps normalizados do chunk, que então só tem linhas válidas.
+        telemetria = self.telemetria
+        if segundos is None:
+            with telemetria.etapa("timestamps"):
+                validos, segundos = normalizar_timestamps(chunk['timestamp'].values)
+            if not validos.all():
+                chunk = chunk[validos]
+        minutos = segundos // 60 * 60
+
+        # Um pacote com length vazio (NaN) conta como pacote, mas não traz informação de
+        # tamanho: soma 0 bytes em todos os totais de bytes (por minuto, por segundo e por
+        # IP) e fica fora do histograma de tamanhos e da amostra do scatter
         lengths = chunk['length'].values
+        bytes_pacote = np.nan_to_num(lengths, nan=0)
 
-        for i in range(len(src_ips)):
-            src_ip = src_ips[i]
-            dst_ip = dst_ips[i]
-            timestamp = timestamps[i]
-            length = lengths[i]
-
-            pacotes_por_ip[src_ip] += 1
-            if src_ip in last_timestamps:
-                delta = timestamp - last_timestamps[src_ip]
-                ipg = delta / np.timedelta64(1, 's')
-                if ipg >= 0 and ipg > 0.00001:
-                    ipg_por_ip[src_ip].append(ipg)
-            last_timestamps[src_ip] = timestamp
-            destinos_por_ip_origem[src_ip][dst_ip] += 1
-            volume_bytes_por_ip[src_ip] += length
-
-            if src_ip in ipg_por_ip and ipg_por_ip[src_ip]:
-                ipg_value = ipg_por_ip[src_ip][-1]
-                if isinstance(ipg_value, (int, float)) and not np.isnan(ipg_value) and ipg_value >= 0:
-                    ipg_value_normalizado = np.log(ipg_value + 1)
-                    scatter_tamanho_frequencia.append((length, ipg_value_normalizado))
-
-        # Atualização de colunas numéricas
-        if colunas_numericas is None:
-            colunas_numericas = chunk.select_dtypes(include='number').columns.tolist()
-        dados_corr.append(chunk[colunas_numericas])
-
-    # Processamento para Heatmap
-        top_ips_heatmap = set([ip for ip, _ in ip_origem.most_common(top_n)])
-        for chunk in pd.read_csv(caminho_csv, chunksize=100_000):
-            chunk = chunk.copy()
-        
-            # Garantir que os timestamps estão em segundos, arredondando quando necessário
-            chunk['timestamp'] = chunk['timestamp'].apply(lambda ts: int(round(float(ts))) if pd.notna(ts) else ts)
-            
-            # Limitar os timestamps para não exceder o valor máximo aceitável
-            chunk['timestamp'] = chunk['timestamp'].clip(upper=LIMITE_TIMESTAMP)
-            
-            # Convertendo para datetime (com segurança)
-            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], unit='s', errors='coerce')
-            
-            # Remover qualquer linha com timestamp inválido
-            chunk.dropna(subset=['timestamp'], inplace=True)
-            
-            # Adicionar o minuto para o cálculo do heatmap
-            chunk['minuto'] = chunk['timestamp'].dt.floor('min')
-            
-            # Processar as linhas e preencher o heatmap
-            for ip, minuto in zip(chunk['src_ip'], chunk['minuto']):
-                if ip in top_ips_heatmap:
-                    heatmap_ips_tempo["matriz"][ip][minuto] += 1
-                    heatmap_ips_tempo["ips"].add(ip)
-                    heatmap_ips_tempo["tempos"].add(minuto)
-
-    # Estatísticas de tamanhos
-    tamanhos_serie = pd.Series(tamanhos)
-    estatisticas_tamanho = {
-        "media": round(tamanhos_serie.mean(), 2),
-        "desvio_padrao": round(tamanhos_serie.std(), 2),
-        "maximo": tamanhos_serie.max(),
-        "minimo": tamanhos_serie.min(),
-    }
+        # Atualização de contadores
+        with telemetria.etapa("contadores"):
+            self.pacotes_por_tempo.update(pd.Series(minutos).value_counts(sort=False).to_dict())
+            trafego_minuto = pd.Series(bytes_pacote).groupby(minutos).sum()
+            self.trafego_por_minuto.update(trafego_minuto.to_dict())
+            self.pacotes_por_segundo.update(pd.Series(segundos).value_counts(sort=False).to_dict())
+            self.trafego_por_segundo.update(pd.Series(bytes_pacote).groupby(segundos).sum().to_dict())
+            protocolos = chunk['protocol'].value_counts(sort=False)
+            self.protocolos.update(protocolos[protocolos > 0].to_dict())
+            self.histograma_tamanhos.atualizar(lengths[~np.isnan(lengths)])
+            self.ip_destino.update(chunk['dst_ip'].value_counts(sort=False).to_dict())
+
+            # Agregações por IP de origem sobre códigos inteiros (sem laço por pacote)
+            codigos, ips = pd.factorize(chunk['src_ip'])
+            ips = np.asarray(ips, dtype=object)
+            contagem_ip = dict(zip(ips, np.bincount(codigos, minlength=len(ips)).tolist()))
+            volume_ip = dict(zip(ips, np.bincount(codigos, weights=bytes_pacote, minlength=len(ips)).astype(np.int64).tolist()))
+            self.ip_origem.update(contagem_ip)
+            self.volume_bytes_por_ip.update(volume_ip)
+            if self.capacidade_sketch:
+                # Os bytes acompanham os pacotes de cada IP no mesmo resumo (tamanho médio)
+                self.pacotes_por_ip.update(contagem_ip, somas=volume_ip)
+            else:
+                self.pacotes_por_ip.update(contagem_ip)
+        with telemetria.etapa("destinos"):
+            self.destinos_por_ip_origem.atualizar(codigos, ips, pd.util.hash_array(chunk['dst_ip'].values))
+        with telemetria.etapa("heatmap"):
+            self.contagem_heatmap.atualizar(chunk['src_ip'].values, minutos)
+
+        timestamps = segundos.astype(np.float64)
+        with telemetria.etapa("entropia"):
+            janelas = (timestamps // self.janela_entropia * self.janela_entropia).astype(np.int64)
+            self.origens_por_janela.atualizar(janelas, chunk['src_ip'].values)
+            self.destinos_por_janela.atualizar(janelas, chunk['dst_ip'].values)
+        with telemetria.etapa("ipg"):
+            chaves = chaves_scatter(chunk['timestamp'].values, chunk['src_ip'].values, chunk['dst_ip'].values, bytes_pacote)
+            self.processar_ipg(codigos, ips, timestamps, lengths, chaves)
+        self.limitar_estado_por_ip()
+
+    def processar_ipg(self, codigos, ips, timestamps, lengths, chaves):
+        # Calcula os IPGs do chunk inteiro com operações vetorizadas.
+        # codigos/ips vêm de pd.factorize dos IPs de origem e timestamps está em segundos.
+        # Os pacotes são agrupados por IP com ordenação estável, então a ordem de chegada
+        # dentro de cada IP é preservada (mesmo resultado do laço por pacote).
+        # O último timestamp de cada IP é carregado entre chunks em last_timestamps.
+        if len(codigos) == 0:
+            return
+
+        ordem = np.argsort(codigos, kind='stable')
+        codigos = codigos[ordem]
+        timestamps = timestamps[ordem]
+        lengths = lengths[ordem]
+        chaves = chaves[ordem]
+
+        # Início de cada grupo de IP no vetor ordenado
+        inicio_grupo = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+        ips_grupo = ips[codigos[inicio_grupo]]
+
+        # Timestamp anterior: o pacote anterior do mesmo IP, ou o último visto em chunks anteriores
+        anteriores = np.empty_like(timestamps)
+        anteriores[1:] = timestamps[:-1]
+        anteriores[inicio_grupo] = [self.last_timestamps.get(ip, np.nan) for ip in ips_grupo]
+
+        ipgs = timestamps - anteriores
+        validos = ipgs > 0.00001
+
+        # Último IPG válido de cada pacote (propagado dentro do IP), usado no scatter
+        ultimo_ipg = np.where(validos, ipgs, np.nan)
+        sem_ipg_inicio = ~validos[inicio_grupo]
+        ultimo_ipg[inicio_grupo[sem_ipg_inicio]] = [
+            self.ipg_por_ip[ip].ultimo if ip in self.ipg_por_ip else np.nan for ip in ips_grupo[sem_ipg_inicio]
+        ]
+        ultimo_ipg = pd.Series(ultimo_ipg).groupby(codigos).ffill().values
+
+        # Pacotes sem length não entram no scatter (ver processar_chunk)
+        com_tamanho = ~np.isnan(lengths)
+        com_ipg = ~np.isnan(ultimo_ipg)
+        no_scatter = com_ipg & com_tamanho
+        self.scatter_tamanho_frequencia.adicionar(lengths[no_scatter], np.log(ultimo_ipg[no_scatter] + 1),
+                                                  chaves=chaves[no_scatter])
+
+        # Pacotes sem nenhum IPG anterior ficam pendentes para a mescla
+        sem_ipg = ~com_ipg & com_tamanho
+        if self.registrar_fronteiras and sem_ipg.any():
+            for ip, tamanho, chave in zip(ips[codigos[sem_ipg]], lengths[sem_ipg].tolist(), chaves[sem_ipg].tolist()):
+                self.pendentes[ip].append((tamanho, chave))
+
+        # Resumo dos IPGs válidos de cada IP no chunk (contagem, média, M2, extremos,
+        # bursts e silêncios), combinado ao EstadoIPG de cada IP
+        ipgs_validos = ipgs[validos]
+        self.sketch_ipg.atualizar(ipgs_validos)
+        if len(ipgs_validos):
+            codigos_validos = codigos[validos]
+            inicio_validos = np.flatnonzero(np.r_[True, codigos_validos[1:] != codigos_validos[:-1]])
+            fim_validos = np.r_[inicio_validos[1:], len(codigos_validos)]
+            contagens = fim_validos - inicio_validos
+            somas = np.add.reduceat(ipgs_validos, inicio_validos)
+            desvios = ipgs_validos - np.repeat(somas / contagens, contagens)
+            resumo = zip(
+                ips[codigos_validos[inicio_validos]],
+                contagens.tolist(),
+                somas.tolist(),
+                np.add.reduceat(desvios * desvios, inicio_validos).tolist(),
+                np.minimum.reduceat(ipgs_validos, inicio_validos).tolist(),
+                np.maximum.reduceat(ipgs_validos, inicio_validos).tolist(),
+                np.add.reduceat((ipgs_validos < self.limite_burst).astype(np.int64), inicio_validos).tolist(),
+                np.add.reduceat((ipgs_validos > self.limite_silencio).astype(np.int64), inicio_validos).tolist(),
+                ipgs_validos[fim_validos - 1].tolist(),
+            )
+            for ip, *bloco in resumo:
+                estado = self.ipg_por_ip.get(ip)
+                if estado is None:
+                    estado = self.ipg_por_ip[ip] = EstadoIPG()
+                estado.combinar(*bloco)
+
+        # Último timestamp de cada IP (e o primeiro, nas fatias que serão mescladas)
+        fim_grupo = np.r_[inicio_grupo[1:], len(codigos)]
+        if self.registrar_fronteiras:
+            for ip, primeiro in zip(ips_grupo, timestamps[inicio_grupo].tolist()):
+                if ip not in self.last_timestamps:
+                    self.primeiros_timestamps[ip] = primeiro
+        self.last_timestamps.update(zip(ips_grupo, timestamps[fim_grupo - 1].tolist()))
+
+    def mesclar(self, outro):
+        # Incorpora o acumulador do trecho do arquivo que vem logo depois deste.
+        # O IPG entre o último pacote de um IP aqui e o primeiro pacote dele no
+        # outro trecho é calculado agora, mantendo a continuidade entre as fatias.
+        fronteiras = []
+        pendentes_scatter = []
+        ipgs_scatter = []
+        for ip, primeiro in outro.primeiros_timestamps.items():
+            estado_outro = outro.ipg_por_ip.get(ip)
+            pendentes_outro = outro.pendentes.get(ip, [])
 
-    # Estatísticas de protocolos
-    total_protocolos = dict(protocolos)
-    total_pacotes = sum(total_protocolos.values())
-    estatisticas_protocolos = {protocol: (count / total_pacotes) * 100 for protocol, count in total_protocolos.items()}
-
-    # Estatísticas de IPG
-    estatisticas_ipg = {}
-    for ip, ipgs in ipg_por_ip.items():
-        ipgs_validos = [ipg for ipg in ipgs if isinstance(ipg, (int, float)) and not np.isnan(ipg)]
-        if len(ipgs_validos) >= 3:
-            estatisticas_ipg[ip] = {
-                "media_ipg": round(np.mean(ipgs_validos), 2),
-                "maximo_ipg": round(np.max(ipgs_validos), 2),
-                "minimo_ipg": round(np.min(ipgs_validos), 2),
-                "desvio_padrao_ipg": round(np.std(ipgs_validos), 2),
+            if ip not in self.last_timestamps:
+                if self.registrar_fronteiras:
+                    self.primeiros_timestamps[ip] = primeiro
+                    if pendentes_outro:
+                        self.pendentes[ip].extend(pendentes_outro)
+                if estado_outro is not None:
+                    self.ipg_por_ip[ip] = estado_outro
+                continue
+
+            estado = self.ipg_por_ip.get(ip)
+            fronteira = primeiro - self.last_timestamps[ip]
+            if fronteira > 0.00001:
+                if estado is None:
+                    estado = self.ipg_por_ip[ip] = EstadoIPG()
+                estado.adicionar(fronteira, self.limite_burst, self.limite_silencio)
+                fronteiras.append(fronteira)
+                ultimo_ipg = fronteira
+            else:
+                ultimo_ipg = estado.ultimo if estado is not None else np.nan
+
+            if pendentes_outro:
+                if np.isnan(ultimo_ipg):
+                    if self.registrar_fronteiras:
+                        self.pendentes[ip].extend(pendentes_outro)
+                else:
+                    pendentes_scatter.extend(pendentes_outro)
+                    ipgs_scatter.extend([ultimo_ipg] * len(pendentes_outro))
+            if estado_outro is not None:
+                if estado is None:
+                    self.ipg_por_ip[ip] = estado_outro
+                else:
+                    estado.mesclar(estado_outro)
+
+        # Os IPGs de fronteira e os pontos pendentes do scatter entram de uma vez, não IP a IP
+        self.sketch_ipg.atualizar(fronteiras)
+        if pendentes_scatter:
+            tamanhos_scatter, chaves_pendentes = zip(*pendentes_scatter)
+            self.scatter_tamanho_frequencia.adicionar(tamanhos_scatter, np.log(np.array(ipgs_scatter, dtype=np.float64) + 1),
+                                                      chaves=chaves_pendentes)
+        self.last_timestamps.update(outro.last_timestamps)
+        self.scatter_tamanho_frequencia.mesclar(outro.scatter_tamanho_frequencia)
+        self.histograma_tamanhos.mesclar(outro.histograma_tamanhos)
+        self.sketch_ipg.mesclar(outro.sketch_ipg)
+        for nome in ("protocolos", "ip_origem", "ip_destino", "pacotes_por_tempo", "trafego_por_minuto",
+                     "pacotes_por_segundo", "trafego_por_segundo", "volume_bytes_por_ip", "pacotes_por_ip"):
+            getattr(self, nome).update(getattr(outro, nome))
+        self.destinos_por_ip_origem.mesclar(outro.destinos_por_ip_origem)
+        self.contagem_heatmap.mesclar(outro.contagem_heatmap)
+        self.origens_por_janela.mesclar(outro.origens_por_janela)
+        self.destinos_por_janela.mesclar(outro.destinos_por_janela)
+        self.indice.extend(outro.indice)
+        self.telemetria.mesclar(outro.telemetria)
+        self.limitar_estado_por_ip()
+
+    def limitar_estado_por_ip(self):
+        # No modo sketch, o estado por IP de origem fora dos contadores (EstadoIPG, último
+        # timestamp e destinos distintos) também tem memória limitada: quando passa do
+        # dobro de capacidade_sketch IPs, só ficam os IPs guardados no resumo ip_origem.
+        # Um IP descartado perde o IPG da fronteira com o próximo chunk em que aparecer
+        # (dentro de um chunk os IPGs são sempre calculados) e recomeça do zero suas
+        # estatísticas de IPG e sua contagem de destinos, que assim podem ficar abaixo das
+        # reais, como as contagens do próprio resumo. As fatias paralelas não são podadas:
+        # o estado delas é limitado pelo tamanho da fatia e a poda é feita após a mescla.
+        if not self.capacidade_sketch or self.registrar_fronteiras:
+            return
+        limite = 2 * self.capacidade_sketch
+        guardados = self.ip_origem
+        if len(self.last_timestamps) > limite:
+            self.last_timestamps = {ip: ultimo for ip, ultimo in self.last_timestamps.items() if ip in guardados}
+            self.ipg_por_ip = {ip: estado for ip, estado in self.ipg_por_ip.items() if ip in guardados}
+        if len(self.destinos_por_ip_origem) > limite:
+            self.destinos_por_ip_origem.manter(guardados)
+
+    def tamanhos_estruturas(self):
+        # Número de entradas das estruturas que crescem com a captura (seção "perf" do stats.json)
+        destinos = self.destinos_por_ip_origem
+        tamanhos = {
+            "ipg_por_ip": len(self.ipg_por_ip),
+            "last_timestamps": len(self.last_timestamps),
+            "destinos_por_ip_origem": {
+                "origens_exatas": len(destinos.exatos),
+                "hashes_exatos": sum(len(hashes) for hashes in destinos.exatos.values()),
+                "origens_hyperloglog": len(destinos.registradores),
+            },
+            "pacotes_por_segundo": len(self.pacotes_por_segundo),
+            "pacotes_por_tempo": len(self.pacotes_por_tempo),
+        }
+        for nome in ("ip_origem", "ip_destino", "volume_bytes_por_ip", "pacotes_por_ip"):
+            tamanhos[nome] = len(getattr(self, nome))
+        heatmap = self.contagem_heatmap
+        tamanhos["contagem_heatmap"] = (0 if heatmap.contagem is None else len(heatmap.contagem)) + heatmap.tamanho_buffer
+        for nome in ("origens_por_janela", "destinos_por_janela"):
+            tamanhos[nome] = getattr(self, nome).tamanho()
+        return tamanhos
+
+    def resultado(self, top_n=10):
+        # Toda a acumulação usa IPs uint32; aqui, na montagem do stats_json (usado pelo
+        # salvar_stats_json e pelos gráficos), eles voltam para a notação a.b.c.d.
+
+        # Processamento para Heatmap (poda final para os top_n IPs de origem)
+        heatmap_ips_tempo = {
+            "matriz": defaultdict(partial(defaultdict, int)),
+            "ips": set(),
+            "tempos": set(),
+        }
+        top_ips_heatmap = chaves_ip_para_str({ip: ip for ip, _ in self.ip_origem.most_common(top_n)})
+        nomes_heatmap = {ip: nome for nome, ip in top_ips_heatmap.items()}
+        contagem_top = self.contagem_heatmap.filtrar(nomes_heatmap)
+        if contagem_top is not None:
+            for (ip, minuto), contagem in contagem_top.items():
+                minuto = pd.Timestamp(minuto, unit='s')
+                heatmap_ips_tempo["matriz"][nomes_heatmap[ip]][minuto] += int(contagem)
+                heatmap_ips_tempo["ips"].add(nomes_heatmap[ip])
+                heatmap_ips_tempo["tempos"].add(minuto)
+
+        # Estatísticas de tamanhos (exatas, a partir do histograma)
+        histograma = self.histograma_tamanhos
+        if histograma.total():
+            estatisticas_tamanho = {
+                "media": round(histograma.media(), 2),
+                "desvio_padrao": round(histograma.desvio_padrao(), 2),
+                "maximo": histograma.maximo(),
+                "minimo": histograma.minimo(),
+                "p50": histograma.quantil(0.50),
+                "p95": histograma.quantil(0.95),
+                "p99": histograma.quantil(0.99),
             }
         else:
-            estatisticas_ipg[ip] = {key: None for key in ["media_ipg", "maximo_ipg", "minimo_ipg", "desvio_padrao_ipg"]}
+            estatisticas_tamanho = {key: None for key in ["media", "desvio_padrao", "maximo", "minimo", "p50", "p95", "p99"]}
 
-    # Estatísticas de Entropia
-    entropia_ips_origem_geral = calcular_entropia(ip_origem)
+        # Distribuição dos IPGs de todos os IPs (quantis com erro relativo de 1%)
+        media_ipg = self.sketch_ipg.media()
+        distribuicao_ipg = {
+            "quantidade": self.sketch_ipg.contagem,
+            "media": round(media_ipg, 6) if media_ipg is not None else None,
+            "minimo": self.sketch_ipg.minimo if self.sketch_ipg.contagem else None,
+            "maximo": self.sketch_ipg.maximo if self.sketch_ipg.contagem else None,
+            "p50": self.sketch_ipg.quantil(0.50),
+            "p95": self.sketch_ipg.quantil(0.95),
+            "p99": self.sketch_ipg.quantil(0.99),
+        }
 
+        # Estatísticas de protocolos
+        total_protocolos = dict(self.protocolos)
+        total_pacotes = sum(total_protocolos.values())
+        estatisticas_protocolos = {protocol: (count / total_pacotes) * 100 for protocol, count in total_protocolos.items()}
 
-    # Anomalias por IP
-    anomalias_por_ip = {}
-    for ip, ipgs in ipg_por_ip.items():
-        if len(ipgs) < 2:
-            continue
-        ipgs_seconds = [v for v in ipgs if isinstance(v, (int, float)) and not np.isnan(v)]
-        burst_count = sum(1 for v in ipgs_seconds if v < limite_burst)
-        silencio_count = sum(1 for v in ipgs_seconds if v > limite_silencio)
-        anomalias_por_ip[ip] = {"bursts": burst_count, "silencios": silencio_count}
-
-    # Analisando Conexões Horizontais
-    maiores_conexoes = [
-        (destino_mais_acessado[1], origem, destino_mais_acessado[0])
-        for origem, destinos in destinos_por_ip_origem.items()
-        if destinos and (destino_mais_acessado := max(destinos.items(), key=lambda x: x[1]))
-    ]
-    top_maiores = heapq.nlargest(top_n, maiores_conexoes)
-    top_destinos_por_unicoip = [destino for _, _, destino in top_maiores]
-
-    tamanho_medio_por_ip = {}
-    for ip in volume_bytes_por_ip:
-        pacotes = pacotes_por_ip[ip]  # Número total de pacotes para o IP
-        volume = volume_bytes_por_ip[ip]  # Volume total de bytes para o IP
-        
-        # Verificar se o número de pacotes é maior que zero
-        if pacotes > 0:
-            # Cálculo do tamanho médio por pacote para o IP
-            tamanho_medio = volume / pacotes
-            tamanho_medio_por_ip[ip] = tamanho_medio
+        # Estatísticas de IPG
+        estatisticas_ipg = {}
+        for ip, estado in self.ipg_por_ip.items():
+            if estado.contagem >= 3:
+                estatisticas_ipg[ip] = {
+                    "media_ipg": round(estado.media(), 2),
+                    "maximo_ipg": round(estado.maximo, 2),
+                    "minimo_ipg": round(estado.minimo, 2),
+                    "desvio_padrao_ipg": round(estado.desvio_padrao(), 2),
+                }
+            else:
+                estatisticas_ipg[ip] = {key: None for key in ["media_ipg", "maximo_ipg", "minimo_ipg", "desvio_padrao_ipg"]}
+
+        # Estatísticas de Entropia
+        entropia_ips_origem_geral = calcular_entropia(self.ip_origem)
+
+        # Série de entropia por janela de tempo (origem e destino)
+        entropias = pd.DataFrame({
+            "origem": self.origens_por_janela.entropias(),
+            "destino": self.destinos_por_janela.entropias(),
+        }).sort_index()
+        entropia_por_janela = {
+            "janela_segundos": self.janela_entropia,
+            "tempos": pd.to_datetime(entropias.index.values, unit="s").strftime('%Y-%m-%d %H:%M:%S').tolist(),
+            "origem": entropias["origem"].round(4).tolist(),
+            "destino": entropias["destino"].round(4).tolist(),
+        }
+
+
+        # Anomalias por IP
+        anomalias_por_ip = {}
+        for ip, estado in self.ipg_por_ip.items():
+            if estado.contagem < 2:
+                continue
+            anomalias_por_ip[ip] = {"bursts": estado.bursts, "silencios": estado.silencios}
+
+        # Analisando Conexões Horizontais: origens com mais destinos distintos
+        maiores = self.destinos_por_ip_origem.maiores(top_n)
+        nomes_scan = ips_para_str([origem for _, origem in maiores]).tolist()
+        top_maiores = [(destinos, nome) for (destinos, _), nome in zip(maiores, nomes_scan)]
+        top_origens_scan = nomes_scan
+
+        tamanho_medio_por_ip = {}
+        if self.capacidade_sketch:
+            # Média dos pacotes vistos enquanto o IP esteve no resumo de pacotes_por_ip,
+            # que guarda bytes e pacotes juntos (ver ContadorFrequentes.media)
+            for ip in self.pacotes_por_ip:
+                tamanho_medio_por_ip[ip] = self.pacotes_por_ip.media(ip)
         else:
-            # Caso haja zero pacotes, atribuimos 0 ao tamanho médio (evita divisão por zero)
-            tamanho_medio_por_ip[ip] = 0
+            for ip in self.volume_bytes_por_ip:
+                pacotes = self.pacotes_por_ip[ip]  # Número total de pacotes para o IP
+                volume = self.volume_bytes_por_ip[ip]  # Volume total de bytes para o IP
 
-    # Ordenando os IPs com o maior tamanho médio
-    top_10_tamanhos_medios_por_ip = dict(
-        sorted(tamanho_medio_por_ip.items(), key=lambda item: item[1], reverse=True)[:top_n]
-    )
+                # Verificar se o número de pacotes é maior que zero
+                if pacotes > 0:
+                    # Cálculo do tamanho médio por pacote para o IP
+                    tamanho_medio = volume / pacotes
+                    tamanho_medio_por_ip[ip] = tamanho_medio
+                else:
+                    # Caso haja zero pacotes, atribuimos 0 ao tamanho médio (evita divisão por zero)
+                    tamanho_medio_por_ip[ip] = 0
 
+        # Ordenando os IPs com o maior tamanho médio
+        top_10_tamanhos_medios_por_ip = chaves_ip_para_str(dict(
+            sorted(tamanho_medio_por_ip.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        ))
 
 
-    
 
-    # Preparando os dados finais
-    stats_json = {
-        "top_ips_origem": dict(ip_origem.most_common(top_n)),
-        "top_ips_destino": dict(ip_destino.most_common(top_n)),
-        "top_ips_mais_ativos": dict(ip_origem.most_common(top_n)),
-        "estatisticas_tamanho": estatisticas_tamanho,
-        "estatisticas_protocolos": estatisticas_protocolos,
-        "heatmap_ips_tempo": heatmap_ips_tempo,
-        "ipg_por_ip": estatisticas_ipg,
-        "entropia_ips_origem_geral": entropia_ips_origem_geral,
-        "volume_por_ip": volume_bytes_por_ip,
-        "pacotes_por_tempo": dict(pacotes_por_tempo),
-        "relacao_tamanho_frequencia": scatter_tamanho_frequencia,
-        "anomalias_por_ip": anomalias_por_ip,
-        "horizontal_scan": top_destinos_por_unicoip,
-        "top_10_horizon_scan": top_maiores,
-        "top_10_tamanhos_medios_por_ip": top_10_tamanhos_medios_por_ip,
-        "trafego_por_minuto": {str(k): int(v) for k, v in trafego_por_minuto.items()}
+
+
+        amostra_scatter = self.scatter_tamanho_frequencia.amostra()
+
+        # Preparando os dados finais
+        stats_json = {
+            "top_ips_origem": chaves_ip_para_str(dict(self.ip_origem.most_common(top_n))),
+            "top_ips_destino": chaves_ip_para_str(dict(self.ip_destino.most_common(top_n))),
+            "top_ips_mais_ativos": chaves_ip_para_str(dict(self.ip_origem.most_common(top_n))),
+            "estatisticas_tamanho": estatisticas_tamanho,
+            "distribuicao_ipg": distribuicao_ipg,
+            "estatisticas_protocolos": estatisticas_protocolos,
+            "heatmap_ips_tempo": heatmap_ips_tempo,
+            "ipg_por_ip": chaves_ip_para_str(estatisticas_ipg),
+            "entropia_ips_origem_geral": entropia_ips_origem_geral,
+            "entropia_por_janela": entropia_por_janela,
+            "volume_por_ip": (Counter if isinstance(self.volume_bytes_por_ip, Counter) else dict)(chaves_ip_para_str(self.volume_bytes_por_ip)),
+            "pacotes_por_tempo": dict(zip(pd.to_datetime(list(self.pacotes_por_tempo), unit='s'), self.pacotes_por_tempo.values())),
+            "relacao_tamanho_frequencia": list(zip(amostra_scatter[:, 0].astype(np.int64).tolist(), amostra_scatter[:, 1].tolist())),
+            "relacao_tamanho_frequencia_total": self.scatter_tamanho_frequencia.vistos,
+            "anomalias_por_ip": chaves_ip_para_str(anomalias_por_ip),
+            "horizontal_scan": top_origens_scan,
+            "top_10_horizon_scan": top_maiores,
+            "top_10_tamanhos_medios_por_ip": top_10_tamanhos_medios_por_ip,
+            "trafego_por_minuto": dict(zip(pd.to_datetime(list(self.trafego_por_minuto), unit='s').astype(str),
+                                           map(int, self.trafego_por_minuto.values()))),
+            "series_tempo": {
+                "segundo": serie_ordenada(self.pacotes_por_segundo, self.trafego_por_segundo),
+                "minuto": serie_ordenada(self.pacotes_por_tempo, self.trafego_por_minuto),
+            },
+        }
+
+        # No modo aproximado, quanto as contagens por IP podem estar abaixo das reais
+        if self.capacidade_sketch:
+            stats_json["erro_maximo_sketch"] = {
+                "ip_origem": self.ip_origem.erro_maximo(),
+                "ip_destino": self.ip_destino.erro_maximo(),
+                "volume_bytes_por_ip": self.volume_bytes_por_ip.erro_maximo(),
+            }
+        return stats_json
+
+def limites_dados(caminho):
+    # Faixa [inicio, fim) com os registros completos do arquivo: no CSV, depois do
+    # cabeçalho e até a última quebra de linha (uma linha sendo escrita pelo extrator
+    # fica para a próxima análise); no binário, até o último registro inteiro.
+    tamanho = os.path.getsize(caminho)
+    if caminho.endswith(".bin"):
+        return 0, tamanho - tamanho % DTYPE_REGISTRO.itemsize
+
+    with open(caminho, "rb") as f:
+        f.readline()
+        inicio = f.tell()
+        fim = tamanho
+        while fim > inicio:
+            leitura = min(1 << 20, fim - inicio)
+            f.seek(fim - leitura)
+            quebra = f.read(leitura).rfind(b"\n")
+            if quebra >= 0:
+                fim = fim - leitura + quebra + 1
+                break
+            fim -= leitura
+    return inicio, max(fim, inicio)
+
+def dividir_em_fatias(caminho, num_fatias, inicio=None, fim=None):
+    # Divide a faixa [inicio, fim) do arquivo (por padrão, todos os registros) em
+    # fatias alinhadas a registros: no CSV, cada fatia começa logo após uma quebra
+    # de linha; no binário, em múltiplos do tamanho do registro.
+    inicio_dados, fim_dados = limites_dados(caminho)
+    inicio = inicio_dados if inicio is None else inicio
+    fim = fim_dados if fim is None else fim
+    if caminho.endswith(".bin"):
+        cortes = np.linspace(inicio // DTYPE_REGISTRO.itemsize, fim // DTYPE_REGISTRO.itemsize, num_fatias + 1)
+        cortes = cortes.astype(np.int64) * DTYPE_REGISTRO.itemsize
+        return [(int(i), int(f)) for i, f in zip(cortes[:-1], cortes[1:]) if f > i]
+
+    with open(caminho, "rb") as f:
+        cortes = [inicio]
+        for corte in np.linspace(inicio, fim, num_fatias + 1)[1:-1]:
+            f.seek(int(corte))
+            f.readline()
+            cortes.append(min(max(f.tell(), cortes[-1]), fim))
+        cortes.append(fim)
+    return [(i, f) for i, f in zip(cortes[:-1], cortes[1:]) if f > i]
+
+class LeitorFaixa:
+    # Objeto tipo arquivo que só expõe a faixa [inicio, fim) de outro arquivo,
+    # para o pd.read_csv (ou o pyarrow) ler uma fatia sem copiar o resto
+    closed = False
+
+    def __init__(self, arquivo, inicio, fim):
+        self.arquivo = arquivo
+        self.arquivo.seek(inicio)
+        self.restante = fim - inicio
+
+    def read(self, tamanho=-1):
+        if tamanho is None or tamanho < 0 or tamanho > self.restante:
+            tamanho = self.restante
+        dados = self.arquivo.read(tamanho)
+        self.restante -= len(dados)
+        return dados
+
+    def readable(self):
+        return True
+
+    def __iter__(self):
+        return iter(self.read().splitlines(keepends=True))
+
+def processar_fatia(caminho, inicio, fim, configuracao, motor_csv="pandas", intervalo=None, perf=False):
+    # Executado em um processo do pool: acumula só a faixa [inicio, fim) do arquivo
+    acumulador = AcumuladorEstatisticas(**configuracao)
+    acumulador.preparar_para_mescla()
+    if perf:
+        acumulador.telemetria = Telemetria()
+    telemetria = acumulador.telemetria
+    blocos = telemetria.medir(ler_blocos(caminho, inicio, fim, motor_csv=motor_csv), "leitura_csv")
+    for bloco_inicio, bloco_fim, chunk in blocos:
+        acumulador.processar_bloco(bloco_inicio, bloco_fim, chunk, intervalo)
+    with telemetria.etapa("consolidacao"):
+        for contagem in (acumulador.contagem_heatmap, acumulador.origens_por_janela, acumulador.destinos_por_janela):
+            contagem.consolidar()
+    return acumulador
+
+def acumular_faixa(acumulador, caminho, inicio, fim, processos=1, motor_csv="pandas", intervalo=None, progresso=None, contexto_processos=None):
+    # Alimenta o acumulador com os registros da faixa [inicio, fim) do arquivo
+    # (só os do intervalo de tempo, se houver; ver AcumuladorEstatisticas.processar_bloco).
+    # progresso, se dado, é chamado com o número de bytes de cada bloco (ou fatia) concluído.
+    # Com processos > 1, a faixa é dividida em fatias processadas em paralelo
+    # (ProcessPoolExecutor) e os acumuladores parciais são mesclados na ordem do arquivo.
+    # contexto_processos (ex.: multiprocessing.get_context("spawn")) escolhe como os
+    # processos são criados; o padrão do sistema é o fork no Linux.
+    if fim <= inicio:
+        return acumulador
+
+    if processos > 1:
+        fatias = dividir_em_fatias(caminho, processos * 2, inicio, fim)
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto_processos) as executor:
+            parciais = executor.map(
+                processar_fatia,
+                [caminho] * len(fatias),
+                [inicio for inicio, _ in fatias],
+                [fim for _, fim in fatias],
+                [acumulador.configuracao()] * len(fatias),
+                [motor_csv] * len(fatias),
+                [intervalo] * len(fatias),
+                [acumulador.telemetria.ativa] * len(fatias),
+            )
+            for (fatia_inicio, fatia_fim), parcial in zip(fatias, parciais):
+                with acumulador.telemetria.etapa("mescla"):
+                    acumulador.mesclar(parcial)
+                if progresso:
+                    progresso(fatia_fim - fatia_inicio)
+    else:
+        blocos = acumulador.telemetria.medir(ler_blocos(caminho, inicio, fim, motor_csv=motor_csv), "leitura_csv")
+        for bloco_inicio, bloco_fim, chunk in blocos:
+            acumulador.processar_bloco(bloco_inicio, bloco_fim, chunk, intervalo)
+            if progresso:
+                progresso(bloco_fim - bloco_inicio)
+    return acumulador
+
+def caminho_indice(caminho):
+    return caminho + ".idx"
+
+def salvar_indice(caminho, blocos, coberto):
+    # Índice esparso em JSON ao lado do arquivo (data.csv -> data.csv.idx): para cada
+    # bloco de ~4 MB, a faixa de bytes e o menor/maior timestamp (segundos) dele.
+    # Funciona mesmo com pacotes fora de ordem, já que cada bloco guarda seus extremos.
+    # A assinatura do início do arquivo detecta se ele foi recriado.
+    indice = {"coberto": coberto, "assinatura": assinatura_inicio(caminho, coberto), "blocos": blocos}
+    temporario = caminho_indice(caminho) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f)
+    os.replace(temporario, caminho_indice(caminho))
+
+def carregar_indice(caminho):
+    # Índice salvo, se ainda for válido para o arquivo (senão, None)
+    try:
+        with open(caminho_indice(caminho), encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if os.path.getsize(caminho) < indice["coberto"] or assinatura_inicio(caminho, indice["coberto"]) != indice["assinatura"]:
+        return None
+    return indice
+
+def indice_contiguo(blocos, inicio, fim):
+    # Se os blocos cobrem exatamente [inicio, fim), sem buracos
+    posicao = inicio
+    for bloco_inicio, bloco_fim, _, _ in blocos:
+        if bloco_inicio != posicao:
+            return False
+        posicao = bloco_fim
+    return posicao == fim
+
+def atualizar_indice(caminho, motor_csv="pandas"):
+    # Carrega o índice do arquivo, indexando só o que falta (o arquivo todo na primeira
+    # vez, ou o trecho acrescentado depois). Esta passada lê apenas os timestamps.
+    inicio, fim = limites_dados(caminho)
+    indice = carregar_indice(caminho)
+    blocos = [] if indice is None else [tuple(bloco) for bloco in indice["blocos"]]
+    posicao = inicio if indice is None else indice["coberto"]
+    if posicao >= fim:
+        return blocos
+
+    for bloco_inicio, bloco_fim, chunk in ler_blocos(caminho, posicao, fim, motor_csv=motor_csv, somente_timestamp=True):
+        _, segundos = normalizar_timestamps(chunk['timestamp'].values)
+        if len(segundos):
+            blocos.append((bloco_inicio, bloco_fim, int(segundos.min()), int(segundos.max())))
+        else:
+            blocos.append((bloco_inicio, bloco_fim, None, None))
+    salvar_indice(caminho, blocos, fim)
+    return blocos
+
+def faixas_no_intervalo(blocos, t0, t1):
+    # Faixas de bytes dos blocos que podem ter pacotes com t0 <= timestamp < t1,
+    # juntando blocos vizinhos em uma faixa só
+    faixas = []
+    for bloco_inicio, bloco_fim, menor, maior in blocos:
+        if menor is None or maior < t0 or menor >= t1:
+            continue
+        if faixas and faixas[-1][1] == bloco_inicio:
+            faixas[-1][1] = bloco_fim
+        else:
+            faixas.append([bloco_inicio, bloco_fim])
+    return faixas
+
+def para_segundos(instante):
+    # Segundos desde a época para número, texto ou datetime (horários sem fuso são UTC,
+    # como os timestamps dos pacotes)
+    if isinstance(instante, (int, float, np.integer, np.floating)):
+        return float(instante)
+    return pd.Timestamp(instante).timestamp()
+
+def analisar_estatisticas(caminho_csv="data.csv", top_n=10, limite_burst=0.01, limite_silencio=1, limite_candidatos_heatmap=1000, processos=1, checkpoint=None, capacidade_sketch=None,
+                          tamanho_amostra_scatter=100_000, janela_entropia=60, motor_csv="pandas", inicio=None, fim=None,
+                          progresso=None, perf=False, perf_dump=None, contexto_processos=None):
+    # motor_csv="pyarrow" lê o CSV com o pyarrow (se instalado) em vez do pandas.
+    # Com perf, o tempo e o aumento de memória de cada etapa (leitura do CSV, timestamps,
+    # contadores, heatmap, IPG, ...), a vazão por bloco e o tamanho das estruturas grandes
+    # vão para stats_json["perf"] e para o stats.json (ver telemetria.py). perf_dump=prefixo
+    # também grava o cProfile do processo principal em prefixo.prof e as linhas que mais
+    # alocaram (tracemalloc) em prefixo.memoria.txt; o tracemalloc deixa a análise bem mais lenta.
+    # progresso, se dado, é chamado como progresso(bytes lidos, bytes a ler) a cada bloco
+    # processado (usado pela barra de progresso da interface).
+    # Com inicio e/ou fim (segundos desde a época ou datas como "2025-05-01 12:00"),
+    # só os pacotes com inicio <= timestamp < fim são analisados, e só os blocos do
+    # arquivo que o índice (caminho_csv + ".idx") aponta como relevantes são lidos.
+    # Com capacidade_sketch, os tops por IP usam contadores aproximados de memória fixa
+    # (ver sketches.ContadorFrequentes), com o erro máximo em stats_json["erro_maximo_sketch"].
+    # Com checkpoint, o estado acumulado é salvo nesse arquivo ao final e, na próxima
+    # execução sobre o mesmo arquivo, só as linhas acrescentadas desde então são lidas.
+    configuracao = {
+        "limite_candidatos_heatmap": limite_candidatos_heatmap,
+        "capacidade_sketch": capacidade_sketch,
+        "limite_burst": limite_burst,
+        "limite_silencio": limite_silencio,
+        "tamanho_amostra_scatter": tamanho_amostra_scatter,
+        "janela_entropia": janela_entropia,
     }
+    if perf_dump:
+        perf = True
+    telemetria = Telemetria() if perf else SEM_TELEMETRIA
+    inicio_analise = time.perf_counter()
+    if perf_dump:
+        perfil = cProfile.Profile()
+        tracemalloc.start()
+        perfil.enable()
+
+    intervalo = None
+    if inicio is not None or fim is not None:
+        if checkpoint:
+            raise ValueError("checkpoint não pode ser usado junto com inicio/fim")
+        intervalo = (
+            para_segundos(inicio) if inicio is not None else -np.inf,
+            para_segundos(fim) if fim is not None else np.inf,
+        )
+
+    acumulador = None
+    if checkpoint and os.path.exists(checkpoint):
+        acumulador = AcumuladorEstatisticas.carregar(checkpoint)
+        if not acumulador.continua_em(caminho_csv):
+            print(f"{caminho_csv} não é continuação do checkpoint {checkpoint}; analisando do início")
+            acumulador = None
+        elif acumulador.configuracao() != configuracao:
+            print(f"Checkpoint {checkpoint} foi gerado com outros parâmetros; analisando do início")
+            acumulador = None
+
+    if acumulador is None:
+        acumulador = AcumuladorEstatisticas(**configuracao)
+    acumulador.telemetria = telemetria
+
+    inicio_dados, fim_dados = limites_dados(caminho_csv)
+    if intervalo is not None:
+        faixas = faixas_no_intervalo(atualizar_indice(caminho_csv, motor_csv), *intervalo)
+    else:
+        leitura = acumulador.posicao if acumulador.posicao is not None else inicio_dados
+        faixas = [(leitura, fim_dados)]
+
+    avancar = None
+    if progresso:
+        total = sum(max(faixa_fim - faixa_inicio, 0) for faixa_inicio, faixa_fim in faixas)
+        lidos = 0
+        def avancar(n_bytes):
+            nonlocal lidos
+            lidos += n_bytes
+            progresso(lidos, total)
+
+    for faixa_inicio, faixa_fim in faixas:
+        acumular_faixa(acumulador, caminho_csv, faixa_inicio, faixa_fim, processos, motor_csv, intervalo, avancar, contexto_processos)
 
+    if intervalo is None:
+        acumulador.marcar_posicao(caminho_csv, max(fim_dados, leitura))
+
+        # A análise completa já passou por todos os blocos: o índice sai de graça
+        if indice_contiguo(acumulador.indice, inicio_dados, fim_dados):
+            with telemetria.etapa("indice"):
+                salvar_indice(caminho_csv, acumulador.indice, fim_dados)
+
+    if checkpoint:
+        with telemetria.etapa("checkpoint"):
+            acumulador.salvar(checkpoint)
+
+    with telemetria.etapa("resultado"):
+        stats_json = acumulador.resultado(top_n)
+
+    if perf_dump:
+        perfil.disable()
+        salvar_perfil(perfil, perf_dump)
+
+    if perf:
+        with telemetria.etapa("json"):
+            salvar_stats_json(stats_json)
+        # Gravado de novo para o tempo da escrita do JSON entrar na própria seção perf
+        stats_json["perf"] = {
+            "segundos_total": round(time.perf_counter() - inicio_analise, 4),
+            "processos": processos,
+            "motor_csv": motor_csv,
+            **telemetria.resumo(),
+            "estruturas": acumulador.tamanhos_estruturas(),
+        }
     salvar_stats_json(stats_json)
     print("Métricas salvas em stats.json")
     return stats_json
+
+def salvar_perfil(perfil, prefixo, linhas=30):
+    # Grava o cProfile (abrir com pstats ou snakeviz) e as linhas que mais alocaram memória
+    perfil.dump_stats(prefixo + ".prof")
+    atual, pico = tracemalloc.get_traced_memory()
+    estatisticas = tracemalloc.take_snapshot().statistics("lineno")
+    tracemalloc.stop()
+    with open(prefixo + ".memoria.txt", "w", encoding="utf-8") as f:
+        f.write(f"Memória rastreada: {atual / (1 << 20):.1f} MB ao final, pico de {pico / (1 << 20):.1f} MB\n")
+        for estatistica in estatisticas[:linhas]:
+            f.write(f"{estatistica}\n")
+    print(f"Perfil salvo em {prefixo}.prof e {prefixo}.memoria.txt")
+
+
+# Versão do formato do stats_json guardado no cache; mudar quando o resultado de
+# analisar_estatisticas mudar, para descartar o que foi calculado pelo código antigo
+VERSAO_CACHE = 2
+
+# Parâmetros de analisar_estatisticas que não mudam o resultado (ficam fora da chave)
+PARAMETROS_SEM_EFEITO = {"processos", "motor_csv", "checkpoint", "progresso", "perf", "perf_dump", "contexto_processos"}
+
+def identidade_arquivo(caminho, amostras=16, tamanho_amostra=1 << 16):
+    # Tamanho, mtime e hash de alguns trechos espalhados pelo arquivo: barato mesmo em
+    # capturas de vários GB, e pega tanto arquivos recriados quanto editados no lugar
+    info = os.stat(caminho)
+    resumo = hashlib.sha1()
+    with open(caminho, "rb") as f:
+        passo = max(info.st_size - tamanho_amostra, 0) // max(amostras - 1, 1)
+        for i in range(amostras):
+            f.seek(i * passo)
+            resumo.update(f.read(tamanho_amostra))
+    return [info.st_size, info.st_mtime_ns, resumo.hexdigest()]
+
+def chave_cache(caminho, parametros):
+    parametros = {nome: valor for nome, valor in parametros.items() if nome not in PARAMETROS_SEM_EFEITO}
+    descricao = json.dumps([VERSAO_CACHE, identidade_arquivo(caminho), sorted(parametros.items())], default=str)
+    return hashlib.sha1(descricao.encode()).hexdigest()
+
+def limitar_cache(pasta, tamanho_maximo):
+    # Remove as entradas usadas há mais tempo até o cache caber em tamanho_maximo bytes
+    entradas = []
+    for nome in os.listdir(pasta):
+        if nome.endswith(".pkl"):
+            info = os.stat(os.path.join(pasta, nome))
+            entradas.append((info.st_mtime, info.st_size, nome))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, nome in sorted(entradas):
+        if total <= tamanho_maximo:
+            break
+        os.remove(os.path.join(pasta, nome))
+        total -= tamanho
+
+def analisar_com_cache(caminho_csv="data.csv", pasta_cache=".cache_stats", tamanho_maximo_cache=1 << 30, **parametros):
+    # Mesmo resultado de analisar_estatisticas(caminho_csv, **parametros), mas guardado
+    # em pasta_cache (pickle) pela identidade do arquivo e pelos parâmetros. Se nada
+    # mudou, a análise não é refeita; o stats.json é regravado do mesmo jeito.
+    # Com perf ou perf_dump o cache é ignorado: a ideia é medir a análise de fato.
+    if parametros.get("perf") or parametros.get("perf_dump"):
+        return analisar_estatisticas(caminho_csv, **parametros)
+
+    os.makedirs(pasta_cache, exist_ok=True)
+    caminho_cache = os.path.join(pasta_cache, chave_cache(caminho_csv, parametros) + ".pkl")
+
+    try:
+        with open(caminho_cache, "rb") as f:
+            stats_json = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        stats_json = None
+
+    if stats_json is not None:
+        os.utime(caminho_cache)  # marca como usado recentemente (ver limitar_cache)
+        salvar_stats_json(stats_json)
+        print(f"Resultado de {caminho_csv} lido do cache ({caminho_cache})")
+        return stats_json
+
+    stats_json = analisar_estatisticas(caminho_csv, **parametros)
+    temporario = caminho_cache + ".tmp"
+    with open(temporario, "wb") as f:
+        pickle.dump(stats_json, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho_cache)
+    limitar_cache(pasta_cache, tamanho_maximo_cache)
+    return stats_json
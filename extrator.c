@@ -1,21 +1,111 @@
-
-
 // como usar
-// editcap -c 100000 original.pcap batches/parte.pcap     -> divide o arquivo original em partes de 100.000 pacotes e salva na pasta batches
 // gcc extrator.c -lpcap -lpthread -o extrator  -> compilar
-// ./extrator batches/parte_00*.pcap   -> rodar para todas as partes
+// ./extrator original.pcap   -> arquivos grandes são divididos internamente em faixas de registros (não precisa de editcap);
+//                               com mais de uma thread, cada faixa vai para um arquivo temporário e o data.csv é
+//                               montado no final na ordem da captura (como -s -m)
+// ./extrator -j 8 batches/parte_00*.pcap   -> usa 8 threads (padrão: número de núcleos), que puxam tarefas de uma fila
+// ./extrator -t 128 original.pcap   -> tamanho de cada faixa em MB (padrão: 64)
+// ./extrator -b original.pcap   -> saída binária de tamanho fixo em data.bin (ver registro_pacote)
+// ./extrator -s original.pcap   -> cada tarefa grava seu próprio arquivo (data_0.csv, data_1.csv, ...)
+// ./extrator -s -m original.pcap   -> idem, juntando os arquivos em data.csv no final, na ordem da captura
+// ./extrator -a novo_lote.pcap   -> acrescenta ao data.csv existente em vez de recriá-lo (análise incremental com checkpoint)
 
 
 
 #include <stdio.h>
 #include <stdlib.h>
+#include <stdint.h>
 #include <string.h>
+#include <unistd.h>
+#include <sys/types.h>
+#include <sys/stat.h>
 #include <pthread.h>
 #include <pcap.h>
 #include <netinet/ip.h>
 #include <arpa/inet.h>
 
+// Cada thread acumula a saída em um buffer próprio e só grava em blocos deste tamanho.
+// O mutex é usado uma vez por bloco (e nunca no modo -s), não uma vez por pacote.
+#define TAMANHO_BUFFER (4 * 1024 * 1024)
+#define TAMANHO_MAX_LINHA 128
+
+// Magics do formato pcap clássico (microssegundos / nanossegundos, nas duas ordens de bytes)
+#define PCAP_MAGIC 0xa1b2c3d4
+#define PCAP_MAGIC_TROCADO 0xd4c3b2a1
+#define PCAP_MAGIC_NS 0xa1b23c4d
+#define PCAP_MAGIC_NS_TROCADO 0x4d3cb2a1
+#define TAMANHO_CABECALHO_GLOBAL 24
+#define TAMANHO_CABECALHO_REGISTRO 16
+
+// Ressincronização no início de uma faixa (ver sincronizar_registro): os bytes lidos a
+// partir do ponto de corte aproximado, quantos cabeçalhos seguidos precisam ser
+// plausíveis para uma posição ser aceita como início de registro, os limites de tamanho
+// de um pacote (ethernet + IPv4, que é o que o extrator lê) e a duração máxima aceita
+// para a captura, contada a partir do primeiro registro do arquivo
+#define JANELA_SINCRONIA (1024 * 1024)
+#define CABECALHOS_SINCRONIA 8
+#define MINIMO_TAMANHO_ORIGINAL (14 + 20)
+#define MAXIMO_TAMANHO_ORIGINAL (1 << 24)
+#define HORIZONTE_SINCRONIA (366u * 86400)
+
 pthread_mutex_t lock = PTHREAD_MUTEX_INITIALIZER;
+pthread_mutex_t lock_fila = PTHREAD_MUTEX_INITIALIZER;
+
+// Registro binário de tamanho fixo (modo -b): 21 bytes, sem padding, na ordem de bytes
+// do host (little-endian em x86). Os IPs são gravados como inteiros (ntohl), ou seja,
+// a.b.c.d vira (a << 24) | (b << 16) | (c << 8) | d. O protocolo é o número do cabeçalho IP.
+// Lido em dataProcessing.carregar_binario com np.memmap.
+typedef struct __attribute__((packed)) {
+    double timestamp;
+    uint32_t src_ip;
+    uint32_t dst_ip;
+    uint8_t protocolo;
+    uint32_t length;
+} registro_pacote;
+
+int modo_binario = 0;
+int modo_shards = 0;
+int juntar_shards = 0;
+int modo_acrescentar = 0;
+off_t tamanho_tarefa = 64LL * 1024 * 1024;
+const char *arquivo_saida = "data.csv";
+const char *extensao_saida = ".csv";
+
+#define CABECALHO_CSV "timestamp,src_ip,dst_ip,protocol,length\n"
+
+// Arquivo de saída único, compartilhado pelas threads. Com um FILE* por thread,
+// cada buffer era descarregado em momentos diferentes e as linhas (ou registros)
+// de threads distintas se misturavam no meio, mesmo com o mutex.
+FILE *saida = NULL;
+
+// Uma tarefa é uma faixa [inicio, fim) de bytes de um arquivo pcap, com os registros que
+// começam dentro dela. inicio == 0 significa "desde o começo" e fim == -1, "até o fim do
+// arquivo". Os cortes são aproximados: a tarefa procura o primeiro registro a partir de
+// inicio com sincronizar_registro, usando o formato lido do cabeçalho global e o segundo
+// do primeiro registro do arquivo.
+typedef struct {
+    const char *nome_arquivo;
+    off_t inicio;
+    off_t fim;
+    int trocado;
+    int nanossegundos;
+    uint32_t snaplen;
+    uint32_t primeiro_segundo;
+    char nome_shard[64];
+} tarefa;
+
+// Fila de tarefas compartilhada: as threads pegam a próxima tarefa livre
+tarefa *tarefas = NULL;
+int num_tarefas = 0;
+int capacidade_tarefas = 0;
+int proxima_tarefa = 0;
+
+// Estado de cada thread: o buffer de saída e, no modo -s, o arquivo da tarefa atual (shard)
+typedef struct {
+    FILE *shard;
+    char *buffer;
+    size_t usado;
+} contexto_thread;
 
 const char *protocolo_para_str(uint8_t protocolo) {
     switch (protocolo) {
@@ -26,69 +116,404 @@ const char *protocolo_para_str(uint8_t protocolo) {
     }
 }
 
+void descarregar_buffer(contexto_thread *contexto) {
+    if (contexto->usado == 0) {
+        return;
+    }
+
+    if (contexto->shard) {
+        fwrite(contexto->buffer, 1, contexto->usado, contexto->shard);
+    } else {
+        pthread_mutex_lock(&lock);
+        fwrite(contexto->buffer, 1, contexto->usado, saida);
+        pthread_mutex_unlock(&lock);
+    }
+    contexto->usado = 0;
+}
+
 void manipular_pacote(unsigned char *args, const struct pcap_pkthdr *cabecalho, const unsigned char *pacote) {
-    FILE *data = (FILE *)args;
+    contexto_thread *contexto = (contexto_thread *)args;
+
+    if (contexto->usado + TAMANHO_MAX_LINHA > TAMANHO_BUFFER) {
+        descarregar_buffer(contexto);
+    }
+    char *destino = contexto->buffer + contexto->usado;
 
     struct iphdr *ip_header = (struct iphdr *)(pacote + 14);
+    double timestamp = cabecalho->ts.tv_sec + cabecalho->ts.tv_usec / 1000000.0;
+
+    if (modo_binario) {
+        registro_pacote registro = {
+            .timestamp = timestamp,
+            .src_ip = ntohl(ip_header->saddr),
+            .dst_ip = ntohl(ip_header->daddr),
+            .protocolo = ip_header->protocol,
+            .length = cabecalho->len,
+        };
+        memcpy(destino, &registro, sizeof(registro));
+        contexto->usado += sizeof(registro);
+        return;
+    }
+
     char src_ip[INET_ADDRSTRLEN], dst_ip[INET_ADDRSTRLEN];
     struct in_addr src_addr = {.s_addr = ip_header->saddr};
     struct in_addr dst_addr = {.s_addr = ip_header->daddr};
 
     inet_ntop(AF_INET, &src_addr, src_ip, INET_ADDRSTRLEN);
     inet_ntop(AF_INET, &dst_addr, dst_ip, INET_ADDRSTRLEN);
-    double timestamp = cabecalho->ts.tv_sec + cabecalho->ts.tv_usec / 1000000.0;
 
-    pthread_mutex_lock(&lock);
-    fprintf(data, "%.6f,%s,%s,%s,%d\n", timestamp, src_ip, dst_ip, protocolo_para_str(ip_header->protocol), cabecalho->len);
-    pthread_mutex_unlock(&lock);
+    contexto->usado += snprintf(destino, TAMANHO_MAX_LINHA, "%.6f,%s,%s,%s,%u\n", timestamp, src_ip, dst_ip,
+                                protocolo_para_str(ip_header->protocol), cabecalho->len);
 }
 
-void *processar_pcap(void *arg) {
-    char *nome_arquivo = (char *)arg;
+tarefa *adicionar_tarefa(const char *nome_arquivo, off_t inicio, off_t fim) {
+    if (num_tarefas == capacidade_tarefas) {
+        capacidade_tarefas = capacidade_tarefas ? capacidade_tarefas * 2 : 64;
+        tarefas = realloc(tarefas, capacidade_tarefas * sizeof(tarefa));
+        if (!tarefas) {
+            perror("Erro ao alocar fila de tarefas");
+            exit(1);
+        }
+    }
+
+    tarefa *nova = &tarefas[num_tarefas];
+    nova->nome_arquivo = nome_arquivo;
+    nova->inicio = inicio;
+    nova->fim = fim;
+    nova->trocado = 0;
+    nova->nanossegundos = 0;
+    nova->snaplen = 0;
+    nova->primeiro_segundo = 0;
+    num_tarefas++;
+    return nova;
+}
+
+uint32_t ler_u32(const unsigned char *dados, int trocado) {
+    uint32_t valor;
+    memcpy(&valor, dados, sizeof(valor));
+    return trocado ? __builtin_bswap32(valor) : valor;
+}
+
+// Um cabeçalho de registro é plausível se a fração do timestamp e os tamanhos cabem no
+// formato do arquivo (com algum byte capturado e ao menos ethernet + IPv4 no original) e
+// o segundo não volta em relação ao registro anterior da cadeia (ou, no primeiro, ao
+// primeiro registro do arquivo) nem passa de HORIZONTE_SINCRONIA depois do primeiro
+// registro. Um trecho zerado dentro de um pacote não passa: capturado e o segundo falham.
+int cabecalho_plausivel(const unsigned char *cabecalho, const tarefa *atual, uint32_t segundo_anterior) {
+    uint32_t segundo = ler_u32(cabecalho, atual->trocado);
+    uint32_t fracao = ler_u32(cabecalho + 4, atual->trocado);
+    uint32_t capturado = ler_u32(cabecalho + 8, atual->trocado);
+    uint32_t original = ler_u32(cabecalho + 12, atual->trocado);
+
+    return fracao < (atual->nanossegundos ? 1000000000u : 1000000u) &&
+           capturado > 0 && capturado <= atual->snaplen && capturado <= original &&
+           original >= MINIMO_TAMANHO_ORIGINAL && original < MAXIMO_TAMANHO_ORIGINAL &&
+           segundo >= segundo_anterior && segundo - atual->primeiro_segundo < HORIZONTE_SINCRONIA;
+}
+
+// Primeiro início de registro a partir de atual->inicio: a primeira posição da janela em
+// que CABECALHOS_SINCRONIA cabeçalhos encadeados são plausíveis (ou a cadeia termina
+// exatamente no fim do arquivo). Devolve -1 se a janela não tem nenhum.
+off_t sincronizar_registro(FILE *arquivo, const tarefa *atual, off_t tamanho_arquivo) {
+    size_t tamanho_janela = JANELA_SINCRONIA + CABECALHOS_SINCRONIA * (TAMANHO_CABECALHO_REGISTRO + (size_t)atual->snaplen);
+    unsigned char *janela = malloc(tamanho_janela);
+    if (!janela || fseeko(arquivo, atual->inicio, SEEK_SET) != 0) {
+        free(janela);
+        return -1;
+    }
+    size_t lidos = fread(janela, 1, tamanho_janela, arquivo);
+
+    off_t encontrado = -1;
+    for (size_t candidato = 0; candidato < JANELA_SINCRONIA && candidato + TAMANHO_CABECALHO_REGISTRO <= lidos; candidato++) {
+        uint32_t anterior = atual->primeiro_segundo;
+        size_t posicao = candidato;
+        int cadeia = 0;
+        while (cadeia < CABECALHOS_SINCRONIA && posicao + TAMANHO_CABECALHO_REGISTRO <= lidos &&
+               cabecalho_plausivel(janela + posicao, atual, anterior)) {
+            anterior = ler_u32(janela + posicao, atual->trocado);
+            posicao += TAMANHO_CABECALHO_REGISTRO + ler_u32(janela + posicao + 8, atual->trocado);
+            cadeia++;
+        }
+        if (cadeia == CABECALHOS_SINCRONIA || (cadeia > 0 && atual->inicio + (off_t)posicao == tamanho_arquivo)) {
+            encontrado = atual->inicio + candidato;
+            break;
+        }
+    }
+    free(janela);
+    return encontrado;
+}
+
+// Divide um pcap clássico em faixas de aproximadamente tamanho_tarefa bytes. Só o
+// cabeçalho global é lido aqui; cada tarefa acha o início do seu primeiro registro
+// (sincronizar_registro) já na thread que a processa.
+// Arquivos em outro formato (ex.: pcapng) viram uma única tarefa.
+void dividir_arquivo(const char *nome_arquivo) {
+    FILE *arquivo = fopen(nome_arquivo, "rb");
+    if (!arquivo) {
+        perror(nome_arquivo);
+        return;
+    }
+
+    uint32_t cabecalho_global[TAMANHO_CABECALHO_GLOBAL / 4];
+    if (fread(cabecalho_global, 1, TAMANHO_CABECALHO_GLOBAL, arquivo) != TAMANHO_CABECALHO_GLOBAL) {
+        fclose(arquivo);
+        adicionar_tarefa(nome_arquivo, 0, -1);
+        return;
+    }
 
+    uint32_t magic = cabecalho_global[0];
+    int trocado = (magic == PCAP_MAGIC_TROCADO || magic == PCAP_MAGIC_NS_TROCADO);
+    if (!trocado && magic != PCAP_MAGIC && magic != PCAP_MAGIC_NS) {
+        fclose(arquivo);
+        adicionar_tarefa(nome_arquivo, 0, -1);
+        return;
+    }
+
+    // Segundo do primeiro registro: referência de tempo para a sincronização das faixas
+    uint32_t primeiro_segundo = 0;
+    if (fread(&primeiro_segundo, 1, sizeof(primeiro_segundo), arquivo) == sizeof(primeiro_segundo) && trocado) {
+        primeiro_segundo = __builtin_bswap32(primeiro_segundo);
+    }
+
+    struct stat info;
+    if (fstat(fileno(arquivo), &info) != 0) {
+        info.st_size = 0;
+    }
+    fclose(arquivo);
+
+    // snaplen 0 aparece em alguns arquivos; vale o maior tamanho de registro do libpcap
+    uint32_t snaplen = trocado ? __builtin_bswap32(cabecalho_global[4]) : cabecalho_global[4];
+    if (snaplen == 0 || snaplen > 262144) {
+        snaplen = 262144;
+    }
+
+    off_t inicio = 0;
+    do {
+        off_t fim = inicio + tamanho_tarefa;
+        tarefa *nova = adicionar_tarefa(nome_arquivo, inicio, fim < info.st_size ? fim : -1);
+        nova->trocado = trocado;
+        nova->nanossegundos = (magic == PCAP_MAGIC_NS || magic == PCAP_MAGIC_NS_TROCADO);
+        nova->snaplen = snaplen;
+        nova->primeiro_segundo = primeiro_segundo;
+        inicio = fim;
+    } while (inicio < info.st_size);
+}
+
+void processar_tarefa(contexto_thread *contexto, tarefa *atual) {
     char errbuf[PCAP_ERRBUF_SIZE];
-    pcap_t *handle = pcap_open_offline(nome_arquivo, errbuf);
+    pcap_t *handle = pcap_open_offline(atual->nome_arquivo, errbuf);
     if (!handle) {
-        fprintf(stderr, "Erro ao abrir %s: %s\n", nome_arquivo, errbuf);
-        return NULL;
+        fprintf(stderr, "Erro ao abrir %s: %s\n", atual->nome_arquivo, errbuf);
+        return;
     }
 
-    FILE *data = fopen("data.csv", "a");
-    if (!data) {
-        perror("Erro ao abrir data.csv");
-        pcap_close(handle);
-        return NULL;
+    if (modo_shards) {
+        // Shards temporários (juntar_shards) nunca sobrescrevem um arquivo existente
+        if (juntar_shards) {
+            contexto->shard = fopen(atual->nome_shard, modo_binario ? "wbx" : "wx");
+        } else {
+            contexto->shard = fopen(atual->nome_shard, modo_binario ? "wb" : "w");
+        }
+        if (!contexto->shard) {
+            perror(atual->nome_shard);
+            pcap_close(handle);
+            return;
+        }
+        if (!modo_binario) {
+            fputs(CABECALHO_CSV, contexto->shard);
+        }
     }
 
-    pcap_loop(handle, 0, manipular_pacote, (unsigned char *)data);
-    fclose(data);
+    // O cabeçalho global já foi lido pelo pcap_open_offline; basta posicionar o arquivo
+    // no primeiro registro da faixa e ler os registros que começam antes do fim dela.
+    // Como a tarefa seguinte sincroniza a partir desse mesmo fim, cada registro é lido
+    // por exatamente uma tarefa.
+    FILE *arquivo = pcap_file(handle);
+    off_t primeiro = 0;
+    if (atual->inicio > 0) {
+        struct stat info;
+        primeiro = fstat(fileno(arquivo), &info) == 0 ? sincronizar_registro(arquivo, atual, info.st_size) : -1;
+        if (primeiro < 0) {
+            fprintf(stderr, "%s: nenhum registro encontrado a partir do byte %lld\n", atual->nome_arquivo,
+                    (long long)atual->inicio);
+        }
+    }
+    if (primeiro < 0 || (primeiro > 0 && fseeko(arquivo, primeiro, SEEK_SET) != 0)) {
+        if (primeiro > 0) {
+            perror(atual->nome_arquivo);
+        }
+    } else {
+        struct pcap_pkthdr *cabecalho;
+        const unsigned char *pacote;
+        while ((atual->fim < 0 || ftello(arquivo) < atual->fim) && pcap_next_ex(handle, &cabecalho, &pacote) == 1) {
+            manipular_pacote((unsigned char *)contexto, cabecalho, pacote);
+        }
+    }
+
+    descarregar_buffer(contexto);
+    if (contexto->shard) {
+        fclose(contexto->shard);
+        contexto->shard = NULL;
+    }
     pcap_close(handle);
+}
+
+void *processar_pcap(void *arg) {
+    contexto_thread *contexto = (contexto_thread *)arg;
+
+    while (1) {
+        pthread_mutex_lock(&lock_fila);
+        int indice = proxima_tarefa < num_tarefas ? proxima_tarefa++ : -1;
+        pthread_mutex_unlock(&lock_fila);
+
+        if (indice < 0) {
+            break;
+        }
+        processar_tarefa(contexto, &tarefas[indice]);
+    }
 
-    printf("Thread finalizou: %s\n", nome_arquivo);
     return NULL;
 }
 
+// Junta os shards na saída principal, na ordem das tarefas (sem o cabeçalho de cada shard)
+int juntar_arquivos(void) {
+    char *bloco = malloc(TAMANHO_BUFFER);
+    if (!bloco) {
+        perror("Erro ao alocar buffer");
+        return 1;
+    }
+
+    for (int i = 0; i < num_tarefas; i++) {
+        FILE *shard = fopen(tarefas[i].nome_shard, "rb");
+        if (!shard) {
+            perror(tarefas[i].nome_shard);
+            continue;
+        }
+        if (!modo_binario) {
+            int c;
+            while ((c = fgetc(shard)) != EOF && c != '\n') {
+            }
+        }
+
+        size_t lidos;
+        while ((lidos = fread(bloco, 1, TAMANHO_BUFFER, shard)) > 0) {
+            fwrite(bloco, 1, lidos, saida);
+        }
+        fclose(shard);
+        remove(tarefas[i].nome_shard);
+    }
+
+    free(bloco);
+    return 0;
+}
+
 int main(int argc, char *argv[]) {
-    if (argc < 2) {
-        printf("Uso: %s parte1.pcap parte2.pcap ...\n", argv[0]);
+    int num_threads = (int)sysconf(_SC_NPROCESSORS_ONLN);
+    int opcao;
+    while ((opcao = getopt(argc, argv, "bsmaj:t:")) != -1) {
+        switch (opcao) {
+            case 'b':
+                modo_binario = 1;
+                arquivo_saida = "data.bin";
+                extensao_saida = ".bin";
+                break;
+            case 's':
+                modo_shards = 1;
+                break;
+            case 'm':
+                juntar_shards = 1;
+                break;
+            case 'a':
+                modo_acrescentar = 1;
+                break;
+            case 'j':
+                num_threads = atoi(optarg);
+                break;
+            case 't':
+                tamanho_tarefa = atoll(optarg) * 1024 * 1024;
+                break;
+            default:
+                printf("Uso: %s [-a] [-b] [-s [-m]] [-j threads] [-t MB] arquivo1.pcap arquivo2.pcap ...\n", argv[0]);
+                return 1;
+        }
+    }
+
+    if (optind >= argc || num_threads < 1 || tamanho_tarefa < 1) {
+        printf("Uso: %s [-a] [-b] [-s [-m]] [-j threads] [-t MB] arquivo1.pcap arquivo2.pcap ...\n", argv[0]);
         return 1;
     }
 
-    // Criar arquivo CSV com cabeçalho
-    FILE *data = fopen("data.csv", "w");
-    fprintf(data, "timestamp,src_ip,dst_ip,protocol,length\n");
-    fclose(data);
+    for (int i = optind; i < argc; i++) {
+        dividir_arquivo(argv[i]);
+    }
+
+    // Com uma saída única, threads diferentes descarregando seus buffers nela misturariam
+    // as faixas e o data.csv sairia fora da ordem da captura (o que muda os IPGs). Nesse
+    // caso cada tarefa grava um shard temporário e os shards são juntados na ordem.
+    if (!modo_shards && num_tarefas > 1 && num_threads > 1) {
+        modo_shards = 1;
+        juntar_shards = 1;
+    }
+
+    // Os shards do modo -s sem -m são a saída pedida (data_N.csv). Os que só existem para
+    // serem juntados ficam ao lado do arquivo de saída, com o nome dele; se algum já
+    // existir (ex.: sobra de uma execução interrompida), nada é sobrescrito.
+    for (int i = 0; i < num_tarefas; i++) {
+        if (juntar_shards) {
+            snprintf(tarefas[i].nome_shard, sizeof(tarefas[i].nome_shard), "%s.parte_%d", arquivo_saida, i);
+            if (access(tarefas[i].nome_shard, F_OK) == 0) {
+                fprintf(stderr, "%s já existe; remova-o antes de rodar o extrator\n", tarefas[i].nome_shard);
+                return 1;
+            }
+        } else {
+            snprintf(tarefas[i].nome_shard, sizeof(tarefas[i].nome_shard), "data_%d%s", i, extensao_saida);
+        }
+    }
+    printf("%d tarefas para %d threads.\n", num_tarefas, num_threads);
 
-    int num_arquivos = argc - 1;
-    pthread_t threads[num_arquivos];
+    // Criar arquivo de saída (o CSV leva cabeçalho, o binário só contém registros).
+    // No modo -s sem -m não há saída única, só os shards. No modo -a o arquivo
+    // existente é mantido e o cabeçalho só é escrito se ele estiver vazio.
+    if (!modo_shards || juntar_shards) {
+        if (modo_acrescentar) {
+            saida = fopen(arquivo_saida, modo_binario ? "ab" : "a");
+        } else {
+            saida = fopen(arquivo_saida, modo_binario ? "wb" : "w");
+        }
+        if (!saida) {
+            perror("Erro ao criar arquivo de saída");
+            return 1;
+        }
+        if (!modo_binario && ftello(saida) == 0) {
+            fputs(CABECALHO_CSV, saida);
+        }
+    }
+
+    pthread_t threads[num_threads];
+    contexto_thread *contextos = calloc(num_threads, sizeof(contexto_thread));
 
-    for (int i = 0; i < num_arquivos; i++) {
-        pthread_create(&threads[i], NULL, processar_pcap, argv[i + 1]);
+    for (int i = 0; i < num_threads; i++) {
+        contextos[i].buffer = malloc(TAMANHO_BUFFER);
+        if (!contextos[i].buffer) {
+            perror("Erro ao alocar buffer");
+            return 1;
+        }
+        pthread_create(&threads[i], NULL, processar_pcap, &contextos[i]);
     }
 
-    for (int i = 0; i < num_arquivos; i++) {
+    for (int i = 0; i < num_threads; i++) {
         pthread_join(threads[i], NULL);
+        free(contextos[i].buffer);
+    }
+
+    if (modo_shards && juntar_shards) {
+        juntar_arquivos();
+    }
+    if (saida) {
+        fclose(saida);
     }
+    free(contextos);
+    free(tarefas);
 
     printf("Processamento multithread finalizado.\n");
     return 0;
@@ -1,74 +1,157 @@
-import pandas as pd
-import sys
-
-def limpar_csv_arquivo(caminho_original, caminho_corrigido):
-    linhas_validas = []
-    
-    # Limite máximo para o valor do timestamp (não mais necessário, pois vamos arredondar)
-    LIMITE_TIMESTAMP = sys.maxsize  # O maior valor para um inteiro (dependendo do sistema)
-
-    # Abrir o arquivo original para leitura
-    with open(caminho_original, "r", encoding="utf-8") as origem:
-        for i, linha in enumerate(origem):
-            # Manter o cabeçalho ou linhas com 5 campos
-            if i == 0 or linha.count(",") == 4:
-
-                # Separar os campos e verificar o timestamp
-                campos = linha.strip().split(',')
-                try:
-                    # Obter o timestamp
-                    timestamp = campos[0]
-                    
-                    # Verificar se o timestamp tem milissegundos
-                    partes_timestamp = timestamp.split('.')
-                    if len(partes_timestamp) == 2:
-                        # Arredondar a parte inteira para segundos (removendo a parte decimal)
-                        timestamp_inteiro = int(partes_timestamp[0])
-                        # Arredondar a parte decimal para o inteiro mais próximo
-                        timestamp_arredondado = round(float(timestamp))
-                        campos[0] = str(timestamp_arredondado)  # Substitui o timestamp original
-
-                    # Adicionar a linha com o timestamp corrigido
-                    linhas_validas.append(','.join(campos) + '\n')
-                
-                except (ValueError, IndexError, OverflowError):
-                    # Caso o timestamp não seja válido, ignorar a linha
-                    continue
+import os
+import mmap
+import math
+import random
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def limpar_linha(linha):
+    # Regras de limpeza para uma linha (bytes, sem a quebra de linha): só linhas com
+    # 5 campos; timestamp com parte decimal é arredondado para segundos inteiros e,
+    # se for inválido, a linha é descartada. Devolve a linha corrigida ou None.
+    if linha.count(b",") != 4:
+        return None
+    campos = linha.strip().split(b',')
+    try:
+        # Verificar se o timestamp tem milissegundos
+        partes_timestamp = campos[0].split(b'.')
+        if len(partes_timestamp) == 2:
+            int(partes_timestamp[0])
+            campos[0] = str(round(float(campos[0]))).encode()
+    except (ValueError, IndexError, OverflowError):
+        return None
+    return b','.join(campos) + b'\n'
+
+
+def limpar_bloco(caminho, inicio, fim, usar_mmap=True):
+    # Executado nos processos do pool: limpa as linhas da faixa [inicio, fim) do
+    # arquivo (alinhada a quebras de linha) e devolve o trecho de saída já pronto
+    with open(caminho, "rb") as origem:
+        if usar_mmap:
+            with mmap.mmap(origem.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                bloco = mapa[inicio:fim]
+        else:
+            origem.seek(inicio)
+            bloco = origem.read(fim - inicio)
+
+    linhas = (limpar_linha(linha) for linha in bloco.split(b'\n'))
+    return b''.join(linha for linha in linhas if linha is not None)
+
+
+def dividir_em_blocos(caminho, inicio, tamanho_bloco):
+    # Cortes a cada ~tamanho_bloco bytes, sempre logo após uma quebra de linha
+    tamanho = os.path.getsize(caminho)
+    cortes = [inicio]
+    with open(caminho, "rb") as origem:
+        while cortes[-1] + tamanho_bloco < tamanho:
+            origem.seek(cortes[-1] + tamanho_bloco)
+            origem.readline()
+            cortes.append(origem.tell())
+    cortes.append(tamanho)
+    return [(i, f) for i, f in zip(cortes[:-1], cortes[1:]) if f > i]
 
-    # Salvar as linhas válidas em um novo arquivo
-    with open(caminho_corrigido, "w", encoding="utf-8") as destino:
-        destino.writelines(linhas_validas)
+
+def limpar_csv_arquivo(caminho_original, caminho_corrigido, processos=None, tamanho_bloco=16 << 20, usar_mmap=True):
+    # Limpa o CSV em streaming: o arquivo é dividido em blocos de ~tamanho_bloco bytes
+    # alinhados a linhas, limpos em paralelo por `processos` processos (padrão: todos
+    # os núcleos) e escritos na ordem original. No máximo 2 blocos por processo ficam
+    # em memória ao mesmo tempo, então a memória não depende do tamanho do arquivo.
+    processos = processos or os.cpu_count() or 1
+
+    with open(caminho_original, "rb") as origem:
+        cabecalho = origem.readline()
+        inicio = origem.tell()
+    blocos = dividir_em_blocos(caminho_original, inicio, tamanho_bloco)
+
+    with open(caminho_corrigido, "wb") as destino:
+        # Cabeçalho é mantido (com a mesma normalização das outras linhas)
+        campos = cabecalho.strip().split(b',')
+        destino.write(b','.join(campos) + b'\n' if cabecalho else b'')
+
+        if processos == 1:
+            for bloco_inicio, bloco_fim in blocos:
+                destino.write(limpar_bloco(caminho_original, bloco_inicio, bloco_fim, usar_mmap))
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                pendentes = deque()
+                for bloco_inicio, bloco_fim in blocos:
+                    pendentes.append(executor.submit(limpar_bloco, caminho_original, bloco_inicio, bloco_fim, usar_mmap))
+                    if len(pendentes) >= 2 * processos:
+                        destino.write(pendentes.popleft().result())
+                while pendentes:
+                    destino.write(pendentes.popleft().result())
 
     print(f"Arquivo filtrado e corrigido salvo em: {caminho_corrigido}")
 
 
-def pegar_x_linhas(caminho_entrada, caminho_saida, n_topo=5000_000, n_base=200_000):
-    # Lê as primeiras n_topo linhas
-    df_topo = pd.read_csv(caminho_entrada, nrows=n_topo)
-    
-    # Copia as últimas n_base linhas
-    df_base = df_topo.tail(n_base).copy()
+def estimar_linhas(caminho, amostra=1 << 20):
+    # Número aproximado de linhas, pelo tamanho médio das linhas do primeiro 1 MB
+    with open(caminho, "rb") as origem:
+        inicio = origem.read(amostra)
+    quebras = inicio.count(b'\n')
+    if quebras == 0 or len(inicio) < amostra:
+        return max(quebras, 1)
+    return int(os.path.getsize(caminho) / (len(inicio) / quebras))
 
-    # Concatena os dois pedaços
-    df_resultado = pd.concat([df_topo, df_base], ignore_index=True)
 
-    # Cabeçalho fixo
-    cabecalho_padrao = "timestamp,src_ip,dst_ip,protocol,length\n"
+def amostrar_csv(caminho_entrada, caminho_saida, n_linhas=300_000, modo="fluxos", semente=None):
+    # Amostra de ~n_linhas do CSV inteiro em uma única passada, com memória limitada.
+    #   modo="fluxos": mantém todos os pacotes dos IPs de origem cujo hash (crc32) cai
+    #     abaixo de uma fração fixa. Os fluxos ficam completos, então IPGs, bursts e
+    #     silêncios continuam válidos. A quantidade final é aproximada (IPs muito ativos
+    #     pesam mais) e as linhas são escritas direto na saída.
+    #   modo="uniforme": reservatório (Algoritmo L de Li, 1994) com exatamente n_linhas
+    #     linhas sorteadas uniformemente, escritas na ordem original ao final.
+    gerador = random.Random(semente)
+    with open(caminho_entrada, "rb") as origem, open(caminho_saida, "wb") as destino:
+        destino.write(origem.readline())
+
+        if modo == "fluxos":
+            fracao = min(1.0, n_linhas / max(estimar_linhas(caminho_entrada) - 1, 1))
+            limite = int(fracao * (1 << 32))
+            escritas = 0
+            for linha in origem:
+                campos = linha.split(b',', 2)
+                if len(campos) == 3 and zlib.crc32(campos[1]) < limite:
+                    destino.write(linha)
+                    escritas += 1
+
+        elif modo == "uniforme":
+            amostra = []
+            proximo = n_linhas
+            peso = 1.0
+            for posicao, linha in enumerate(origem):
+                if posicao < n_linhas:
+                    amostra.append((posicao, linha))
+                    if posicao == n_linhas - 1:
+                        peso = math.exp(math.log(gerador.random()) / n_linhas)
+                        proximo = n_linhas + int(math.log(gerador.random()) / math.log(1 - peso))
+                    continue
+                if posicao == proximo:
+                    amostra[gerador.randrange(n_linhas)] = (posicao, linha)
+                    peso *= math.exp(math.log(gerador.random()) / n_linhas)
+                    proximo += int(math.log(gerador.random()) / math.log(1 - peso)) + 1
+            amostra.sort()
+            for _, linha in amostra:
+                destino.write(linha if linha.endswith(b'\n') else linha + b'\n')
+            escritas = len(amostra)
+
+        else:
+            raise ValueError(f"modo de amostragem desconhecido: {modo}")
 
-    # Salva o resultado com cabeçalho fixo
-    with open(caminho_saida, "w", encoding="utf-8") as f:
-        f.write(cabecalho_padrao)  # Escreve o cabeçalho manualmente
-        df_resultado.to_csv(f, index=False, header=False, lineterminator='\n')  # Força o uso de '\n' como separador de linha
+    print(f"Amostra ({modo}) com {escritas} linhas salva em: {caminho_saida}")
 
-    print(f"Arquivo com {n_topo} linhas do topo e {n_base} do final salvo em: {caminho_saida}")
 
-# Passos do processo
-caminho_entrada = "data_limpo.csv"
-caminho_filtrado = "data_limpo_filtrado.csv"
-caminho_saida = "data_300k.csv"
+# Passos do processo (protegidos pelo __main__: os processos do pool importam este módulo)
+if __name__ == "__main__":
+    caminho_entrada = "data_limpo.csv"
+    caminho_filtrado = "data_limpo_filtrado.csv"
+    caminho_saida = "data_300k.csv"
 
-# Filtrar o CSV original (caso queira usar)
-# limpar_csv_arquivo(caminho_entrada, caminho_filtrado)
+    # Filtrar o CSV original (caso queira usar)
+    # limpar_csv_arquivo(caminho_entrada, caminho_filtrado)
 
-# Pegar as 300k linhas do arquivo filtrado
-pegar_x_linhas(caminho_filtrado, caminho_saida)
+    # Amostra de ~300k linhas representativa do arquivo filtrado inteiro
+    amostrar_csv(caminho_filtrado, caminho_saida)
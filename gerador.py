@@ -0,0 +1,181 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import dataProcessing
+
+# Gerador determinístico de capturas sintéticas, para medir desempenho sem depender
+# dos pcaps reais. A mesma semente e os mesmos parâmetros geram sempre os mesmos
+# pacotes, em pcap (entrada do extrator) e/ou no CSV que o extrator produziria.
+#
+# Perfis de tráfego:
+#   - hosts comuns: origem com popularidade Zipf entre n_hosts IPs de 10.0.0.0/8,
+#     destino Zipf entre n_servidores IPs de 192.168.0.0/16;
+#   - scanners: poucos IPs de origem que mandam pacotes pequenos (TCP) para destinos
+#     sempre diferentes (varredura horizontal);
+#   - hosts em rajada: pacotes em sequências de ~tamanho_rajada do mesmo IP, com IPG
+#     bem menor que o limite de burst padrão (0.01 s).
+
+# Pacotes gerados por vez; fixo para o resultado não depender da memória disponível
+TAMANHO_LOTE = 1_000_000
+
+INICIO_PADRAO = 1735707600.0  # 2025-01-01 05:00:00 UTC, como nas capturas do trabalho
+
+# Registro de um pcap clássico com ethernet + cabeçalho IPv4 e nada mais (snaplen 34):
+# é o que o extrator lê, e o tamanho original do pacote vai em orig_len
+DTYPE_REGISTRO_PCAP = np.dtype([
+    ("ts_sec", "<u4"), ("ts_usec", "<u4"), ("incl_len", "<u4"), ("orig_len", "<u4"),
+    ("mac_destino", "u1", 6), ("mac_origem", "u1", 6), ("ethertype", ">u2"),
+    ("versao_ihl", "u1"), ("tos", "u1"), ("tamanho_total", ">u2"), ("identificacao", ">u2"),
+    ("fragmento", ">u2"), ("ttl", "u1"), ("protocolo", "u1"), ("checksum", ">u2"),
+    ("origem", ">u4"), ("destino", ">u4"),
+])
+SNAPLEN = DTYPE_REGISTRO_PCAP.itemsize - 16
+
+# magic, versão 2.4, fuso, precisão, snaplen, linktype 1 (ethernet)
+CABECALHO_PCAP = np.array([(0xa1b2c3d4, 2, 4, 0, 0, SNAPLEN, 1)], dtype=[
+    ("magic", "<u4"), ("versao_maior", "<u2"), ("versao_menor", "<u2"), ("fuso", "<i4"),
+    ("precisao", "<u4"), ("snaplen", "<u4"), ("linktype", "<u4"),
+])
+
+BASE_HOSTS = 10 << 24        # 10.0.0.0
+BASE_SERVIDORES = (192 << 24) | (168 << 16)  # 192.168.0.0
+BASE_SCANNERS = (172 << 24) | (16 << 16)     # 172.16.0.0
+BASE_RAJADAS = (172 << 24) | (17 << 16)      # 172.17.0.0
+
+NOMES_PROTOCOLOS = np.array(dataProcessing.CATEGORIAS_PROTOCOLOS, dtype=object)[dataProcessing.CODIGOS_PROTOCOLOS]
+
+
+def popularidade_zipf(n, expoente):
+    pesos = 1.0 / np.arange(1, n + 1) ** expoente
+    return pesos / pesos.sum()
+
+def gerar_pacotes(n_pacotes, semente=0, pacotes_por_segundo=20_000, n_hosts=5000, n_servidores=500,
+                  expoente_zipf=1.1, n_scanners=3, fracao_scan=0.02, n_rajadas=10, fracao_rajadas=0.05,
+                  tamanho_rajada=30, inicio=INICIO_PADRAO):
+    # Gera os pacotes em lotes de TAMANHO_LOTE (arrays com dtype DTYPE_REGISTRO, em ordem
+    # de tempo), para capturas de 1e8 pacotes caberem em memória
+    rng = np.random.default_rng(semente)
+    pop_hosts = popularidade_zipf(n_hosts, expoente_zipf)
+    pop_servidores = popularidade_zipf(n_servidores, expoente_zipf)
+    # IPs embaralhados, para os mais populares não serem sempre os primeiros da faixa
+    hosts = BASE_HOSTS + rng.permutation(1 << 20)[:n_hosts].astype(np.uint32)
+    servidores = BASE_SERVIDORES + rng.permutation(1 << 16)[:n_servidores].astype(np.uint32)
+    scanners = BASE_SCANNERS + np.arange(1, n_scanners + 1, dtype=np.uint32)
+    rajadas = BASE_RAJADAS + np.arange(1, n_rajadas + 1, dtype=np.uint32)
+    proximo_destino_scan = 0
+    agora = inicio
+
+    gerados = 0
+    while gerados < n_pacotes:
+        n = min(TAMANHO_LOTE, n_pacotes - gerados)
+        lote = np.empty(n, dtype=dataProcessing.DTYPE_REGISTRO)
+
+        intervalos = rng.exponential(1.0 / pacotes_por_segundo, n)
+        lote["timestamp"] = agora + np.cumsum(intervalos)
+        agora = float(lote["timestamp"][-1])
+
+        perfil = rng.choice(3, n, p=[1 - fracao_scan - fracao_rajadas, fracao_scan, fracao_rajadas])
+        comum, scan, rajada = perfil == 0, perfil == 1, perfil == 2
+
+        lote["src_ip"][comum] = hosts[rng.choice(n_hosts, comum.sum(), p=pop_hosts)]
+        lote["dst_ip"][comum] = servidores[rng.choice(n_servidores, comum.sum(), p=pop_servidores)]
+        lote["protocol"][comum] = rng.choice([6, 17, 1, 47], comum.sum(), p=[0.7, 0.2, 0.05, 0.05])
+        tamanhos = np.where(rng.random(n) < 0.45, rng.integers(60, 100, n), rng.integers(1400, 1515, n))
+        tamanhos = np.where(rng.random(n) < 0.2, rng.integers(60, 1515, n), tamanhos)
+        lote["length"] = tamanhos
+
+        # Scanners: um destino novo a cada pacote, em 10.0.0.0/8
+        n_scan = int(scan.sum())
+        if n_scan and n_scanners:
+            lote["src_ip"][scan] = scanners[rng.integers(0, n_scanners, n_scan)]
+            destinos = (proximo_destino_scan + np.arange(n_scan)) % (1 << 24)
+            lote["dst_ip"][scan] = BASE_HOSTS + destinos.astype(np.uint32)
+            proximo_destino_scan += n_scan
+            lote["protocol"][scan] = 6
+            lote["length"][scan] = 60
+        else:
+            lote["src_ip"][scan] = hosts[rng.choice(n_hosts, n_scan, p=pop_hosts)]
+            lote["dst_ip"][scan] = servidores[rng.integers(0, n_servidores, n_scan)]
+            lote["protocol"][scan] = 6
+
+        # Rajadas: os pacotes deste perfil são agrupados em sequências do mesmo host
+        n_rajada = int(rajada.sum())
+        if n_rajada and n_rajadas:
+            sequencia = np.arange(n_rajada) // tamanho_rajada
+            dono = rng.integers(0, n_rajadas, sequencia[-1] + 1)
+            lote["src_ip"][rajada] = rajadas[dono[sequencia]]
+            lote["dst_ip"][rajada] = servidores[rng.choice(n_servidores, n_rajada, p=pop_servidores)]
+            lote["protocol"][rajada] = 17
+        else:
+            lote["src_ip"][rajada] = hosts[rng.choice(n_hosts, n_rajada, p=pop_hosts)]
+            lote["dst_ip"][rajada] = servidores[rng.choice(n_servidores, n_rajada, p=pop_servidores)]
+            lote["protocol"][rajada] = 6
+
+        gerados += n
+        yield lote
+
+def escrever_csv(lotes, caminho):
+    # Mesmo formato do extrator: cabeçalho, timestamp com 6 casas e protocolo por nome
+    with open(caminho, "w", newline="") as f:
+        f.write("timestamp,src_ip,dst_ip,protocol,length\n")
+        for lote in lotes:
+            pd.DataFrame({
+                "timestamp": lote["timestamp"],
+                "src_ip": dataProcessing.ips_para_str(lote["src_ip"]),
+                "dst_ip": dataProcessing.ips_para_str(lote["dst_ip"]),
+                "protocol": NOMES_PROTOCOLOS[lote["protocol"]],
+                "length": lote["length"],
+            }).to_csv(f, header=False, index=False, float_format="%.6f")
+
+def escrever_pcap(lotes, caminho):
+    with open(caminho, "wb") as f:
+        CABECALHO_PCAP.tofile(f)
+        for lote in lotes:
+            registros = np.zeros(len(lote), dtype=DTYPE_REGISTRO_PCAP)
+            microssegundos = np.round(lote["timestamp"] * 1e6).astype(np.int64)
+            registros["ts_sec"] = microssegundos // 1_000_000
+            registros["ts_usec"] = microssegundos % 1_000_000
+            registros["incl_len"] = SNAPLEN
+            registros["orig_len"] = lote["length"]
+            registros["ethertype"] = 0x0800
+            registros["versao_ihl"] = 0x45
+            registros["tamanho_total"] = np.clip(lote["length"].astype(np.int64) - 14, 20, 65535)
+            registros["ttl"] = 64
+            registros["protocolo"] = lote["protocol"]
+            registros["origem"] = lote["src_ip"]
+            registros["destino"] = lote["dst_ip"]
+            registros.tofile(f)
+
+def gerar_captura(n_pacotes, caminho_csv=None, caminho_pcap=None, **parametros):
+    # Escreve a mesma captura nos formatos pedidos (cada formato gera os lotes de novo,
+    # o que é mais barato do que guardar 1e8 pacotes em memória)
+    if caminho_csv:
+        escrever_csv(gerar_pacotes(n_pacotes, **parametros), caminho_csv)
+    if caminho_pcap:
+        escrever_pcap(gerar_pacotes(n_pacotes, **parametros), caminho_pcap)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera capturas sintéticas (pcap e/ou CSV) de forma determinística")
+    parser.add_argument("--pacotes", type=float, default=1e6, help="número de pacotes (ex.: 1e5, 1e8)")
+    parser.add_argument("--csv", help="CSV no formato do extrator")
+    parser.add_argument("--pcap", help="pcap clássico (ethernet + IPv4) para o extrator")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--taxa", type=float, default=20_000, help="pacotes por segundo")
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--servidores", type=int, default=500)
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da popularidade dos IPs")
+    parser.add_argument("--scanners", type=int, default=3)
+    parser.add_argument("--fracao-scan", type=float, default=0.02)
+    parser.add_argument("--rajadas", type=int, default=10, help="número de hosts em rajada")
+    parser.add_argument("--fracao-rajadas", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if not args.csv and not args.pcap:
+        parser.error("informe --csv e/ou --pcap")
+    gerar_captura(int(args.pacotes), args.csv, args.pcap, semente=args.semente, pacotes_por_segundo=args.taxa,
+                  n_hosts=args.hosts, n_servidores=args.servidores, expoente_zipf=args.zipf,
+                  n_scanners=args.scanners, fracao_scan=args.fracao_scan, n_rajadas=args.rajadas,
+                  fracao_rajadas=args.fracao_rajadas)
@@ -1,4 +1,10 @@
 import os
+import json
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')  # só gera arquivos; permite desenhar em processos sem janela
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
@@ -9,37 +15,130 @@ from matplotlib import dates as mdates
 
 plt.style.use('seaborn-v0_8-darkgrid')
 
-def gerar_graficos(stats):
-    for pasta in ["img/barras", "img/tempo", "img/heatmap", "img/scatter"]:
-        os.makedirs(pasta, exist_ok=True)
+def tarefas_graficos(stats):
+    # Lista de gráficos a gerar: (caminho da imagem, função, argumentos), com só a parte
+    # de `stats` que cada um usa (ver renderizar_graficos)
+    tarefas = []
 
     df = pd.DataFrame(stats["relacao_tamanho_frequencia"], columns=["tamanho", "ipg"])
 
-    gerar_scatter_tamanho_frequencia(df, caminho="img/scatter/tamanho_frequencia.png")
-
-    # gerar_barra(stats["top_ips_origem"], "Top IPs de Origem", "img/barras/ip_origem.png")
-
-    gerar_barra(stats["top_ips_destino"], "Top IPs de Destino", "img/barras/ip_destino.png")
-
-    if not isinstance(stats["pacotes_por_tempo"], pd.DataFrame):
-        if isinstance(stats["pacotes_por_tempo"], dict):
-            stats["pacotes_por_tempo"] = pd.DataFrame(list(stats["pacotes_por_tempo"].items()), columns=["timestamp", "count"])
-        elif isinstance(stats["pacotes_por_tempo"], list):
-            stats["pacotes_por_tempo"] = pd.DataFrame(stats["pacotes_por_tempo"], columns=["timestamp", "count"])
-    
-    stats["pacotes_por_tempo"]['timestamp'] = pd.to_datetime(stats["pacotes_por_tempo"]['timestamp'], errors='coerce')
-    stats["pacotes_por_tempo"].set_index('timestamp', inplace=True)
-    gerar_tempo(stats["pacotes_por_tempo"], "Pacotes ao Longo do Tempo", "img/tempo/pacotes_tempo.png")
+    tarefas.append(("img/scatter/tamanho_frequencia.png", gerar_scatter_tamanho_frequencia,
+                    (df, "img/scatter/tamanho_frequencia.png", stats.get("relacao_tamanho_frequencia_total"))))
+
+    # tarefas.append(("img/barras/ip_origem.png", gerar_barra,
+    #                 (stats["top_ips_origem"], "Top IPs de Origem", "img/barras/ip_origem.png")))
+
+    tarefas.append(("img/barras/ip_destino.png", gerar_barra,
+                    (stats["top_ips_destino"], "Top IPs de Destino", "img/barras/ip_destino.png")))
+
+    pacotes_por_tempo = stats["pacotes_por_tempo"]
+    if not isinstance(pacotes_por_tempo, pd.DataFrame):
+        if isinstance(pacotes_por_tempo, dict):
+            pacotes_por_tempo = pd.DataFrame(list(pacotes_por_tempo.items()), columns=["timestamp", "count"])
+        elif isinstance(pacotes_por_tempo, list):
+            pacotes_por_tempo = pd.DataFrame(pacotes_por_tempo, columns=["timestamp", "count"])
+        pacotes_por_tempo['timestamp'] = pd.to_datetime(pacotes_por_tempo['timestamp'], errors='coerce')
+        pacotes_por_tempo.set_index('timestamp', inplace=True)
+    tarefas.append(("img/tempo/pacotes_tempo.png", gerar_tempo,
+                    (pacotes_por_tempo, "Pacotes ao Longo do Tempo", "img/tempo/pacotes_tempo.png")))
+
+    tarefas.append(("img/heatmap/ips_ativos_tempo.png", gerar_heatmap_ips_ativos,
+                    (stats["heatmap_ips_tempo"]["matriz"],
+                     stats["heatmap_ips_tempo"]["ips"],
+                     stats["heatmap_ips_tempo"]["tempos"],
+                     "Mapa de Calor dos IPs mais Ativos",
+                     "img/heatmap/ips_ativos_tempo.png")))
+
+    tarefas.append(("img/tempo/trafego_agregado_tempo.png", gerar_trafego_agrupado_tempo,
+                    (stats["trafego_por_minuto"],
+                     "Tráfego Agregado ao Longo do Tempo",
+                     "img/tempo/trafego_agregado_tempo.png")))
+
+    if "entropia_por_janela" in stats:
+        tarefas.append(("img/tempo/entropia_tempo.png", gerar_entropia_tempo,
+                        (stats["entropia_por_janela"],
+                         "Entropia dos IPs ao Longo do Tempo",
+                         "img/tempo/entropia_tempo.png")))
+
+    return tarefas
+
+def gerar_graficos(stats, processos=None):
+    renderizar_graficos(tarefas_graficos(stats), processos)
+
+def normalizar_para_impressao(valor):
+    # Forma estável dos argumentos de um gráfico: conjuntos ordenados (a ordem deles
+    # muda entre execuções) e DataFrames pelo hash do conteúdo
+    if isinstance(valor, pd.DataFrame):
+        return (list(valor.columns), pd.util.hash_pandas_object(valor).values.tobytes())
+    if isinstance(valor, dict):
+        return [(repr(chave), normalizar_para_impressao(item)) for chave, item in valor.items()]
+    if isinstance(valor, (set, frozenset)):
+        return sorted(map(repr, valor))
+    if isinstance(valor, (list, tuple)):
+        return [normalizar_para_impressao(item) for item in valor]
+    return repr(valor)
+
+def impressao_digital(funcao, argumentos):
+    # Muda quando os dados do gráfico ou o código da função que o desenha mudam
+    conteudo = repr((inspect.getsource(funcao), normalizar_para_impressao(argumentos)))
+    return hashlib.sha1(conteudo.encode()).hexdigest()
+
+def renderizar_graficos(tarefas, processos=None, arquivo_impressoes="img/.impressoes.json", progresso=None, contexto_processos=None):
+    # Desenha as tarefas (ver tarefas_graficos) em paralelo, com o backend Agg, pulando
+    # as imagens que já existem e cujos dados não mudaram desde a última vez.
+    # progresso, se dado, é chamado como progresso(gráficos prontos, total) a cada gráfico.
+    # contexto_processos escolhe como os processos são criados (ver dataProcessing.acumular_faixa).
+    for pasta in ["img/barras", "img/tempo", "img/heatmap", "img/scatter"]:
+        os.makedirs(pasta, exist_ok=True)
 
-    gerar_heatmap_ips_ativos(stats["heatmap_ips_tempo"]["matriz"],
-                                 stats["heatmap_ips_tempo"]["ips"],
-                                 stats["heatmap_ips_tempo"]["tempos"],
-                                 "Mapa de Calor dos IPs mais Ativos",
-                                 "img/heatmap/ips_ativos_tempo.png")
+    try:
+        with open(arquivo_impressoes, encoding="utf-8") as f:
+            impressoes = json.load(f)
+    except (OSError, ValueError):
+        impressoes = {}
+
+    pendentes = []
+    for caminho, funcao, argumentos in tarefas:
+        impressao = impressao_digital(funcao, argumentos)
+        if impressoes.get(caminho) == impressao and os.path.exists(caminho):
+            continue
+        impressoes.pop(caminho, None)
+        pendentes.append((caminho, funcao, argumentos, impressao))
+
+    prontos = len(tarefas) - len(pendentes)
+    if progresso:
+        progresso(prontos, len(tarefas))
+
+    processos = min(processos or os.cpu_count() or 1, len(pendentes))
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto_processos) as executor:
+            futuros = [(caminho, executor.submit(funcao, *argumentos), impressao)
+                       for caminho, funcao, argumentos, impressao in pendentes]
+            for caminho, futuro, impressao in futuros:
+                try:
+                    futuro.result()
+                except Exception as e:
+                    print(f"Erro ao gerar o gráfico {caminho}: {e}")
+                else:
+                    impressoes[caminho] = impressao
+                prontos += 1
+                if progresso:
+                    progresso(prontos, len(tarefas))
+    else:
+        for caminho, funcao, argumentos, impressao in pendentes:
+            try:
+                funcao(*argumentos)
+            except Exception as e:
+                print(f"Erro ao gerar o gráfico {caminho}: {e}")
+            else:
+                impressoes[caminho] = impressao
+            prontos += 1
+            if progresso:
+                progresso(prontos, len(tarefas))
 
-    gerar_trafego_agrupado_tempo(stats["trafego_por_minuto"],
-                                     "Tráfego Agregado ao Longo do Tempo",
-                                     "img/tempo/trafego_agregado_tempo.png")
+    with open(arquivo_impressoes, "w", encoding="utf-8") as f:
+        json.dump(impressoes, f, indent=4)
+    print(f"{len(pendentes)} de {len(tarefas)} gráficos gerados")
 
 
 
@@ -96,15 +195,21 @@ def salvar_figura(caminho):
     finally:
         plt.close()
 
-def gerar_scatter_tamanho_frequencia(df, caminho):
+def gerar_scatter_tamanho_frequencia(df, caminho, total=None):
     if df.empty or "tamanho" not in df.columns or "ipg" not in df.columns:
         return
 
+    # Densidade em hexágonos (escala log) em vez de um ponto por pacote: o tempo de
+    # desenho não depende do número de pontos e as regiões densas continuam legíveis
     plt.figure(figsize=(10, 6))
-    plt.scatter(df['ipg'], df['tamanho'], alpha=0.5, s=10, c='blue')
-    plt.xlabel("Inter-Packet Gap (segundos)")
+    plt.hexbin(df['ipg'], df['tamanho'], gridsize=60, bins='log', mincnt=1, cmap='viridis')
+    plt.colorbar(label="Pacotes (escala log)")
+    plt.xlabel("log(IPG + 1) (segundos)")
     plt.ylabel("Tamanho do Pacote (bytes)")
-    plt.title("Relação entre IPG e Tamanho de Pacote")
+    titulo = "Relação entre IPG e Tamanho de Pacote"
+    if total and total > len(df):
+        titulo += f" (amostra de {len(df):,} de {total:,} pacotes)".replace(",", ".")
+    plt.title(titulo)
     plt.grid(True)
     plt.tight_layout()
     salvar_figura(caminho)
@@ -162,6 +267,23 @@ def gerar_tempo(stats, titulo, caminho_imagem):
     plt.xticks(rotation=45)
     salvar_figura(caminho_imagem)
 
+def gerar_entropia_tempo(entropia, titulo, caminho):
+    # Série por janela: queda na entropia de origem com alta na de destino (ou o
+    # contrário) indica tráfego concentrado, como em DDoS ou varreduras
+    if not entropia or not entropia["tempos"]:
+        return
+
+    tempos = pd.to_datetime(entropia["tempos"])
+    plt.figure(figsize=(10, 6))
+    plt.plot(tempos, entropia["origem"], label="IPs de origem")
+    plt.plot(tempos, entropia["destino"], label="IPs de destino")
+    plt.title(f"{titulo} (janelas de {entropia['janela_segundos']:g} s)")
+    plt.xlabel('Tempo')
+    plt.ylabel('Entropia (bits)')
+    plt.legend()
+    plt.xticks(rotation=45)
+    salvar_figura(caminho)
+
 def gerar_heatmap_ips_ativos(matrix, ips, tempos, titulo, caminho):
     if matrix is None or not ips or not tempos:
         return
@@ -228,8 +350,10 @@ def gerar_variacao_traffico(stats, janela_tempo=5, caminho_imagem="img/tempo/var
 
 import graficos2
 if __name__ == "__main__":
-    stats = dataProcessing.analisar_estatisticas("data_300k.csv")    
-    gerar_graficos(stats)
-    graficos2.second_step()
+    # Reaproveita a análise anterior se o arquivo e os parâmetros não mudaram
+    stats = dataProcessing.analisar_com_cache("data_300k.csv")
+    # Os gráficos dos dois módulos vão para o mesmo pool (graficos2 lê o stats.json)
+    renderizar_graficos(tarefas_graficos(stats) +
+                        graficos2.tarefas_graficos2(graficos2.carregar_dados_json('stats.json')))
 
 
@@ -1,3 +1,5 @@
+import matplotlib
+matplotlib.use('Agg')  # só gera arquivos; permite desenhar em processos sem janela
 import matplotlib.pyplot as plt
 import json
 import os
@@ -20,88 +22,80 @@ def salvar_figura(caminho_imagem):
     plt.savefig(caminho_imagem)
     plt.close()
 
-# Função para gerar gráficos gerais
-def gerar_graficos2(dados):
-    garantir_pastas()
-
-    # 1. Top IPs de Origem
-    ips_origem = dados['top_ips_origem']
+# Gráfico de barras com os valores de um dicionário
+def gerar_barras(valores, titulo, xlabel, ylabel, cor, caminho_imagem):
     plt.figure(figsize=(10, 6))
-    plt.bar(ips_origem.keys(), ips_origem.values(), color='skyblue')
-    plt.title("Top 10 IPs de Origem")
-    plt.xlabel("IP de Origem")
-    plt.ylabel("Número de Pacotes")
+    plt.bar(valores.keys(), valores.values(), color=cor)
+    plt.title(titulo)
+    if xlabel:
+        plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
     plt.xticks(rotation=45)
-    salvar_figura('img/barras/top_ips_origem.png')
+    salvar_figura(caminho_imagem)
+
+# Top 10 IPs com maior número de destinos únicos (horizontal scan)
+def gerar_horizon_scan(top_hscan, caminho_imagem):
+    ips = [item[1] for item in top_hscan]
+    destinos = [item[0] for item in top_hscan]
+    plt.figure(figsize=(10, 6))
+    plt.barh(ips, destinos, color='mediumslateblue')
+    plt.xlabel("Nº de destinos únicos")
+    plt.title("Top 10 IPs com maior nº de destinos (possível scan horizontal)")
+    plt.gca().invert_yaxis()
+    salvar_figura(caminho_imagem)
+
+# Lista de gráficos a gerar: (caminho da imagem, função, argumentos), com só a parte
+# de `dados` que cada um usa (ver graficos.renderizar_graficos)
+def tarefas_graficos2(dados):
+    tarefas = []
+
+    def adicionar(caminho_imagem, funcao, *argumentos):
+        tarefas.append((caminho_imagem, funcao, argumentos + (caminho_imagem,)))
+
+    # 1. Top IPs de Origem
+    adicionar('img/barras/top_ips_origem.png', gerar_barras,
+        dados['top_ips_origem'], "Top 10 IPs de Origem", "IP de Origem", "Número de Pacotes", 'skyblue')
 
     # 2. IPG por IP
     ipg_por_ip = {ip: info['media_ipg'] for ip, info in dados['ipg_por_ip'].items()}
-    plt.figure(figsize=(10, 6))
-    plt.bar(ipg_por_ip.keys(), ipg_por_ip.values(), color='lightgreen')
-    plt.title("IPG Médio por IP")
-    plt.xlabel("IP")
-    plt.ylabel("IPG Médio")
-    plt.xticks(rotation=45)
-    salvar_figura('img/barras/ipg_por_ip.png')
+    adicionar('img/barras/ipg_por_ip.png', gerar_barras,
+        ipg_por_ip, "IPG Médio por IP", "IP", "IPG Médio", 'lightgreen')
 
     # 3. Entropia dos IPs de Origem
     # entropias = dados["entropia_ips_origem"]
     # if isinstance(entropias, dict):
-    #     plt.figure(figsize=(10, 6))
-    #     plt.bar(entropias.keys(), entropias.values(), color='orange')
-    #     plt.title("Entropia dos IPs de Origem")
-    #     plt.xlabel("IP de Origem")
-    #     plt.ylabel("Entropia")
-    #     plt.xticks(rotation=45)
-    #     salvar_figura('img/barras/entropia_ips_origem.png')
+    #     adicionar('img/barras/entropia_ips_origem.png', gerar_barras,
+    #         entropias, "Entropia dos IPs de Origem", "IP de Origem", "Entropia", 'orange')
     # else:
     #     print("Erro: entropias dos IPs de origem não está no formato esperado (dicionário).")
 
     # 4. Bursts por IP
     anomalias = {ip: info["bursts"] for ip, info in dados["anomalias_por_ip"].items()}
-    plt.figure(figsize=(10, 6))
-    plt.bar(anomalias.keys(), anomalias.values(), color='salmon')
-    plt.title("Bursts por IP")
-    plt.xlabel("IP")
-    plt.ylabel("Número de Bursts")
-    plt.xticks(rotation=45)
-    salvar_figura('img/barras/bursts_por_ip.png')
+    adicionar('img/barras/bursts_por_ip.png', gerar_barras,
+        anomalias, "Bursts por IP", "IP", "Número de Bursts", 'salmon')
 
     # 5. Top 10 IPs com maior número de destinos únicos (horizontal scan)
     if "top_10_horizon_scan" in dados:
-        top_hscan = dados["top_10_horizon_scan"]
-        ips = [item[1] for item in top_hscan]
-        destinos = [item[0] for item in top_hscan]
-        plt.figure(figsize=(10, 6))
-        plt.barh(ips, destinos, color='mediumslateblue')
-        plt.xlabel("Nº de destinos únicos")
-        plt.title("Top 10 IPs com maior nº de destinos (possível scan horizontal)")
-        plt.gca().invert_yaxis()
-        salvar_figura('img/barras/top_10_horizon_scan.png')
+        adicionar('img/barras/top_10_horizon_scan.png', gerar_horizon_scan, dados["top_10_horizon_scan"])
 
     # 6. Top 10 IPs com maior tamanho médio de pacotes
     if "top_10_tamanhos_medios_por_ip" in dados:
-        tamanhos_medios = dados["top_10_tamanhos_medios_por_ip"]
-        ips = list(tamanhos_medios.keys())
-        tamanhos = list(tamanhos_medios.values())
-        plt.figure(figsize=(10, 6))
-        plt.bar(ips, tamanhos, color='darkorange')
-        plt.xticks(rotation=45)
-        plt.ylabel('Tamanho médio dos pacotes (bytes)')
-        plt.title('Top 10 IPs com maior tamanho médio de pacotes')
-        salvar_figura('img/barras/top_10_tamanhos_medios_por_ip.png')
+        adicionar('img/barras/top_10_tamanhos_medios_por_ip.png', gerar_barras,
+            dados["top_10_tamanhos_medios_por_ip"], 'Top 10 IPs com maior tamanho médio de pacotes', None,
+            'Tamanho médio dos pacotes (bytes)', 'darkorange')
 
     # 7. Top 10 IPs com maior volume de bytes trocados
     if "volume_bytes_por_ip" in dados:
-        volume = dados["volume_bytes_por_ip"]
-        ips = list(volume.keys())
-        bytes_trocados = list(volume.values())
-        plt.figure(figsize=(10, 6))
-        plt.bar(ips, bytes_trocados, color='teal')
-        plt.xticks(rotation=45)
-        plt.ylabel('Volume de Bytes Trocados')
-        plt.title('Top 10 IPs por Volume de Bytes')
-        salvar_figura('img/barras/volume_bytes_por_ip.png')
+        adicionar('img/barras/volume_bytes_por_ip.png', gerar_barras,
+            dados["volume_bytes_por_ip"], 'Top 10 IPs por Volume de Bytes', None, 'Volume de Bytes Trocados', 'teal')
+
+    return tarefas
+
+# Função para gerar gráficos gerais
+def gerar_graficos2(dados):
+    garantir_pastas()
+    for _, funcao, argumentos in tarefas_graficos2(dados):
+        funcao(*argumentos)
 
 
 
@@ -0,0 +1,371 @@
+import heapq
+
+import numpy as np
+
+
+class ContadorFrequentes:
+    # Top-k aproximado com memória fixa: resumo de Misra-Gries na forma mesclável de
+    # Agarwal et al. (2012), equivalente ao Space-Saving (Metwally et al., 2005).
+    # Guarda no máximo `capacidade` chaves. A contagem de cada chave nunca passa da
+    # real e fica abaixo dela em no máximo erro_maximo() <= total / (capacidade + 1),
+    # onde total é a soma de todos os pesos vistos. Toda chave com contagem real acima
+    # de erro_maximo() está garantidamente entre as guardadas.
+    #
+    # A interface imita a parte de Counter usada na análise (update, most_common,
+    # items, values, [chave]), então pode substituir os Counters de IP diretamente.
+    #
+    # Opcionalmente, cada chave leva uma soma de outro valor (ex.: bytes, com pacotes
+    # como peso), guardada junto com o peso real desde que a chave entrou no resumo e
+    # descartada junto com ela. media(chave) é então uma média de verdade, sobre os
+    # pesos vistos enquanto a chave esteve guardada; a razão entre dois resumos
+    # separados não é, porque cada um desconta e descarta chaves por conta própria.
+    def __init__(self, capacidade=10_000):
+        self.capacidade = capacidade
+        self.contagens = {}
+        self.total = 0
+        self.decremento = 0
+        self.pesos_reais = {}
+        self.somas = {}
+
+    def update(self, pesos, somas=None):
+        # Acrescenta contagens (dict/Counter chave -> peso) ou outro ContadorFrequentes,
+        # e as somas (dict chave -> valor) que acompanham cada peso, se houver.
+        # As contagens são somadas; se passar da capacidade, o valor da (capacidade+1)-ésima
+        # maior contagem é subtraído de todas e só as positivas ficam.
+        if isinstance(pesos, ContadorFrequentes):
+            self.total += pesos.total
+            self.decremento += pesos.decremento
+            for chave, soma in pesos.somas.items():
+                self.somas[chave] = self.somas.get(chave, 0) + soma
+                self.pesos_reais[chave] = self.pesos_reais.get(chave, 0) + pesos.pesos_reais[chave]
+            pesos = pesos.contagens
+        else:
+            self.total += sum(pesos.values())
+            if somas is not None:
+                for chave, soma in somas.items():
+                    self.somas[chave] = self.somas.get(chave, 0) + soma
+                    self.pesos_reais[chave] = self.pesos_reais.get(chave, 0) + pesos[chave]
+
+        contagens = self.contagens
+        for chave, peso in pesos.items():
+            contagens[chave] = contagens.get(chave, 0) + peso
+
+        if len(contagens) > self.capacidade:
+            corte = heapq.nlargest(self.capacidade + 1, contagens.values())[-1]
+            self.contagens = {chave: contagem - corte for chave, contagem in contagens.items() if contagem > corte}
+            self.decremento += corte
+            if self.somas:
+                self.somas = {chave: soma for chave, soma in self.somas.items() if chave in self.contagens}
+                self.pesos_reais = {chave: self.pesos_reais[chave] for chave in self.somas}
+
+    def media(self, chave):
+        # Soma acompanhada / peso real da chave (ver update), ou None se ela não está guardada
+        peso = self.pesos_reais.get(chave)
+        return self.somas[chave] / peso if peso else None
+
+    def erro_maximo(self):
+        # Quanto uma contagem pode estar abaixo da real (soma dos cortes já feitos)
+        return self.decremento
+
+    def most_common(self, n=None):
+        if n is None:
+            return sorted(self.contagens.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self.contagens.items(), key=lambda item: item[1])
+
+    def items(self):
+        return self.contagens.items()
+
+    def keys(self):
+        return self.contagens.keys()
+
+    def values(self):
+        return self.contagens.values()
+
+    def __getitem__(self, chave):
+        return self.contagens.get(chave, 0)
+
+    def __contains__(self, chave):
+        return chave in self.contagens
+
+    def __iter__(self):
+        return iter(self.contagens)
+
+    def __len__(self):
+        return len(self.contagens)
+
+
+def hll_indices_e_ranks(hashes, precisao):
+    # Para cada hash de 64 bits: o registrador (primeiros `precisao` bits) e o rank,
+    # a posição do primeiro bit 1 nos bits restantes (zeros à esquerda + 1)
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    indices = (hashes >> np.uint64(64 - precisao)).astype(np.int64)
+    resto = hashes << np.uint64(precisao)
+
+    # Número de bits significativos do resto, calculado em duas metades de 32 bits
+    # (exatas em float64) para evitar erro de arredondamento no log2
+    alto = (resto >> np.uint64(32)).astype(np.float64)
+    baixo = (resto & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        bits = np.where(alto > 0, 33 + np.floor(np.log2(alto)),
+                        np.where(baixo > 0, 1 + np.floor(np.log2(baixo)), 0))
+    ranks = np.minimum(65 - bits, 64 - precisao + 1).astype(np.uint8)
+    return indices, ranks
+
+
+def hll_estimar(registradores):
+    # Estimador do HyperLogLog (Flajolet et al., 2007) com a correção de
+    # contagem linear para cardinalidades pequenas
+    m = len(registradores)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(np.ldexp(1.0, -registradores.astype(np.int64)))
+    zeros = np.count_nonzero(registradores == 0)
+    if estimativa <= 2.5 * m and zeros:
+        estimativa = m * np.log(m / zeros)
+    return estimativa
+
+
+class DestinosDistintos:
+    # Número de destinos distintos por IP de origem, em memória limitada por origem.
+    # Até `limite_exato` destinos, cada origem guarda os hashes (uint64) dos destinos
+    # e a contagem é exata; acima disso, passa a usar um HyperLogLog de 2**precisao
+    # registradores de 1 byte (erro padrão ~1.04 / sqrt(2**precisao), 1.6% com
+    # precisao=12). Com os padrões, uma origem nunca ocupa mais que ~4 KB, mesmo que
+    # tenha contatado milhões de destinos.
+    def __init__(self, precisao=12, limite_exato=512):
+        self.precisao = precisao
+        self.limite_exato = limite_exato
+        self.exatos = {}
+        self.registradores = {}
+
+    def atualizar(self, codigos, origens, hashes_destino):
+        # codigos/origens vêm de pd.factorize dos IPs de origem de cada pacote;
+        # hashes_destino é o hash uint64 do destino de cada pacote
+        if len(codigos) == 0:
+            return
+        hashes_destino = np.asarray(hashes_destino, dtype=np.uint64)
+
+        # Pares (origem, destino) distintos do chunk, agrupados por origem
+        ordem = np.lexsort((hashes_destino, codigos))
+        codigos = codigos[ordem]
+        hashes_destino = hashes_destino[ordem]
+        novos = np.r_[True, (codigos[1:] != codigos[:-1]) | (hashes_destino[1:] != hashes_destino[:-1])]
+        codigos = codigos[novos]
+        hashes_destino = hashes_destino[novos]
+
+        inicio_grupo = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+        fim_grupo = np.r_[inicio_grupo[1:], len(codigos)]
+        for origem, inicio, fim in zip(origens[codigos[inicio_grupo]], inicio_grupo, fim_grupo):
+            self.adicionar(origem, hashes_destino[inicio:fim])
+
+    def adicionar(self, origem, hashes):
+        # hashes: vetor ordenado e sem repetição
+        registradores = self.registradores.get(origem)
+        if registradores is not None:
+            indices, ranks = hll_indices_e_ranks(hashes, self.precisao)
+            np.maximum.at(registradores, indices, ranks)
+            return
+
+        atuais = self.exatos.get(origem)
+        hashes = hashes if atuais is None else np.union1d(atuais, hashes)
+        if len(hashes) <= self.limite_exato:
+            self.exatos[origem] = hashes
+            return
+
+        # Passou do limite: converte para HyperLogLog
+        self.exatos.pop(origem, None)
+        registradores = np.zeros(1 << self.precisao, dtype=np.uint8)
+        indices, ranks = hll_indices_e_ranks(hashes, self.precisao)
+        np.maximum.at(registradores, indices, ranks)
+        self.registradores[origem] = registradores
+
+    def mesclar(self, outro):
+        for origem, hashes in outro.exatos.items():
+            self.adicionar(origem, hashes)
+        for origem, registradores in outro.registradores.items():
+            if origem in self.registradores:
+                np.maximum(self.registradores[origem], registradores, out=self.registradores[origem])
+                continue
+            atuais = self.exatos.pop(origem, None)
+            self.registradores[origem] = registradores.copy()
+            if atuais is not None:
+                self.adicionar(origem, atuais)
+
+    def manter(self, origens):
+        # Descarta as origens que não estão em `origens` (qualquer coleção com `in`)
+        self.exatos = {origem: hashes for origem, hashes in self.exatos.items() if origem in origens}
+        self.registradores = {origem: regs for origem, regs in self.registradores.items() if origem in origens}
+
+    def __len__(self):
+        return len(self.exatos) + len(self.registradores)
+
+    def cardinalidade(self, origem):
+        if origem in self.registradores:
+            return int(round(hll_estimar(self.registradores[origem])))
+        return len(self.exatos.get(origem, ()))
+
+    def maiores(self, n):
+        # Lista de (destinos distintos, origem) das n origens com mais destinos
+        candidatos = ((self.cardinalidade(origem), origem) for origem in self.registradores)
+        exatos = ((len(hashes), origem) for origem, hashes in self.exatos.items())
+        return heapq.nlargest(n, list(candidatos) + list(exatos))
+
+
+class HistogramaInteiros:
+    # Histograma de valores inteiros não negativos (ex.: tamanho de pacote, 0–65535)
+    # em um vetor de contagens. A memória é fixa (512 KB para 65536 posições), as
+    # estatísticas saem exatas e dois histogramas se mesclam somando os vetores.
+    # Valores acima do tamanho inicial (pcap com jumbo frames/TSO) aumentam o vetor.
+    def __init__(self, tamanho=65536):
+        self.contagens = np.zeros(tamanho, dtype=np.int64)
+
+    def atualizar(self, valores):
+        valores = np.asarray(valores, dtype=np.int64)
+        if len(valores) == 0:
+            return
+        contagens = np.bincount(valores, minlength=len(self.contagens))
+        if len(contagens) > len(self.contagens):
+            contagens[:len(self.contagens)] += self.contagens
+            self.contagens = contagens
+        else:
+            self.contagens += contagens
+
+    def mesclar(self, outro):
+        if len(outro.contagens) > len(self.contagens):
+            self.contagens, outro_contagens = outro.contagens.copy(), self.contagens
+        else:
+            outro_contagens = outro.contagens
+        self.contagens[:len(outro_contagens)] += outro_contagens
+
+    def total(self):
+        return int(self.contagens.sum())
+
+    def media(self):
+        valores = np.arange(len(self.contagens))
+        return float(np.dot(valores, self.contagens) / self.total())
+
+    def desvio_padrao(self):
+        # Desvio padrão amostral (ddof=1), o mesmo do pd.Series.std
+        total = self.total()
+        if total < 2:
+            return float("nan")
+        valores = np.arange(len(self.contagens), dtype=np.float64)
+        media = self.media()
+        return float(np.sqrt(np.dot((valores - media) ** 2, self.contagens) / (total - 1)))
+
+    def minimo(self):
+        return int(np.flatnonzero(self.contagens)[0])
+
+    def maximo(self):
+        return int(np.flatnonzero(self.contagens)[-1])
+
+    def quantil(self, q):
+        # Mesmo resultado de np.percentile (interpolação linear entre posições)
+        acumulado = np.cumsum(self.contagens)
+        posicao = q * (acumulado[-1] - 1)
+        abaixo, acima = np.searchsorted(acumulado, [np.floor(posicao), np.ceil(posicao)], side="right")
+        return float(abaixo + (posicao - np.floor(posicao)) * (acima - abaixo))
+
+
+class SketchQuantis:
+    # DDSketch (Masson et al., 2019): quantis com erro relativo garantido em memória
+    # limitada. Cada valor positivo cai no balde ceil(log_gamma(valor)), com
+    # gamma = (1 + erro) / (1 - erro); o valor devolvido para um quantil está a no
+    # máximo `erro_relativo` do valor real. Os baldes crescem com o log da faixa de
+    # valores, não com a quantidade (IPGs de 10 µs a 1 dia cabem em ~850 baldes
+    # com 1% de erro). Dois sketches se mesclam somando os baldes.
+    def __init__(self, erro_relativo=0.01):
+        self.erro_relativo = erro_relativo
+        self.log_gamma = np.log((1 + erro_relativo) / (1 - erro_relativo))
+        self.baldes = {}
+        self.contagem = 0
+        self.soma = 0.0
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+
+    def atualizar(self, valores):
+        # valores: vetor de números positivos
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(valores) == 0:
+            return
+        indices, contagens = np.unique(np.ceil(np.log(valores) / self.log_gamma).astype(np.int64), return_counts=True)
+        baldes = self.baldes
+        for indice, contagem in zip(indices.tolist(), contagens.tolist()):
+            baldes[indice] = baldes.get(indice, 0) + contagem
+        self.contagem += len(valores)
+        self.soma += float(valores.sum())
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def mesclar(self, outro):
+        for indice, contagem in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + contagem
+        self.contagem += outro.contagem
+        self.soma += outro.soma
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+
+    def media(self):
+        return self.soma / self.contagem if self.contagem else None
+
+    def quantil(self, q):
+        if not self.contagem:
+            return None
+        posicao = q * (self.contagem - 1)
+        acumulado = 0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if acumulado > posicao:
+                # Ponto do balde (gamma^(i-1), gamma^i] com erro relativo máximo
+                valor = 2 * np.exp(indice * self.log_gamma) / (1 + np.exp(self.log_gamma))
+                return float(min(max(valor, self.minimo), self.maximo))
+        return self.maximo
+
+
+class AmostraReservatorio:
+    # Amostra uniforme de tamanho fixo de um fluxo de linhas (ex.: pontos de um scatter).
+    # Cada linha recebe uma chave aleatória e ficam as `capacidade` de menor chave
+    # (amostragem bottom-k, equivalente ao reservatório). Isso é feito em blocos
+    # vetorizados e duas amostras se mesclam mantendo as menores chaves da união,
+    # então fatias processadas em paralelo resultam em uma amostra uniforme do todo.
+    # Com a mesma semente (e as mesmas linhas na mesma ordem), a amostra é sempre a mesma.
+    # As chaves também podem vir de fora (ex.: um hash de cada linha); aí a amostra só
+    # depende das linhas, não da ordem nem de como o fluxo foi dividido.
+    def __init__(self, capacidade=100_000, colunas=2, semente=None):
+        self.capacidade = capacidade
+        self.chaves = np.empty(0)
+        self.linhas = np.empty((0, colunas))
+        self.vistos = 0
+        self.gerador = np.random.default_rng(semente)
+
+    def adicionar(self, *colunas, chaves=None):
+        # colunas: vetores de mesmo tamanho, um por coluna da amostra; chaves, se dadas,
+        # são as chaves de sorteio das linhas (uniformes em [0, 1))
+        linhas = np.column_stack(colunas).astype(np.float64)
+        if len(linhas) == 0:
+            return
+        self.vistos += len(linhas)
+        if chaves is None:
+            chaves = self.gerador.random(len(linhas))
+        self._juntar(np.asarray(chaves, dtype=np.float64), linhas)
+
+    def mesclar(self, outra):
+        self.vistos += outra.vistos
+        self._juntar(outra.chaves, outra.linhas)
+
+    def _juntar(self, chaves, linhas):
+        self.chaves = np.concatenate([self.chaves, chaves])
+        self.linhas = np.concatenate([self.linhas, linhas])
+        # Corta só quando passa do dobro da capacidade, para não ordenar a cada bloco
+        if len(self.chaves) > 2 * self.capacidade:
+            self._cortar()
+
+    def _cortar(self):
+        if len(self.chaves) > self.capacidade:
+            menores = np.argpartition(self.chaves, self.capacidade)[:self.capacidade]
+            self.chaves = self.chaves[menores]
+            self.linhas = self.linhas[menores]
+
+    def amostra(self):
+        # Em ordem de chave, para a amostra não depender da ordem das mesclas
+        self._cortar()
+        return self.linhas[np.argsort(self.chaves, kind="stable")]
@@ -0,0 +1,209 @@
+import os
+import sys
+import time
+import json
+import argparse
+from collections import Counter, deque
+from math import log2
+import heapq
+
+import numpy as np
+
+import dataProcessing
+
+
+def clogc(contagem):
+    # Parcela c·log2(c) usada na entropia incremental
+    return contagem * log2(contagem) if contagem > 0 else 0.0
+
+
+def normalizar_timestamp(timestamp):
+    # Mesma regra de dataProcessing.ajustar_timestamp (milissegundos e valores inválidos),
+    # mas mantendo a fração de segundo, que importa para bursts
+    if timestamp > 1e10:
+        timestamp = timestamp / 1000
+    return timestamp if timestamp > 1e9 else None
+
+
+class JanelaDeslizante:
+    # Métricas dos últimos `janela` segundos de tráfego (pelo timestamp dos pacotes).
+    # Cada pacote entra uma vez e sai uma vez da janela, e todas as contagens são
+    # ajustadas na entrada e na saída, então o custo por pacote é O(1) amortizado.
+    def __init__(self, janela=60, limite_burst=0.01, limite_silencio=1):
+        self.janela = janela
+        self.limite_burst = limite_burst
+        self.limite_silencio = limite_silencio
+
+        # Pacotes dentro da janela: (timestamp, src_ip, minuto, length, burst, silencio)
+        self.eventos = deque()
+        self.pacotes_por_ip = Counter()
+        self.volume_por_ip = Counter()
+        self.pacotes_por_minuto = Counter()
+        self.bursts_por_ip = Counter()
+        self.silencios_por_ip = Counter()
+        self.ultimo_timestamp_ip = {}
+        self.total = 0
+        self.agora = None
+
+        # Soma de c·log2(c) das contagens por IP: H = log2(N) - soma / N
+        self.soma_clogc = 0.0
+
+    def adicionar(self, timestamp, src_ip, length):
+        anterior = self.ultimo_timestamp_ip.get(src_ip)
+        ipg = timestamp - anterior if anterior is not None else None
+        burst = ipg is not None and 0.00001 < ipg < self.limite_burst
+        silencio = ipg is not None and ipg > self.limite_silencio
+        self.ultimo_timestamp_ip[src_ip] = timestamp
+
+        minuto = int(timestamp // 60) * 60
+        self.eventos.append((timestamp, src_ip, minuto, length, burst, silencio))
+        self._contar(src_ip, minuto, length, burst, silencio, 1)
+
+        if self.agora is None or timestamp > self.agora:
+            self.agora = timestamp
+        self.expirar()
+
+    def expirar(self):
+        limite = self.agora - self.janela
+        while self.eventos and self.eventos[0][0] < limite:
+            _, src_ip, minuto, length, burst, silencio = self.eventos.popleft()
+            self._contar(src_ip, minuto, length, burst, silencio, -1)
+            if src_ip not in self.pacotes_por_ip:
+                del self.ultimo_timestamp_ip[src_ip]
+
+    def _contar(self, src_ip, minuto, length, burst, silencio, delta):
+        contagem = self.pacotes_por_ip[src_ip]
+        self.soma_clogc += clogc(contagem + delta) - clogc(contagem)
+        self.total += delta
+
+        # Contadores que chegam a zero são removidos, mantendo a memória proporcional à janela
+        for contador, chave, valor in (
+            (self.pacotes_por_ip, src_ip, delta),
+            (self.volume_por_ip, src_ip, delta * length),
+            (self.pacotes_por_minuto, minuto, delta),
+            (self.bursts_por_ip, src_ip, delta if burst else 0),
+            (self.silencios_por_ip, src_ip, delta if silencio else 0),
+        ):
+            if valor:
+                contador[chave] += valor
+                if contador[chave] == 0:
+                    del contador[chave]
+
+    def entropia(self):
+        if self.total <= 0:
+            return 0.0
+        return max(log2(self.total) - self.soma_clogc / self.total, 0.0)
+
+    def resumo(self, top_n=10):
+        def maiores(contador):
+            return dict(heapq.nlargest(top_n, contador.items(), key=lambda item: item[1]))
+
+        return {
+            "janela_segundos": self.janela,
+            "fim_janela": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.agora)) if self.agora else None,
+            "pacotes_na_janela": self.total,
+            "top_ips_origem": maiores(self.pacotes_por_ip),
+            "volume_bytes_por_ip": maiores(self.volume_por_ip),
+            "pacotes_por_minuto": {
+                time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(minuto)): contagem
+                for minuto, contagem in sorted(self.pacotes_por_minuto.items())
+            },
+            "bursts_por_ip": maiores(self.bursts_por_ip),
+            "silencios_por_ip": maiores(self.silencios_por_ip),
+            "entropia_ips_origem": round(self.entropia(), 4),
+        }
+
+
+def seguir_registros(caminho, intervalo=1.0, do_inicio=False):
+    # Acompanha o arquivo gerado pelo extrator enquanto ele cresce (como tail -f).
+    # Gera listas de (timestamp, src_ip, length); gera uma lista vazia quando não há
+    # dados novos, para quem consome poder publicar o resumo periodicamente.
+    # Linhas (ou registros) incompletas ficam guardadas até o resto ser escrito.
+    binario = caminho.endswith(".bin")
+    tamanho_registro = dataProcessing.DTYPE_REGISTRO.itemsize
+
+    while not os.path.exists(caminho):
+        yield []
+        time.sleep(intervalo)
+
+    with open(caminho, "rb") as f:
+        if do_inicio:
+            if not binario:
+                f.readline()
+        else:
+            f.seek(0, os.SEEK_END)
+        resto = b""
+
+        while True:
+            # Arquivo recriado (extrator rodando sem -a): recomeça do início
+            if os.path.getsize(caminho) < f.tell():
+                f.seek(0)
+                resto = b""
+                if not binario:
+                    f.readline()
+
+            dados = f.read(1 << 20)
+            if not dados:
+                yield []
+                time.sleep(intervalo)
+                continue
+
+            dados = resto + dados
+            if binario:
+                completos = len(dados) - len(dados) % tamanho_registro
+                resto = dados[completos:]
+                registros = np.frombuffer(dados[:completos], dtype=dataProcessing.DTYPE_REGISTRO)
+                yield list(zip(
+                    registros["timestamp"].tolist(),
+                    dataProcessing.ips_para_str(registros["src_ip"]).tolist(),
+                    registros["length"].tolist(),
+                ))
+                continue
+
+            linhas = dados.split(b"\n")
+            resto = linhas.pop()
+            lote = []
+            for linha in linhas:
+                campos = linha.split(b",")
+                if len(campos) != 5:
+                    continue
+                try:
+                    lote.append((float(campos[0]), campos[1].decode(), int(campos[4])))
+                except ValueError:
+                    continue
+            yield lote
+
+
+def monitorar(caminho="data.csv", janela=60, intervalo=5, top_n=10, saida="stats_stream.json", do_inicio=False):
+    estado = JanelaDeslizante(janela)
+    ultima_publicacao = time.monotonic()
+
+    for lote in seguir_registros(caminho, intervalo=min(intervalo, 1), do_inicio=do_inicio):
+        for timestamp, src_ip, length in lote:
+            timestamp = normalizar_timestamp(timestamp)
+            if timestamp is not None:
+                estado.adicionar(timestamp, src_ip, length)
+
+        if time.monotonic() - ultima_publicacao >= intervalo:
+            ultima_publicacao = time.monotonic()
+            resumo = estado.resumo(top_n)
+            with open(saida, "w", encoding="utf-8") as f:
+                json.dump(resumo, f, indent=4, ensure_ascii=False)
+            print(f"[{resumo['fim_janela']}] {resumo['pacotes_na_janela']} pacotes na janela, "
+                  f"entropia {resumo['entropia_ips_origem']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estatísticas em janela deslizante sobre a saída do extrator")
+    parser.add_argument("arquivo", nargs="?", default="data.csv", help="data.csv ou data.bin gerado pelo extrator")
+    parser.add_argument("--janela", type=float, default=60, help="tamanho da janela em segundos")
+    parser.add_argument("--intervalo", type=float, default=5, help="intervalo entre publicações em segundos")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--saida", default="stats_stream.json")
+    parser.add_argument("--do-inicio", action="store_true", help="processa também o que já está no arquivo")
+    args = parser.parse_args()
+
+    try:
+        monitorar(args.arquivo, args.janela, args.intervalo, args.top, args.saida, args.do_inicio)
+    except KeyboardInterrupt:
+        sys.exit(0)
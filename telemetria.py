@@ -0,0 +1,140 @@
+import os
+import time
+import resource
+import tracemalloc
+from contextlib import nullcontext, contextmanager
+
+import numpy as np
+
+# Medição opcional do pipeline de análise: tempo e memória por etapa, vazão por
+# bloco lido e tamanho das estruturas grandes (ver
+# dataProcessing.analisar_estatisticas(perf=True)). Tudo é medido por bloco de
+# ~4 MB, nunca por pacote, e desligado usa SEM_TELEMETRIA, cujas medições não
+# fazem nada.
+#
+# A memória de cada etapa é o maior aumento do RSS atual numa chamada dela (o
+# ru_maxrss é o pico da vida do processo e não diz qual etapa o causou). Se o
+# tracemalloc estiver ligado (perf_dump), também o pico alocado dentro de cada
+# chamada, acima do que já estava alocado ao entrar. As etapas não se aninham.
+
+TAMANHO_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def rss_atual_mb():
+    # RSS neste momento (Linux); None onde não há /proc
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * TAMANHO_PAGINA / (1 << 20)
+    except OSError:
+        return None
+
+
+class Telemetria:
+    ativa = True
+
+    def __init__(self):
+        self.segundos = {}
+        self.chamadas = {}
+        self.aumento_rss_mb = {}  # maior aumento do RSS numa chamada de cada etapa
+        self.pico_alocado_mb = {}  # maior pico do tracemalloc numa chamada (se ligado)
+        self.blocos = []  # (bytes, pacotes, segundos) de cada bloco processado
+
+    def _iniciar(self):
+        alocado = None
+        if tracemalloc.is_tracing():
+            alocado = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        return time.perf_counter(), rss_atual_mb(), alocado
+
+    def _registrar(self, nome, inicio):
+        segundos = time.perf_counter() - inicio[0]
+        self.segundos[nome] = self.segundos.get(nome, 0.0) + segundos
+        self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+        rss = rss_atual_mb()
+        if rss is not None and inicio[1] is not None:
+            self.aumento_rss_mb[nome] = max(self.aumento_rss_mb.get(nome, float("-inf")), rss - inicio[1])
+        if inicio[2] is not None and tracemalloc.is_tracing():
+            pico = (tracemalloc.get_traced_memory()[1] - inicio[2]) / (1 << 20)
+            self.pico_alocado_mb[nome] = max(self.pico_alocado_mb.get(nome, 0.0), pico)
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = self._iniciar()
+        try:
+            yield
+        finally:
+            self._registrar(nome, inicio)
+
+    def medir(self, iteravel, nome):
+        # Mede o tempo gasto para produzir cada item (ex.: a leitura de cada bloco do CSV)
+        iterador = iter(iteravel)
+        while True:
+            inicio = self._iniciar()
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            self._registrar(nome, inicio)
+            yield item
+
+    def registrar_bloco(self, n_bytes, pacotes, segundos):
+        self.blocos.append((n_bytes, pacotes, segundos))
+
+    def mesclar(self, outra):
+        # Soma as medições de um processo do pool (os tempos viram tempo de CPU somado)
+        for nome, segundos in outra.segundos.items():
+            self.segundos[nome] = self.segundos.get(nome, 0.0) + segundos
+            self.chamadas[nome] = self.chamadas.get(nome, 0) + outra.chamadas[nome]
+        for medida in ("aumento_rss_mb", "pico_alocado_mb"):
+            minhas = getattr(self, medida)
+            for nome, valor in getattr(outra, medida).items():
+                minhas[nome] = max(minhas.get(nome, valor), valor)
+        self.blocos.extend(outra.blocos)
+
+    def resumo(self):
+        etapas = {}
+        for nome, segundos in sorted(self.segundos.items(), key=lambda item: item[1], reverse=True):
+            etapas[nome] = {"segundos": round(segundos, 4), "chamadas": self.chamadas[nome]}
+            if nome in self.aumento_rss_mb:
+                etapas[nome]["aumento_rss_mb"] = round(self.aumento_rss_mb[nome], 1)
+            if nome in self.pico_alocado_mb:
+                etapas[nome]["pico_alocado_mb"] = round(self.pico_alocado_mb[nome], 1)
+
+        vazao = {}
+        if self.blocos:
+            blocos = np.array(self.blocos, dtype=np.float64)
+            segundos = np.maximum(blocos[:, 2], 1e-9)
+            for nome, valores in (("pacotes_por_segundo", blocos[:, 1] / segundos),
+                                  ("mb_por_segundo", blocos[:, 0] / segundos / (1 << 20))):
+                vazao[nome] = {
+                    "minimo": round(float(valores.min()), 1),
+                    "mediana": round(float(np.median(valores)), 1),
+                    "maximo": round(float(valores.max()), 1),
+                }
+            vazao["blocos"] = len(self.blocos)
+            vazao["pacotes"] = int(blocos[:, 1].sum())
+
+        return {"etapas": etapas, "vazao_por_bloco": vazao, "pico_rss_mb": round(pico_rss_mb(), 1)}
+
+
+class TelemetriaDesligada:
+    ativa = False
+
+    def etapa(self, nome):
+        return nullcontext()
+
+    def medir(self, iteravel, nome):
+        return iteravel
+
+    def registrar_bloco(self, n_bytes, pacotes, segundos):
+        pass
+
+    def mesclar(self, outra):
+        pass
+
+
+SEM_TELEMETRIA = TelemetriaDesligada()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+GUI = pytest.importorskip("GUI")
+
+
+@pytest.mark.parametrize("tamanho, n_pontos", [(10_000, 500), (1_001, 1_000), (37, 5)])
+def test_lttb_mantem_extremos_e_numero_de_pontos(tamanho, n_pontos):
+    rng = np.random.default_rng(tamanho)
+    x = np.cumsum(rng.uniform(0.1, 2, tamanho))
+    y = rng.normal(size=tamanho)
+    y[tamanho // 3] = 50
+
+    xs, ys = GUI.lttb(x, y, n_pontos)
+    assert len(xs) == len(ys) == n_pontos
+    assert (xs[0], ys[0]) == (x[0], y[0]) and (xs[-1], ys[-1]) == (x[-1], y[-1])
+    # Pontos da série original, em ordem, sem repetir; o pico não some
+    assert np.all(np.diff(xs) > 0)
+    indices = np.searchsorted(x, xs)
+    assert np.array_equal(x[indices], xs) and np.array_equal(y[indices], ys)
+    assert ys.max() == 50
+
+def test_lttb_serie_curta_fica_igual():
+    x, y = np.arange(10.0), np.arange(10.0)
+    xs, ys = GUI.lttb(x, y, 20)
+    assert np.array_equal(xs, x) and np.array_equal(ys, y)
@@ -0,0 +1,156 @@
+import functools
+import multiprocessing
+import numpy as np
+import pytest
+
+import dataProcessing
+import gerador
+
+
+@pytest.fixture(autouse=True)
+def pasta_temporaria(tmp_path, monkeypatch):
+    # analisar_estatisticas grava o stats.json na pasta atual
+    monkeypatch.chdir(tmp_path)
+
+def escrever_csv(caminho, linhas):
+    with open(caminho, "w") as arquivo:
+        arquivo.write("timestamp,src_ip,dst_ip,protocol,length\n")
+        for linha in linhas:
+            arquivo.write(",".join(map(str, linha)) + "\n")
+
+def test_length_vazio_conta_o_pacote_sem_bytes(tmp_path):
+    caminho = tmp_path / "data.csv"
+    escrever_csv(caminho, [
+        (1735707600.0, "10.0.0.1", "10.0.0.9", "TCP", 100),
+        (1735707601.0, "10.0.0.1", "10.0.0.9", "UDP", 300),
+        (1735707602.0, "10.0.0.1", "10.0.0.9", "TCP", ""),
+        (1735707602.5, "10.0.0.2", "10.0.0.9", "TCP", ""),
+    ])
+    stats = dataProcessing.analisar_estatisticas(str(caminho))
+
+    assert stats["volume_por_ip"] == {"10.0.0.1": 400, "10.0.0.2": 0}
+    assert sum(stats["trafego_por_minuto"].values()) == 400
+    assert stats["series_tempo"]["segundo"]["bytes"].tolist() == [100, 300, 0]
+    assert stats["top_ips_origem"] == {"10.0.0.1": 3, "10.0.0.2": 1}
+    # O histograma só tem os tamanhos conhecidos
+    assert stats["estatisticas_tamanho"]["minimo"] == 100
+    assert stats["estatisticas_tamanho"]["media"] == 200
+    # E o scatter só os pacotes com tamanho e IPG (o primeiro de cada IP não tem IPG)
+    assert [tamanho for tamanho, _ in stats["relacao_tamanho_frequencia"]] == [300]
+    assert stats["relacao_tamanho_frequencia_total"] == 1
+
+def comparar(a, b, caminho="stats"):
+    # Igualdade recursiva, com tolerância só para floats (somas em outra ordem)
+    if isinstance(a, dict):
+        assert isinstance(b, dict) and set(map(str, a)) == set(map(str, b)), caminho
+        b = {str(chave): valor for chave, valor in b.items()}
+        for chave, valor in a.items():
+            comparar(valor, b[str(chave)], f"{caminho}[{chave!r}]")
+    elif isinstance(a, (list, tuple, set, np.ndarray)):
+        a, b = (sorted(a), sorted(b)) if isinstance(a, set) else (list(a), list(b))
+        assert len(a) == len(b), caminho
+        for i, (x, y) in enumerate(zip(a, b)):
+            comparar(x, y, f"{caminho}[{i}]")
+    elif isinstance(a, (float, np.floating)):
+        assert b == pytest.approx(a, rel=1e-9, abs=1e-12), caminho
+    else:
+        assert a == b, caminho
+
+@pytest.fixture(scope="module")
+def captura(tmp_path_factory):
+    # ~200 s de tráfego sintético: várias janelas de entropia e minutos em cada fatia
+    caminho = tmp_path_factory.mktemp("captura") / "data.csv"
+    gerador.gerar_captura(20_000, caminho_csv=str(caminho), pacotes_por_segundo=100)
+    return str(caminho)
+
+def test_processos_igual_ao_serial(captura):
+    serial = dataProcessing.analisar_estatisticas(captura, tamanho_amostra_scatter=500)
+    paralelo = dataProcessing.analisar_estatisticas(captura, tamanho_amostra_scatter=500, processos=3)
+    comparar(serial, paralelo)
+    assert len(serial["relacao_tamanho_frequencia"]) == 500
+
+def test_processos_com_spawn_igual_ao_serial(captura):
+    # Como a interface roda a análise (processos criados com spawn, sem herdar o estado do pai)
+    serial = dataProcessing.analisar_estatisticas(captura, tamanho_amostra_scatter=500)
+    paralelo = dataProcessing.analisar_estatisticas(captura, tamanho_amostra_scatter=500, processos=2,
+                                                    contexto_processos=multiprocessing.get_context("spawn"))
+    comparar(serial, paralelo)
+
+def acumular_em_blocos(acumulador, caminho, tamanho_bloco=1 << 16):
+    for inicio, fim, chunk in dataProcessing.ler_blocos(caminho, tamanho_bloco=tamanho_bloco):
+        acumulador.processar_bloco(inicio, fim, chunk)
+    return acumulador
+
+def test_modo_sketch_respeita_o_erro_e_limita_o_estado_por_ip(captura):
+    capacidade = 50
+    exato = acumular_em_blocos(dataProcessing.AcumuladorEstatisticas(), captura)
+    sketch = acumular_em_blocos(dataProcessing.AcumuladorEstatisticas(capacidade_sketch=capacidade), captura)
+
+    for nome in ("ip_origem", "ip_destino", "pacotes_por_ip"):
+        contador, real = getattr(sketch, nome), getattr(exato, nome)
+        erro = contador.erro_maximo()
+        assert len(contador) <= capacidade
+        assert erro <= sum(real.values()) / (capacidade + 1)
+        for ip, contagem in real.items():
+            assert contagem - erro <= contador[ip] <= contagem
+            if contagem > erro:
+                assert ip in contador
+
+    assert len(exato.last_timestamps) > 2 * capacidade
+    assert len(sketch.last_timestamps) <= 2 * capacidade
+    assert len(sketch.ipg_por_ip) <= 2 * capacidade
+    assert len(sketch.destinos_por_ip_origem) <= 2 * capacidade
+
+def test_entropia_tolera_pacotes_atrasados_dentro_do_horizonte():
+    # Janelas de 60 s; o último lote traz um pacote da janela 60 depois de já ter
+    # aparecido a janela 120, de um IP que já estava nela
+    janelas = [np.array([0, 0, 60, 60]), np.array([120, 120]), np.array([60])]
+    ips = [np.array([1, 2, 1, 3]), np.array([1, 2]), np.array([1])]
+
+    em_ordem = dataProcessing.EntropiaJanelas(horizonte=60)
+    em_ordem.atualizar(np.concatenate(janelas), np.concatenate(ips))
+    atrasado = dataProcessing.EntropiaJanelas(horizonte=60)
+    for lote_janelas, lote_ips in zip(janelas, ips):
+        atrasado.atualizar(lote_janelas, lote_ips)
+
+    assert atrasado.entropias().to_dict() == pytest.approx(em_ordem.entropias().to_dict())
+    # Sem horizonte, a janela 60 já estava fechada e o IP 1 conta de novo nela
+    sem_horizonte = dataProcessing.EntropiaJanelas()
+    for lote_janelas, lote_ips in zip(janelas, ips):
+        sem_horizonte.atualizar(lote_janelas, lote_ips)
+    assert sem_horizonte.entropias()[60] != pytest.approx(em_ordem.entropias()[60])
+
+def test_checkpoint_e_acrescimo_igual_a_analise_completa(captura, tmp_path, capsys):
+    with open(captura) as arquivo:
+        linhas = arquivo.readlines()
+    caminho = tmp_path / "crescendo.csv"
+    checkpoint = str(tmp_path / "estado.pkl")
+    caminho.write_text("".join(linhas[:len(linhas) // 2]))
+    dataProcessing.analisar_estatisticas(str(caminho), checkpoint=checkpoint)
+    with open(caminho, "a") as arquivo:
+        arquivo.writelines(linhas[len(linhas) // 2:])
+
+    incremental = dataProcessing.analisar_estatisticas(str(caminho), checkpoint=checkpoint)
+    assert "analisando do início" not in capsys.readouterr().out
+    completa = dataProcessing.analisar_estatisticas(captura)
+    comparar(completa, incremental)
+
+def test_intervalo_pelo_indice_igual_ao_csv_filtrado(captura, tmp_path, monkeypatch):
+    # Blocos de 64 KB para o índice ter várias entradas e a consulta pular parte do arquivo
+    monkeypatch.setattr(dataProcessing, "ler_blocos", functools.partial(dataProcessing.ler_blocos, tamanho_bloco=1 << 16))
+    caminho = tmp_path / "data.csv"
+    caminho.write_text(open(captura).read())
+    with open(caminho) as arquivo:
+        cabecalho, *linhas = arquivo.readlines()
+    _, segundos = dataProcessing.normalizar_timestamps([float(linha.split(",", 1)[0]) for linha in linhas])
+    t0, t1 = int(segundos.min()) + 60, int(segundos.min()) + 120
+
+    no_intervalo = dataProcessing.analisar_estatisticas(str(caminho), inicio=t0, fim=t1)
+    blocos = dataProcessing.carregar_indice(str(caminho))["blocos"]
+    faixas = dataProcessing.faixas_no_intervalo(blocos, t0, t1)
+    assert len(blocos) > 3
+    assert sum(fim - inicio for inicio, fim in faixas) < blocos[-1][1] - blocos[0][0]
+
+    filtrado = tmp_path / "filtrado.csv"
+    filtrado.write_text(cabecalho + "".join(linha for linha, s in zip(linhas, segundos) if t0 <= s < t1))
+    comparar(dataProcessing.analisar_estatisticas(str(filtrado)), no_intervalo)
@@ -0,0 +1,55 @@
+import os
+import random
+import struct
+import subprocess
+
+import pytest
+
+import benchmark
+
+
+@pytest.fixture(scope="module")
+def extrator(tmp_path_factory):
+    pasta = tmp_path_factory.mktemp("extrator")
+    motivo = benchmark.compilar_extrator(str(pasta))
+    if motivo:
+        pytest.skip(f"extrator não compilou: {motivo}")
+    return os.path.join(pasta, "extrator")
+
+def escrever_pcap_zerado(caminho, n_pacotes=30000):
+    # Pacotes ethernet + IPv4 com carga zerada de 0, 200 ou 600 bytes: um corte de faixa
+    # que cai dentro da carga encontra cabeçalhos "zerados" encadeados
+    aleatorio = random.Random(1)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(struct.pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+        tempo = 1735707600.0
+        for i in range(n_pacotes):
+            tempo += aleatorio.random() * 0.001
+            carga = aleatorio.choice([0, 200, 600])
+            ip = struct.pack(">BBHHHBBH4s4s", 0x45, 0, 20 + carga, 0, 0, 64, 6, 0,
+                             bytes([10, 0, i % 256, 1]), bytes([192, 168, 0, i % 7]))
+            pacote = bytes(12) + b"\x08\x00" + ip + bytes(carga)
+            segundo = int(tempo)
+            arquivo.write(struct.pack("<IIII", segundo, int((tempo - segundo) * 1e6), len(pacote), len(pacote)))
+            arquivo.write(pacote)
+
+def rodar(extrator, pasta, *argumentos):
+    subprocess.run([extrator, *argumentos], cwd=pasta, check=True, capture_output=True)
+    with open(os.path.join(pasta, "data.csv"), "rb") as arquivo:
+        return arquivo.read()
+
+def test_faixas_paralelas_igual_a_uma_tarefa(extrator, tmp_path):
+    escrever_pcap_zerado(tmp_path / "captura.pcap")
+    uma_tarefa = rodar(extrator, tmp_path, "-j1", "captura.pcap")
+    faixas = rodar(extrator, tmp_path, "-j4", "-t1", "captura.pcap")
+    assert uma_tarefa.count(b"\n") == 30001
+    assert faixas == uma_tarefa
+    # Os shards temporários são removidos depois de juntados
+    assert sorted(os.listdir(tmp_path)) == ["captura.pcap", "data.csv"]
+
+def test_shards_temporarios_nao_sobrescrevem(extrator, tmp_path):
+    escrever_pcap_zerado(tmp_path / "captura.pcap", n_pacotes=5000)
+    (tmp_path / "data.csv.parte_1").write_text("não apagar\n")
+    processo = subprocess.run([extrator, "-j4", "-t1", "captura.pcap"], cwd=tmp_path, capture_output=True)
+    assert processo.returncode != 0
+    assert (tmp_path / "data.csv.parte_1").read_text() == "não apagar\n"
@@ -0,0 +1,63 @@
+import filtrarCsv
+
+
+def escrever_csv_sujo(caminho, n_linhas=5000):
+    # Linhas válidas com e sem parte decimal, com campos faltando, com timestamp
+    # inválido e a última sem quebra de linha
+    linhas = []
+    for i in range(n_linhas):
+        if i % 97 == 0:
+            linhas.append(f"{1735707600 + i},10.0.0.{i % 7}\n")
+        elif i % 89 == 0:
+            linhas.append(f"abc.def,10.0.0.{i % 7},192.168.0.1,TCP,{60 + i % 1400}\n")
+        else:
+            linhas.append(f"{1735707600 + i / 10:.6f},10.0.0.{i % 7},192.168.0.{i % 5},UDP,{60 + i % 1400}\n")
+    caminho.write_text("timestamp,src_ip,dst_ip,protocol,length\n" + "".join(linhas).rstrip("\n"))
+
+def test_limpeza_em_blocos_paralelos_igual_a_linha_a_linha(tmp_path):
+    original = tmp_path / "sujo.csv"
+    escrever_csv_sujo(original)
+    esperado = b"timestamp,src_ip,dst_ip,protocol,length\n" + b"".join(
+        linha for linha in map(filtrarCsv.limpar_linha, original.read_bytes().split(b"\n")[1:]) if linha is not None
+    )
+
+    for processos, usar_mmap in ((1, True), (3, True), (3, False)):
+        limpo = tmp_path / f"limpo_{processos}_{usar_mmap}.csv"
+        filtrarCsv.limpar_csv_arquivo(str(original), str(limpo), processos=processos, tamanho_bloco=4096,
+                                      usar_mmap=usar_mmap)
+        assert limpo.read_bytes() == esperado
+
+def escrever_csv_fluxos(caminho, n_linhas=20_000):
+    linhas = [f"{1735707600 + i / 100:.6f},10.0.{i % 13}.{i % 251},192.168.0.{i % 5},TCP,{60 + i % 1400}\n"
+              for i in range(n_linhas)]
+    caminho.write_text("timestamp,src_ip,dst_ip,protocol,length\n" + "".join(linhas))
+    return linhas
+
+def test_amostra_uniforme_tem_o_tamanho_pedido_e_se_repete(tmp_path):
+    original = tmp_path / "data.csv"
+    linhas = escrever_csv_fluxos(original)
+    amostras = []
+    for nome, semente in (("a.csv", 5), ("b.csv", 5), ("c.csv", 6)):
+        filtrarCsv.amostrar_csv(str(original), str(tmp_path / nome), n_linhas=1000, modo="uniforme", semente=semente)
+        amostras.append((tmp_path / nome).read_text().splitlines(keepends=True))
+
+    for amostra in amostras:
+        assert amostra[0] == "timestamp,src_ip,dst_ip,protocol,length\n"
+        assert len(amostra) - 1 == 1000
+        # Linhas do original, sem repetição e na ordem original
+        posicoes = [linhas.index(linha) for linha in amostra[1:]]
+        assert posicoes == sorted(set(posicoes))
+    assert amostras[0] == amostras[1]
+    assert amostras[0] != amostras[2]
+
+def test_amostra_por_fluxos_mantem_fluxos_inteiros(tmp_path):
+    original = tmp_path / "data.csv"
+    linhas = escrever_csv_fluxos(original)
+    filtrarCsv.amostrar_csv(str(original), str(tmp_path / "a.csv"), n_linhas=4000, modo="fluxos")
+    filtrarCsv.amostrar_csv(str(original), str(tmp_path / "b.csv"), n_linhas=4000, modo="fluxos")
+    amostra = (tmp_path / "a.csv").read_text().splitlines(keepends=True)[1:]
+
+    assert (tmp_path / "a.csv").read_bytes() == (tmp_path / "b.csv").read_bytes()
+    assert 2000 <= len(amostra) <= 8000
+    origens = {linha.split(",")[1] for linha in amostra}
+    assert amostra == [linha for linha in linhas if linha.split(",")[1] in origens]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import DestinosDistintos, SketchQuantis
+
+
+def hashes_destinos(n, deslocamento=0):
+    return pd.util.hash_array(np.arange(deslocamento, deslocamento + n, dtype=np.uint64))
+
+def atualizar_origem(destinos, origem, hashes):
+    destinos.atualizar(np.zeros(len(hashes), dtype=np.int64), np.array([origem], dtype=object), hashes)
+
+@pytest.mark.parametrize("n_destinos", [100, 512, 5_000, 200_000])
+def test_destinos_distintos_dentro_do_erro(n_destinos):
+    destinos = DestinosDistintos()
+    # Em vários chunks, com destinos repetidos entre eles
+    hashes = hashes_destinos(n_destinos)
+    for inicio in range(0, n_destinos, 10_000):
+        atualizar_origem(destinos, 7, hashes[max(inicio - 100, 0):inicio + 10_000])
+
+    estimativa = destinos.cardinalidade(7)
+    if n_destinos <= destinos.limite_exato:
+        assert estimativa == n_destinos
+    else:
+        # Três erros padrão do HyperLogLog (1.04 / sqrt(2**precisao))
+        erro_padrao = 1.04 / np.sqrt(2 ** destinos.precisao)
+        assert abs(estimativa - n_destinos) <= 3 * erro_padrao * n_destinos
+
+def test_destinos_distintos_mesclados_igual_a_uma_passada():
+    hashes = hashes_destinos(50_000)
+    inteiro = DestinosDistintos()
+    atualizar_origem(inteiro, 7, hashes)
+    metades = [DestinosDistintos(), DestinosDistintos()]
+    atualizar_origem(metades[0], 7, hashes[:30_000])
+    atualizar_origem(metades[1], 7, hashes[20_000:])
+    metades[0].mesclar(metades[1])
+    assert metades[0].cardinalidade(7) == inteiro.cardinalidade(7)
+
+def test_quantis_dentro_do_erro_relativo():
+    # IPGs log-normais, de microssegundos a minutos
+    valores = np.random.default_rng(3).lognormal(mean=-4, sigma=3, size=100_000)
+    sketch = SketchQuantis(erro_relativo=0.01)
+    for lote in np.array_split(valores, 7):
+        sketch.atualizar(lote)
+
+    ordenados = np.sort(valores)
+    for q in (0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0):
+        real = ordenados[int(q * (len(valores) - 1))]
+        assert abs(sketch.quantil(q) - real) <= 0.01 * real
+    assert sketch.contagem == len(valores)
+    assert sketch.media() == pytest.approx(valores.mean())
+
+def test_quantis_mesclados_igual_a_uma_passada():
+    valores = np.random.default_rng(4).exponential(0.05, size=20_000)
+    inteiro = SketchQuantis()
+    inteiro.atualizar(valores)
+    partes = [SketchQuantis() for _ in range(3)]
+    for parte, lote in zip(partes, np.array_split(valores, 3)):
+        parte.atualizar(lote)
+    for parte in partes[1:]:
+        partes[0].mesclar(parte)
+    for q in (0.5, 0.95, 0.99):
+        assert partes[0].quantil(q) == inteiro.quantil(q)